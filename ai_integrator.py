@@ -1,22 +1,126 @@
 import os
+import re
+import time
+import random
+import threading
 import requests
 import json
+import heapq
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from pdf_processor import PDFProcessor
 
+class _TokenBucket:
+    """Blocking token bucket allowing rate requests per second with bursts of up to burst"""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
+
 class AIIntegrator:
-    def __init__(self, upload_folder='uploads'):
+    AI_MODES = ('single', 'concurrent', 'chunked')
+    
+    # Statuses worth retrying: rate limiting and transient server errors
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    # Longest wait between retries, even when the server asks for more with Retry-After
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(self, upload_folder='uploads', pdf_processor=None, cache=None, duplicate_index=None,
+                 single_flight=None, api_url=None, api_key=None, model='gpt-4', completion_cache=None,
+                 api_timeout=60, ai_mode='single', max_concurrency=4, requests_per_second=None,
+                 max_retries=3, chunk_tokens=1500):
         self.upload_folder = upload_folder
-        self.pdf_processor = PDFProcessor(upload_folder=upload_folder)
         
-        # In a production app, these would be environment variables or configuration settings
-        self.openai_api_key = None  # Would be set in production
-        self.use_mock_responses = True  # For development without actual API keys
+        # Share the app's processor (and its cache) when one is given
+        self.pdf_processor = pdf_processor or PDFProcessor(upload_folder=upload_folder, cache=cache)
+        self.cache = cache
+        
+        # Optional NearDuplicateIndex used to reuse plans and renders of near-identical uploads
+        self.duplicate_index = duplicate_index
+        
+        # Optional SingleFlight so concurrent requests for the same document share one analysis
+        self.single_flight = single_flight
+        
+        # Any OpenAI-compatible chat completions endpoint; mock responses are used until one is configured
+        self.api_url = (api_url or 'https://api.openai.com/v1').rstrip('/')
+        self.openai_api_key = api_key
+        self.model = model
+        self.api_timeout = api_timeout
+        self.use_mock_responses = not (api_key or api_url)  # For development without actual API keys
+        
+        # Optional CompletionCache so identical prompts are only sent once
+        self.completion_cache = completion_cache
+        
+        # 'concurrent' asks for the concept list first, then describes each concept in parallel;
+        # 'chunked' analyses the whole document in chunks of chunk_tokens and merges the concepts
+        if ai_mode not in self.AI_MODES:
+            raise ValueError(f"Unknown AI mode: {ai_mode}")
+        self.ai_mode = ai_mode
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.chunk_tokens = chunk_tokens
+        
+        # Pooled connections, a cap on requests in flight and an optional rate limit, shared by all callers
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._in_flight = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = _TokenBucket(requests_per_second) if requests_per_second else None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ai-request')
     
     def analyze_content(self, filename):
         """
         Analyze PDF content using AI to extract topics and generate learning content
         """
         try:
+            cache_key = self._cache_key(filename)
+            if not self.single_flight or not cache_key:
+                return self._analyze_content(filename, cache_key)
+            
+            analysis_result = self.single_flight.do(
+                f"{self._artifact('ai_analysis')}:{cache_key}",
+                lambda: self._analyze_content(filename, cache_key)
+            )
+            
+            # Coalesced callers share one result, so give each its own copy with its filename
+            analysis_result = dict(analysis_result)
+            if 'basic_content' in analysis_result:
+                analysis_result['basic_content'] = dict(analysis_result['basic_content'], filename=filename)
+            return analysis_result
+            
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def _analyze_content(self, filename, cache_key):
+        """Run the analysis, unless a cached result exists"""
+        try:
+            # Reuse an earlier analysis of the same document
+            if cache_key:
+                analysis_result = self.cache.get(cache_key, self._artifact('ai_analysis'))
+                if analysis_result is not None:
+                    analysis_result['basic_content']['filename'] = filename
+                    return analysis_result
+            
             # First extract text and basic topics using our PDFProcessor
             basic_content = self.pdf_processor.generate_content_structure(filename)
             
@@ -25,25 +129,133 @@ class AIIntegrator:
             
             # If we're using mock responses for development
             if self.use_mock_responses:
-                return self._generate_mock_ai_analysis(basic_content)
+                analysis_result = self._generate_mock_ai_analysis(basic_content)
+            elif self.ai_mode == 'concurrent':
+                analysis_result = self._call_ai_api_concurrent(basic_content)
+            elif self.ai_mode == 'chunked':
+                analysis_result = self._call_ai_api_chunked(filename, basic_content)
+            else:
+                analysis_result = self._call_ai_api(basic_content)
             
-            # In production, we would call an actual AI API
-            # return self._call_ai_api(basic_content)
+            if cache_key and 'error' not in analysis_result:
+                self.cache.set(cache_key, self._artifact('ai_analysis'), analysis_result)
             
-            return self._generate_mock_ai_analysis(basic_content)
+            return analysis_result
             
         except Exception as e:
             return {'error': str(e)}
     
+    def _artifact(self, name):
+        """Name cached analyses after the model that produced them, so mock and model results never mix"""
+        if self.use_mock_responses:
+            return name
+        model = re.sub(r'[^\w.-]', '_', self.model)
+        if self.ai_mode != 'single':
+            return f"{name}-{model}-{self.ai_mode}"
+        return f"{name}-{model}"
+    
+    def _cache_key(self, filename):
+        """Return the analysis cache key for a file, or None if caching is off or the file is missing"""
+        file_path = os.path.join(self.upload_folder, filename)
+        if not self.cache or not os.path.isfile(file_path):
+            return None
+        
+        return self.cache.document_key(file_path)
+    
+    def _find_near_duplicate(self, filename, cache_key):
+        """
+        Look for an earlier upload that is nearly identical to this one, then index this one.
+        
+        Returns (document_key, similarity) or None.
+        """
+        if not self.duplicate_index or not cache_key:
+            return None
+        
+        text = self.pdf_processor.extract_text(filename)
+        signature = self.duplicate_index.signature(text)
+        if signature is None:
+            # Too little text to tell documents apart, e.g. a scanned PDF
+            return None
+        
+        match = self.duplicate_index.query(signature=signature, exclude=cache_key)
+        self.duplicate_index.add(cache_key, signature=signature)
+        
+        return match
+    
+    def _chat_completion(self, messages, parse=None, **params):
+        """
+        Send a chat completion request and return the message content, or parse(content) if parse is given.
+        
+        Identical requests (same model, messages and parameters) are answered
+        from the completion cache when one is configured. A reply is only
+        cached once parse accepts it, so a malformed one is asked for again
+        next time rather than served from the cache until it expires.
+        """
+        cache_key = None
+        if self.completion_cache:
+            cache_key = self.completion_cache.key(self.model, messages, params)
+            content = self.completion_cache.get(cache_key)
+            if content is not None:
+                try:
+                    return parse(content) if parse else content
+                except ValueError:
+                    # Cached before replies were checked; ask again and replace it
+                    pass
+        
+        headers = {'Content-Type': 'application/json'}
+        if self.openai_api_key:
+            headers['Authorization'] = f"Bearer {self.openai_api_key}"
+        
+        for attempt in range(self.max_retries + 1):
+            if self._rate_limiter:
+                self._rate_limiter.acquire()
+            
+            try:
+                with self._in_flight:
+                    response = self._session.post(
+                        f"{self.api_url}/chat/completions",
+                        headers=headers,
+                        json=dict(params, model=self.model, messages=messages),
+                        timeout=self.api_timeout
+                    )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            
+            if response is not None and response.status_code not in self.RETRY_STATUSES:
+                break
+            if attempt == self.max_retries:
+                break
+            
+            time.sleep(self._retry_delay(attempt, response))
+        
+        response.raise_for_status()
+        content = response.json()['choices'][0]['message']['content']
+        result = parse(content) if parse else content
+        
+        if cache_key:
+            self.completion_cache.set(cache_key, content)
+        
+        return result
+    
+    def _retry_delay(self, attempt, response=None):
+        """Exponential backoff with full jitter, honouring Retry-After (up to MAX_RETRY_DELAY) when the server sends it"""
+        if response is not None:
+            try:
+                delay = float(response.headers['Retry-After'])
+            except (KeyError, ValueError):
+                delay = None
+            # Also rules out NaN
+            if delay is not None and delay >= 0:
+                return min(delay, self.MAX_RETRY_DELAY)
+        
+        return random.uniform(0, min(self.MAX_RETRY_DELAY, 0.5 * 2 ** attempt))
+    
     def _call_ai_api(self, content_structure):
         """
         Call an external AI API to enhance content understanding
-        This is a placeholder for actual API integration
         """
-        # Example of how we would call OpenAI API in production
-        if not self.openai_api_key:
-            return {'error': 'API key not configured'}
-        
         try:
             # Prepare the prompt for the AI
             topics = [topic['name'] for topic in content_structure['topics']]
@@ -79,23 +291,250 @@ class AIIntegrator:
             }}
             """
             
-            # Call OpenAI API (this would be implemented in production)
-            # response = openai.ChatCompletion.create(
-            #     model="gpt-4",
-            #     messages=[{"role": "system", "content": "You are an educational content expert."},
-            #               {"role": "user", "content": prompt}],
-            #     temperature=0.7
-            # )
-            # 
-            # ai_response = json.loads(response.choices[0].message.content)
-            # return ai_response
+            ai_analysis = self._normalize_ai_analysis(self._chat_completion(
+                [{"role": "system", "content": "You are an educational content expert."},
+                 {"role": "user", "content": prompt}],
+                parse=self._parse_json,
+                temperature=0.7
+            ))
+            
+            return {
+                "success": True,
+                "basic_content": content_structure,
+                "ai_analysis": ai_analysis
+            }
+            
+        except Exception as e:
+            return {'error': f"AI API error: {str(e)}"}
+    
+    def _call_ai_api_concurrent(self, content_structure):
+        """
+        Ask for the concept list first, then describe every concept with its own request.
+        
+        The per-concept requests run concurrently, so the analysis takes about as
+        long as the outline plus the slowest concept instead of one long reply.
+        """
+        try:
+            outline = self._request_concept_outline(content_structure)
+            names = self._outline_concept_names(outline)
+            
+            futures = [
+                self._executor.submit(self._describe_concept, name, outline.get('overall_theme', ''), content_structure)
+                for name in names
+            ]
+            outline['concepts'] = [future.result() for future in futures]
+            ai_analysis = self._normalize_ai_analysis(outline)
+            
+            return {
+                "success": True,
+                "basic_content": content_structure,
+                "ai_analysis": ai_analysis
+            }
+            
+        except Exception as e:
+            return {'error': f"AI API error: {str(e)}"}
+    
+    def _request_concept_outline(self, content_structure):
+        """Ask only for concept names, their order and the overall theme"""
+        topics = [topic['name'] for topic in content_structure['topics']]
+        key_sentences = content_structure['key_sentences']
+        
+        prompt = f"""
+            Analyze the following educational content:
+            
+            Topics: {', '.join(topics)}
+            
+            Key content:
+            {' '.join(key_sentences[:10])}
+            
+            Identify the 3-5 most important concepts to learn and a learning sequence for them.
+            
+            Format your response as JSON with the following structure:
+            {{
+                "concepts": [{{"name": "Concept name"}}],
+                "learning_sequence": ["concept1", "concept2", "concept3"],
+                "overall_theme": "Theme that ties concepts together"
+            }}
+            """
+        
+        return self._chat_completion(
+            [{"role": "system", "content": "You are an educational content expert."},
+             {"role": "user", "content": prompt}],
+            parse=self._parse_json,
+            temperature=0.7
+        )
+    
+    def _outline_concept_names(self, outline, max_concepts=5):
+        return [concept['name'] if isinstance(concept, dict) else str(concept)
+                for concept in outline.get('concepts', [])][:max_concepts]
+    
+    def _describe_concept(self, name, overall_theme, content_structure):
+        """Ask for the explanation, visuals and sounds of one concept"""
+        key_sentences = content_structure['key_sentences']
+        
+        prompt = f"""
+            Concept: {name}
+            
+            Overall theme: {overall_theme}
+            
+            Key content:
+            {' '.join(key_sentences[:10])}
+            
+            For this concept, please:
+            1. Provide a brief explanation suitable for a short educational video
+            2. Suggest visual elements that would help explain it
+            3. Suggest types of ASMR or pleasant sounds that would enhance learning it
+            
+            Format your response as JSON with the following structure:
+            {{
+                "name": "{name}",
+                "explanation": "Brief explanation",
+                "visuals": ["visual element 1", "visual element 2"],
+                "sounds": ["sound type 1", "sound type 2"]
+            }}
+            """
+        
+        concept = self._chat_completion(
+            [{"role": "system", "content": "You are an educational content expert."},
+             {"role": "user", "content": prompt}],
+            parse=self._parse_json,
+            temperature=0.7
+        )
+        concept['name'] = name
+        return concept
+    
+    def _call_ai_api_chunked(self, filename, content_structure):
+        """
+        Map-reduce analysis of the whole document rather than its top key sentences.
+        
+        The document is split into token-budgeted chunks, every chunk is analysed
+        with its own request in parallel, and the chunk concepts are merged. Chunk
+        prompts only contain the chunk text, so with a completion cache an edited
+        PDF only sends the chunks whose text changed.
+        """
+        try:
+            chunks = self.pdf_processor.chunk_document(filename, max_tokens=self.chunk_tokens)
+            futures = [self._executor.submit(self._analyze_chunk, chunk['text']) for chunk in chunks]
+            chunk_analyses = [future.result() for future in futures]
+            
+            ai_analysis = self._normalize_ai_analysis(self._merge_chunk_analyses(chunk_analyses))
+            ai_analysis['chunks_analyzed'] = len(chunks)
             
-            # For now, return mock data
-            return self._generate_mock_ai_analysis(content_structure)
+            return {
+                "success": True,
+                "basic_content": content_structure,
+                "ai_analysis": ai_analysis
+            }
             
         except Exception as e:
             return {'error': f"AI API error: {str(e)}"}
     
+    def _analyze_chunk(self, text):
+        """Ask for the concepts taught by one chunk of the document"""
+        prompt = f"""
+            Analyze the following excerpt from an educational document:
+            
+            Excerpt:
+            {text}
+            
+            Identify up to 5 concepts this excerpt teaches. For each, provide a brief
+            explanation suitable for a short educational video, visual elements and
+            ASMR or pleasant sounds that would help, and an importance from 1 to 10.
+            
+            Format your response as JSON with the following structure:
+            {{
+                "concepts": [
+                    {{
+                        "name": "Concept name",
+                        "explanation": "Brief explanation",
+                        "visuals": ["visual element 1", "visual element 2"],
+                        "sounds": ["sound type 1", "sound type 2"],
+                        "importance": 5
+                    }}
+                ],
+                "theme": "Theme of this excerpt"
+            }}
+            """
+        
+        return self._chat_completion(
+            [{"role": "system", "content": "You are an educational content expert."},
+             {"role": "user", "content": prompt}],
+            parse=self._parse_json,
+            temperature=0.7
+        )
+    
+    def _merge_chunk_analyses(self, chunk_analyses, max_concepts=5):
+        """Combine per-chunk concepts, ranking by total importance across chunks"""
+        merged = {}
+        for position, analysis in enumerate(chunk_analyses):
+            for concept in analysis.get('concepts', []):
+                name = str(concept.get('name', '')).strip()
+                key = re.sub(r'\W+', ' ', name.lower()).strip()
+                if not key:
+                    continue
+                
+                try:
+                    importance = float(concept.get('importance', 5))
+                except (TypeError, ValueError):
+                    importance = 5.0
+                
+                entry = merged.get(key)
+                if entry is None:
+                    entry = merged[key] = {'concept': dict(concept, name=name), 'score': 0.0, 'first': position}
+                entry['score'] += importance
+                
+                # Keep the most detailed explanation seen for the concept
+                if len(concept.get('explanation') or '') > len(entry['concept'].get('explanation') or ''):
+                    entry['concept']['explanation'] = concept['explanation']
+        
+        top = heapq.nlargest(max_concepts, merged.values(), key=lambda entry: (entry['score'], -entry['first']))
+        
+        # Learn concepts in the order the document introduces them
+        top.sort(key=lambda entry: entry['first'])
+        concepts = [entry['concept'] for entry in top]
+        
+        ai_analysis = {
+            "concepts": concepts,
+            "learning_sequence": [concept['name'] for concept in concepts]
+        }
+        
+        themes = Counter(analysis.get('theme') for analysis in chunk_analyses if analysis.get('theme'))
+        if themes:
+            ai_analysis['overall_theme'] = themes.most_common(1)[0][0]
+        
+        return ai_analysis
+    
+    def _parse_json(self, content):
+        """Parse a JSON object reply, tolerating the markdown code fences some models wrap it in"""
+        content = content.strip()
+        if content.startswith('```'):
+            content = content.split('\n', 1)[1] if '\n' in content else ''
+            content = content.rsplit('```', 1)[0]
+        
+        parsed = json.loads(content)
+        if not isinstance(parsed, dict):
+            raise ValueError("Expected a JSON object in the AI response")
+        return parsed
+    
+    def _normalize_ai_analysis(self, ai_analysis):
+        """Fill in fields the video plan relies on that a model response may leave out"""
+        concepts = []
+        for concept in ai_analysis.get('concepts', []):
+            concepts.append({
+                "name": concept.get('name', 'Concept'),
+                "explanation": concept.get('explanation', ''),
+                "visuals": list(concept.get('visuals') or []),
+                "sounds": list(concept.get('sounds') or [])
+            })
+        
+        ai_analysis['concepts'] = concepts
+        ai_analysis.setdefault('learning_sequence', [concept['name'] for concept in concepts])
+        ai_analysis.setdefault('overall_theme', "Mastering key principles through sensory-enhanced learning")
+        ai_analysis.setdefault('video_style_recommendation', "Short, focused videos with clear text overlays and pleasant background sounds")
+        ai_analysis.setdefault('estimated_optimal_video_length', "2-3 minutes per concept")
+        
+        return ai_analysis
+    
     def _generate_mock_ai_analysis(self, content_structure):
         """
         Generate mock AI analysis for development purposes
@@ -144,12 +583,162 @@ class AIIntegrator:
             "ai_analysis": ai_analysis
         }
     
+    def _build_concept_video_plan(self, index, concept):
+        """Create the plan for one concept's video"""
+        # Create a structured plan for this concept's video
+        video_plan = {
+            "video_id": f"video_{index+1}",
+            "title": concept['name'],
+            "description": concept['explanation'],
+            "duration": "2-3 minutes",
+            "segments": [
+                {
+                    "type": "intro",
+                    "content": f"Introduction to {concept['name']}",
+                    "duration": "15-20 seconds",
+                    "visuals": concept['visuals'][0] if concept['visuals'] else "Text overlay with title",
+                    "audio": concept['sounds'][0] if concept['sounds'] else "Gentle background music"
+                },
+                {
+                    "type": "explanation",
+                    "content": concept['explanation'],
+                    "duration": "60-90 seconds",
+                    "visuals": concept['visuals'][1] if len(concept['visuals']) > 1 else "Animated text with key points",
+                    "audio": concept['sounds'][1] if len(concept['sounds']) > 1 else "ASMR whispers"
+                },
+                {
+                    "type": "summary",
+                    "content": f"Key takeaways about {concept['name']}",
+                    "duration": "30-45 seconds",
+                    "visuals": concept['visuals'][2] if len(concept['visuals']) > 2 else "Mind map of concept",
+                    "audio": concept['sounds'][2] if len(concept['sounds']) > 2 else "Calming nature sounds"
+                }
+            ],
+            "tags": [concept['name'].lower(), "educational", "brainrot", "asmr", "learning"]
+        }
+        
+        return video_plan
+    
+    def _assemble_video_plan(self, filename, ai_analysis, video_plans):
+        return {
+            "filename": filename,
+            "overall_theme": ai_analysis['overall_theme'],
+            "learning_sequence": ai_analysis['learning_sequence'],
+            "video_style": ai_analysis['video_style_recommendation'],
+            "videos": video_plans
+        }
+    
+    def iter_video_plan(self, filename):
+        """
+        Generate a video plan like generate_video_plan, yielding (event, data) pairs as it goes.
+        
+        Each concept's plan is yielded as a 'video_plan' event as soon as it is
+        ready, followed by a 'summary' event with the complete plan, or an
+        'error' event. Only the concurrent AI mode produces concepts one at a
+        time; otherwise (and for cached plans or near-duplicates) the plan is
+        built first and then replayed.
+        """
+        cache_key = self._cache_key(filename)
+        
+        incremental = self.ai_mode == 'concurrent' and not self.use_mock_responses
+        if incremental and cache_key and self.cache.get(cache_key, self._artifact('video_plan')) is not None:
+            incremental = False
+        if incremental:
+            try:
+                incremental = not self._find_near_duplicate(filename, cache_key)
+            except Exception as e:
+                print(f"Warning: Near-duplicate lookup failed: {str(e)}")
+        
+        if not incremental:
+            plan_result = self.generate_video_plan(filename)
+            if 'error' in plan_result:
+                yield 'error', {'error': plan_result['error']}
+                return
+            
+            for video_plan in plan_result['video_generation_plan']['videos']:
+                yield 'video_plan', video_plan
+            yield 'summary', plan_result
+            return
+        
+        basic_content = self.pdf_processor.generate_content_structure(filename)
+        if 'error' in basic_content:
+            yield 'error', {'error': basic_content['error']}
+            return
+        
+        try:
+            outline = self._request_concept_outline(basic_content)
+            names = self._outline_concept_names(outline)
+            futures = {
+                self._executor.submit(self._describe_concept, name, outline.get('overall_theme', ''), basic_content): position
+                for position, name in enumerate(names)
+            }
+            
+            # Hand out each concept's plan in the order the answers arrive
+            concepts = [None] * len(names)
+            for future in as_completed(futures):
+                position = futures[future]
+                concepts[position] = self._normalize_ai_analysis({'concepts': [future.result()]})['concepts'][0]
+                yield 'video_plan', self._build_concept_video_plan(position, concepts[position])
+        except Exception as e:
+            yield 'error', {'error': f"AI API error: {str(e)}"}
+            return
+        
+        outline['concepts'] = concepts
+        ai_analysis = self._normalize_ai_analysis(outline)
+        video_plans = [self._build_concept_video_plan(i, concept) for i, concept in enumerate(concepts)]
+        plan_result = {
+            "success": True,
+            "video_generation_plan": self._assemble_video_plan(filename, ai_analysis, video_plans)
+        }
+        
+        # Leave the same artifacts behind as analyze_content and generate_video_plan
+        if cache_key:
+            self.cache.set(cache_key, self._artifact('ai_analysis'), {
+                "success": True,
+                "basic_content": basic_content,
+                "ai_analysis": ai_analysis
+            })
+            self.cache.set(cache_key, self._artifact('video_plan'), plan_result)
+        
+        yield 'summary', plan_result
+    
     def generate_video_plan(self, filename):
         """
         Generate a comprehensive plan for creating educational videos from a PDF
         """
+        # Reuse an earlier plan for the same document
+        cache_key = self._cache_key(filename)
+        if cache_key:
+            plan_result = self.cache.get(cache_key, self._artifact('video_plan'))
+            if plan_result is not None:
+                plan_result['video_generation_plan']['filename'] = filename
+                return plan_result
+        
+        # A near-identical upload can hand us its plan, or at least its AI analysis
+        try:
+            duplicate = self._find_near_duplicate(filename, cache_key)
+        except Exception as e:
+            print(f"Warning: Near-duplicate lookup failed: {str(e)}")
+            duplicate = None
+        
+        analysis_result = None
+        if duplicate:
+            duplicate_key, similarity = duplicate
+            reused_from = {"document": duplicate_key, "similarity": similarity}
+            
+            plan_result = self.cache.get(duplicate_key, self._artifact('video_plan'))
+            if plan_result is not None:
+                video_generation_plan = plan_result['video_generation_plan']
+                video_generation_plan['filename'] = filename
+                video_generation_plan['reused_from'] = reused_from
+                self.cache.set(cache_key, self._artifact('video_plan'), plan_result)
+                return plan_result
+            
+            analysis_result = self.cache.get(duplicate_key, self._artifact('ai_analysis'))
+        
         # First get the AI analysis of the content
-        analysis_result = self.analyze_content(filename)
+        if analysis_result is None:
+            analysis_result = self.analyze_content(filename)
         
         if 'error' in analysis_result:
             return {'error': analysis_result['error']}
@@ -158,52 +747,23 @@ class AIIntegrator:
         ai_analysis = analysis_result['ai_analysis']
         
         # Create a video plan for each concept
-        video_plans = []
-        for i, concept in enumerate(ai_analysis['concepts']):
-            # Create a structured plan for this concept's video
-            video_plan = {
-                "video_id": f"video_{i+1}",
-                "title": concept['name'],
-                "description": concept['explanation'],
-                "duration": "2-3 minutes",
-                "segments": [
-                    {
-                        "type": "intro",
-                        "content": f"Introduction to {concept['name']}",
-                        "duration": "15-20 seconds",
-                        "visuals": concept['visuals'][0] if concept['visuals'] else "Text overlay with title",
-                        "audio": concept['sounds'][0] if concept['sounds'] else "Gentle background music"
-                    },
-                    {
-                        "type": "explanation",
-                        "content": concept['explanation'],
-                        "duration": "60-90 seconds",
-                        "visuals": concept['visuals'][1] if len(concept['visuals']) > 1 else "Animated text with key points",
-                        "audio": concept['sounds'][1] if len(concept['sounds']) > 1 else "ASMR whispers"
-                    },
-                    {
-                        "type": "summary",
-                        "content": f"Key takeaways about {concept['name']}",
-                        "duration": "30-45 seconds",
-                        "visuals": concept['visuals'][2] if len(concept['visuals']) > 2 else "Mind map of concept",
-                        "audio": concept['sounds'][2] if len(concept['sounds']) > 2 else "Calming nature sounds"
-                    }
-                ],
-                "tags": [concept['name'].lower(), "educational", "brainrot", "asmr", "learning"]
-            }
-            
-            video_plans.append(video_plan)
+        video_plans = [
+            self._build_concept_video_plan(i, concept)
+            for i, concept in enumerate(ai_analysis['concepts'])
+        ]
         
         # Create the complete video generation plan
-        video_generation_plan = {
-            "filename": filename,
-            "overall_theme": ai_analysis['overall_theme'],
-            "learning_sequence": ai_analysis['learning_sequence'],
-            "video_style": ai_analysis['video_style_recommendation'],
-            "videos": video_plans
-        }
+        video_generation_plan = self._assemble_video_plan(filename, ai_analysis, video_plans)
         
-        return {
+        if duplicate:
+            video_generation_plan['reused_from'] = reused_from
+        
+        plan_result = {
             "success": True,
             "video_generation_plan": video_generation_plan
         }
+        
+        if cache_key:
+            self.cache.set(cache_key, self._artifact('video_plan'), plan_result)
+        
+        return plan_result
@@ -0,0 +1,133 @@
+import os
+import json
+import hashlib
+import threading
+import time
+
+class AnalysisCache:
+    """
+    On-disk cache for per-document analysis artifacts.
+    
+    Artifacts are stored as JSON files under a directory named after the SHA-256
+    of the PDF bytes plus the processor version, so the same document uploaded
+    under a different filename hits the same entries and a processor upgrade
+    invalidates everything. The total size is bounded with least-recently-used
+    eviction based on file modification times, which are refreshed on every hit.
+    """
+    def __init__(self, cache_folder='uploads/.cache', version='1', max_bytes=256 * 1024 * 1024):
+        self.cache_folder = cache_folder
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        
+        # Create cache directory if it doesn't exist
+        os.makedirs(cache_folder, exist_ok=True)
+        
+        # Remember digests by (path, size, mtime) so we don't rehash unchanged files
+        self._digests = {}
+        self._lock = threading.Lock()
+    
+    def document_key(self, file_path):
+        """Return the cache key for a PDF file"""
+        stat = os.stat(file_path)
+        fingerprint = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        
+        with self._lock:
+            digest = self._digests.get(fingerprint)
+        
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha256.update(block)
+            digest = sha256.hexdigest()
+            
+            with self._lock:
+                self._digests[fingerprint] = digest
+        
+        return f"{digest}-v{self.version}"
+    
+    def _artifact_path(self, key, artifact):
+        return os.path.join(self.cache_folder, key, f"{artifact}.json")
+    
+    def get(self, key, artifact):
+        """Return a cached artifact, or None if it isn't cached"""
+        path = self._artifact_path(key, artifact)
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        return value
+    
+    def set(self, key, artifact, value):
+        """Store an artifact and evict old entries if the cache is over budget"""
+        path = self._artifact_path(key, artifact)
+        
+        # Write to a temporary file first so readers never see a partial artifact
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            f = open(temp_path, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            # Another process evicted the document folder in the meantime
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(temp_path, 'w', encoding='utf-8')
+        with f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+        
+        self.evict()
+    
+    def evict(self):
+        """Delete least recently used artifacts until the cache fits in max_bytes"""
+        entries = []
+        total_bytes = 0
+        
+        for key in os.listdir(self.cache_folder):
+            key_folder = os.path.join(self.cache_folder, key)
+            if not os.path.isdir(key_folder):
+                continue
+            
+            for name in os.listdir(key_folder):
+                path = os.path.join(key_folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                
+                # Clean up temporary files left behind by crashed writers
+                if name.endswith('.tmp') and stat.st_mtime < time.time() - 3600:
+                    self._remove(path)
+                    continue
+                
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+        
+        if total_bytes <= self.max_bytes:
+            return
+        
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            # Drop the document folder once its last artifact is gone
+            folder = os.path.dirname(path)
+            if not os.listdir(folder):
+                os.rmdir(folder)
+        except OSError:
+            pass
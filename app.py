@@ -1,7 +1,20 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context,
+                   send_from_directory)
 import os
+import json
+import uuid
 from werkzeug.utils import secure_filename
 from pdf_processor import PDFProcessor
+from analysis_cache import AnalysisCache
+from topic_index import CorpusTopicIndex
+from duplicate_index import NearDuplicateIndex
+from background_analysis import BackgroundAnalyzer
+from single_flight import SingleFlight
+from completion_cache import CompletionCache
+from render_jobs import RenderJobQueue
+from render_store import RenderStore
+from progressive_output import ProgressiveOutput
+from encoding_profiles import get_profile
 from ai_integrator import AIIntegrator
 from video_generator import VideoGenerator
 from audio_integrator import AudioIntegrator
@@ -14,38 +27,165 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Create uploads directory if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-# Initialize processors
-pdf_processor = PDFProcessor(upload_folder=UPLOAD_FOLDER)
-ai_integrator = AIIntegrator(upload_folder=UPLOAD_FOLDER)
-video_generator = VideoGenerator(upload_folder=UPLOAD_FOLDER, output_folder='static/videos')
-audio_integrator = AudioIntegrator(sounds_folder='static/sounds')
-
-# Try to import enhanced components, fall back to basic ones if not available
-try:
-    from enhanced_video_generator import EnhancedVideoGenerator
-    from asmr_video_downloader import ASMRVideoDownloader
-    from text_overlay_optimizer import TextOverlayOptimizer
-    
-    # Initialize enhanced components
-    enhanced_video_generator = EnhancedVideoGenerator(
-        upload_folder=UPLOAD_FOLDER, 
-        output_folder='static/videos',
-        asmr_folder='static/asmr_videos'
+# Analysis artifacts live on the uploads volume so every replica shares them
+CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.cache')
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 'fast' swaps NLTK word tokenization for a regex tokenizer and caches lemmas
+NLP_MODE = os.environ.get('NLP_MODE', 'accurate')
+
+# 'tfidf' ranks topics against document frequencies of every PDF analysed so far
+TOPIC_METHOD = os.environ.get('TOPIC_METHOD', 'frequency')
+TOPIC_INDEX_FOLDER = os.path.join(UPLOAD_FOLDER, '.topic_index')
+
+# MinHash signatures of earlier uploads, used to reuse plans and renders for near-duplicates
+DUPLICATE_INDEX_FOLDER = os.path.join(UPLOAD_FOLDER, '.minhash')
+
+# OpenAI-compatible chat completions endpoint; without a URL or key the mock analysis is used
+AI_API_URL = os.environ.get('AI_API_URL') or None
+AI_API_KEY = os.environ.get('AI_API_KEY') or None
+AI_MODEL = os.environ.get('AI_MODEL', 'gpt-4')
+
+# 'concurrent' requests the concept list first and then each concept in parallel;
+# 'chunked' analyses the whole document in chunks of AI_CHUNK_TOKENS and merges the results
+AI_MODE = os.environ.get('AI_MODE', 'single')
+AI_CHUNK_TOKENS = int(os.environ.get('AI_CHUNK_TOKENS', 1500))
+AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 4))
+AI_REQUESTS_PER_SECOND = float(os.environ.get('AI_REQUESTS_PER_SECOND', 0)) or None
+
+# Completion responses keyed by model, prompt and parameters, shared by every replica
+AI_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.ai_cache')
+AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 7 * 24 * 3600))
+AI_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Locks and results used to coalesce identical work, on the videos volume every replica shares
+SINGLE_FLIGHT_FOLDER = os.path.join('static/videos', '.locks')
+
+# Render jobs are queued in SQLite on the videos volume and rendered by background workers
+RENDER_JOBS_DB = os.path.join('static/videos', '.jobs', 'render_jobs.db')
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', 1))
+
+# Processes rendering the concepts of one plan in parallel; 0 sizes it to the container's CPU quota
+RENDER_PROCESSES = int(os.environ.get('RENDER_PROCESSES', 0)) or None
+
+# 'ffmpeg' renders static overlays in one ffmpeg filter graph instead of compositing frames with moviepy
+RENDER_BACKEND = os.environ.get('RENDER_BACKEND', 'moviepy')
+
+# Encoding profile for renders ('draft', 'standard' or 'final'); plans and requests can pick another
+ENCODING_PROFILE = os.environ.get('ENCODING_PROFILE', 'standard')
+
+# Stream videos as HLS while they render, so the results page can play them before they finish;
+# requests can turn it on or off with 'progressive'
+PROGRESSIVE_OUTPUT = os.environ.get('PROGRESSIVE_OUTPUT', 'false').lower() in ('1', 'true', 'yes')
+
+# Rasterised text overlays, reused across renders and render processes
+OVERLAY_CACHE_FOLDER = os.path.join('static/videos', '.overlays')
+
+# Rendered videos are evicted least recently used first once they outgrow this, unless a document still lists them
+RENDER_STORE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+
+# Render worker processes are spawned, and spawning imports the main module again as __mp_main__ (this file,
+# under 'python app.py'). Only the real app builds its components, prunes streams and runs render jobs.
+if __name__ != '__mp_main__':
+    # Create uploads directory if it doesn't exist
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    
+    # Initialize processors
+    analysis_cache = AnalysisCache(cache_folder=CACHE_FOLDER, version=PDFProcessor.VERSION, max_bytes=CACHE_MAX_BYTES)
+    topic_index = CorpusTopicIndex(index_folder=TOPIC_INDEX_FOLDER)
+    pdf_processor = PDFProcessor(
+        upload_folder=UPLOAD_FOLDER,
+        cache=analysis_cache,
+        nlp_mode=NLP_MODE,
+        topic_method=TOPIC_METHOD,
+        topic_index=topic_index
+    )
+    duplicate_index = NearDuplicateIndex(index_folder=DUPLICATE_INDEX_FOLDER)
+    single_flight = SingleFlight(lock_folder=SINGLE_FLIGHT_FOLDER)
+    completion_cache = CompletionCache(cache_folder=AI_CACHE_FOLDER, ttl=AI_CACHE_TTL, max_bytes=AI_CACHE_MAX_BYTES)
+    ai_integrator = AIIntegrator(
+        upload_folder=UPLOAD_FOLDER,
+        pdf_processor=pdf_processor,
+        cache=analysis_cache,
+        duplicate_index=duplicate_index,
+        single_flight=single_flight,
+        api_url=AI_API_URL,
+        api_key=AI_API_KEY,
+        model=AI_MODEL,
+        completion_cache=completion_cache,
+        ai_mode=AI_MODE,
+        max_concurrency=AI_MAX_CONCURRENCY,
+        requests_per_second=AI_REQUESTS_PER_SECOND,
+        chunk_tokens=AI_CHUNK_TOKENS
     )
-    asmr_downloader = ASMRVideoDownloader(download_folder='static/asmr_videos')
-    text_optimizer = TextOverlayOptimizer(fonts_folder='static/fonts')
-    
-    # Flag to indicate enhanced features are available
-    ENHANCED_FEATURES = True
-    print("Enhanced features enabled: Video generation with ASMR content and optimized text overlays")
-except ImportError as e:
-    # Fall back to basic components
-    ENHANCED_FEATURES = False
-    print(f"Enhanced features disabled due to import error: {str(e)}")
-    print("Using basic video generation features")
+    background_analyzer = BackgroundAnalyzer(pdf_processor, ai_integrator)
+    render_store = RenderStore(root='static/videos', max_bytes=RENDER_STORE_MAX_BYTES)
+    progressive_output = ProgressiveOutput(root='static/videos')
+    progressive_output.prune()
+    video_generator = VideoGenerator(upload_folder=UPLOAD_FOLDER, output_folder='static/videos', render_store=render_store,
+                                     encoding_profile=ENCODING_PROFILE)
+    audio_integrator = AudioIntegrator(sounds_folder='static/sounds')
+    
+    # Try to import enhanced components, fall back to basic ones if not available
+    try:
+        from enhanced_video_generator import EnhancedVideoGenerator
+        from asmr_video_downloader import ASMRVideoDownloader
+        from text_overlay_optimizer import TextOverlayOptimizer
+        from overlay_cache import OverlayCache
+        from background_library import BackgroundLibrary
+        
+        # Initialize enhanced components
+        overlay_cache = OverlayCache(cache_folder=OVERLAY_CACHE_FOLDER)
+        background_library = BackgroundLibrary(source_folder='static/asmr_videos')
+        enhanced_video_generator = EnhancedVideoGenerator(
+            upload_folder=UPLOAD_FOLDER, 
+            output_folder='static/videos',
+            asmr_folder='static/asmr_videos',
+            single_flight=single_flight,
+            render_processes=RENDER_PROCESSES,
+            overlay_cache=overlay_cache,
+            background_library=background_library,
+            render_backend=RENDER_BACKEND,
+            render_store=render_store,
+            encoding_profile=ENCODING_PROFILE,
+            progressive_output=progressive_output
+        )
+        asmr_downloader = ASMRVideoDownloader(download_folder='static/asmr_videos')
+        text_optimizer = TextOverlayOptimizer(fonts_folder='static/fonts', overlay_cache=overlay_cache)
+        
+        # Flag to indicate enhanced features are available
+        ENHANCED_FEATURES = True
+        print("Enhanced features enabled: Video generation with ASMR content and optimized text overlays")
+    except ImportError as e:
+        # Fall back to basic components
+        ENHANCED_FEATURES = False
+        print(f"Enhanced features disabled due to import error: {str(e)}")
+        print("Using basic video generation features")
+    
+    def render_video_plan(video_plan, on_result=None, completed=None):
+        """Render a video plan with the best available generator"""
+        # Use enhanced video generator if available, otherwise fall back to basic
+        if ENHANCED_FEATURES:
+            # Try to preload some ASMR videos for use in generation
+            try:
+                asmr_downloader.preload_videos_for_all_categories(videos_per_category=1)
+            except Exception as e:
+                print(f"Warning: Failed to preload ASMR videos: {str(e)}")
+            
+            # Transcode new downloads to render-ready proxies once, before any concept renders them
+            background_library.ingest_all()
+            
+            return enhanced_video_generator.generate_videos_from_plan(video_plan, on_result=on_result, completed=completed)
+        
+        # Fall back to basic video generator, which renders a title slide per concept
+        return video_generator.generate_videos_from_plan(video_plan, on_result=on_result, completed=completed)
+    
+    render_jobs = RenderJobQueue(
+        db_path=RENDER_JOBS_DB,
+        render_plan=render_video_plan,
+        workers=RENDER_WORKERS
+    )
+    render_jobs.start()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -73,6 +213,10 @@ def upload_file():
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
+        
+        # Start analysing while the user looks at the processing page
+        background_analyzer.submit(filename)
+        
         return render_template('processing.html', filename=filename, enhanced=ENHANCED_FEATURES)
     
     flash('Invalid file type. Please upload a PDF file.')
@@ -81,10 +225,13 @@ def upload_file():
 @app.route('/results')
 def results():
     filename = request.args.get('filename', 'document.pdf')
+    job_id = request.args.get('job_id')
+    stream_id = request.args.get('stream_id')
     # In a real app, we would fetch actual videos generated from the PDF
-    # For now, we'll just pass the filename to the template
+    # For now, we'll just pass the filename (and the render job to poll, with its streams) to the template
     videos = []  # This will be populated by JavaScript for demo purposes
-    return render_template('results.html', filename=filename, videos=videos, enhanced=ENHANCED_FEATURES)
+    return render_template('results.html', filename=filename, videos=videos, job_id=job_id, stream_id=stream_id,
+                           enhanced=ENHANCED_FEATURES)
 
 @app.route('/api/extract-text', methods=['POST'])
 def extract_text():
@@ -101,18 +248,53 @@ def extract_text():
         return jsonify({'error': 'File not found'}), 404
     
     try:
-        # Extract text from PDF using our processor
-        text = pdf_processor.extract_text(filename)
+        # Answer from the page sidecar, or stop after the first pages for a quick preview
+        summary = pdf_processor.get_text_summary(filename, preview_only=bool(data.get('preview_only')))
         
-        # Get a preview of the text
-        preview = text[:500] + "..." if len(text) > 500 else text
+        # The preview ends at a sentence boundary; mark where the text goes on
+        preview = summary['preview']
+        preview = preview + "..." if summary['truncated'] else preview
         
         return jsonify({
             'success': True,
             'text_preview': preview,
-            'text_length': len(text)
+            'text_length': summary['text_length'],
+            'pages': summary['pages'],
+            'complete': summary['complete']
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/page-text', methods=['POST'])
+def page_text():
+    data = request.json
+    filename = data.get('filename')
+    
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+    
+    try:
+        page_number = int(data.get('page', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'page must be an integer'}), 400
+    
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    
+    if not os.path.exists(file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    try:
+        text = pdf_processor.get_page_text(filename, page_number)
+        
+        return jsonify({
+            'success': True,
+            'page': page_number,
+            'text': text
         })
     
+    except IndexError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -125,8 +307,37 @@ def analyze_pdf():
         return jsonify({'error': 'No filename provided'}), 400
     
     try:
+        num_topics = int(data.get('num_topics', 5))
+        sentences_per_topic = int(data.get('sentences_per_topic', 3))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'num_topics and sentences_per_topic must be integers'}), 400
+    
+    if num_topics < 1 or sentences_per_topic < 1:
+        return jsonify({'error': 'num_topics and sentences_per_topic must be positive'}), 400
+    
+    max_pages = data.get('max_pages')
+    if max_pages is not None:
+        try:
+            max_pages = int(max_pages)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_pages must be an integer'}), 400
+        if max_pages < 1:
+            return jsonify({'error': 'max_pages must be positive'}), 400
+    
+    try:
+        # Attach to the analysis started at upload time when it matches this request
+        content_structure = None
+        if max_pages is None and (num_topics, sentences_per_topic) == (5, 3):
+            content_structure = background_analyzer.result(filename, 'content_structure')
+        
         # Generate content structure from PDF
-        content_structure = pdf_processor.generate_content_structure(filename)
+        if content_structure is None:
+            content_structure = pdf_processor.generate_content_structure(
+                filename,
+                max_pages=max_pages,
+                num_topics=num_topics,
+                sentences_per_topic=sentences_per_topic
+            )
         
         if 'error' in content_structure:
             return jsonify({'error': content_structure['error']}), 500
@@ -148,8 +359,10 @@ def ai_analyze():
         return jsonify({'error': 'No filename provided'}), 400
     
     try:
-        # Use AI to analyze the PDF content
-        analysis_result = ai_integrator.analyze_content(filename)
+        # Use AI to analyze the PDF content, attaching to the analysis started at upload time
+        analysis_result = background_analyzer.result(filename, 'ai_analysis')
+        if analysis_result is None:
+            analysis_result = ai_integrator.analyze_content(filename)
         
         if 'error' in analysis_result:
             return jsonify({'error': analysis_result['error']}), 500
@@ -159,6 +372,10 @@ def ai_analyze():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai-cache/stats', methods=['GET'])
+def ai_cache_stats():
+    return jsonify(completion_cache.stats())
+
 @app.route('/api/generate-video-plan', methods=['POST'])
 def generate_video_plan():
     data = request.json
@@ -168,8 +385,10 @@ def generate_video_plan():
         return jsonify({'error': 'No filename provided'}), 400
     
     try:
-        # Generate a video plan using AI
-        plan_result = ai_integrator.generate_video_plan(filename)
+        # Generate a video plan using AI, attaching to the plan started at upload time
+        plan_result = background_analyzer.result(filename, 'video_plan')
+        if plan_result is None:
+            plan_result = ai_integrator.generate_video_plan(filename)
         
         if 'error' in plan_result:
             return jsonify({'error': plan_result['error']}), 500
@@ -179,6 +398,26 @@ def generate_video_plan():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/generate-video-plan/stream', methods=['GET', 'POST'])
+def stream_video_plan():
+    # EventSource can only send GET requests, so accept the filename as a query parameter too
+    data = request.get_json(silent=True) or {}
+    filename = request.args.get('filename') or data.get('filename')
+    
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+    
+    def events():
+        # One Server-Sent Event per concept's plan as it is ready, then the complete plan
+        for event, payload in ai_integrator.iter_video_plan(filename):
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/generate-videos', methods=['POST'])
 def generate_videos():
     data = request.json
@@ -187,29 +426,89 @@ def generate_videos():
     if not video_plan:
         return jsonify({'error': 'No video plan provided'}), 400
     
+    # The backend can be chosen per request; it travels with the plan through the job queue
+    if data.get('render_backend'):
+        if ENHANCED_FEATURES and data['render_backend'] not in EnhancedVideoGenerator.RENDER_BACKENDS:
+            return jsonify({'error': f"Unknown render backend: {data['render_backend']}"}), 400
+        video_plan = dict(video_plan, render_backend=data['render_backend'])
+    
+    # So does the seed for background and font choices; the same seed renders the same videos
+    if data.get('render_seed') is not None:
+        video_plan = dict(video_plan, render_seed=data['render_seed'])
+    
+    # And the encoding profile, e.g. 'draft' for a quick preview before the 'final' render
+    if data.get('encoding_profile'):
+        try:
+            get_profile(data['encoding_profile'])
+        except (TypeError, ValueError):
+            return jsonify({'error': f"Unknown encoding profile: {data['encoding_profile']}"}), 400
+        video_plan = dict(video_plan, encoding_profile=data['encoding_profile'])
+    
+    # Progressive output streams each video while it renders, under a stream id the client can watch
+    stream_id = None
+    if data.get('progressive', PROGRESSIVE_OUTPUT):
+        stream_id = uuid.uuid4().hex
+        video_plan = dict(video_plan, stream_id=stream_id)
+    
     try:
-        # Use enhanced video generator if available, otherwise fall back to basic
-        if ENHANCED_FEATURES:
-            # Try to preload some ASMR videos for use in generation
-            try:
-                asmr_downloader.preload_videos_for_all_categories(videos_per_category=1)
-            except Exception as e:
-                print(f"Warning: Failed to preload ASMR videos: {str(e)}")
-            
-            # Generate videos based on the plan using the enhanced generator
-            result = enhanced_video_generator.generate_videos_from_plan(video_plan)
-        else:
-            # Fall back to basic video generator
-            result = video_generator.mock_generate_videos(video_plan)
-        
-        if not result['success']:
-            return jsonify({'error': result.get('error', 'Unknown error')}), 500
+        # Rendering takes minutes, so queue it and let the client poll the job
+        job_id = render_jobs.submit(video_plan)
         
-        return jsonify(result)
+        response = {
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id),
+            'result_url': url_for('job_result', job_id=job_id)
+        }
+        if stream_id:
+            response['stream_id'] = stream_id
+            response['stream_urls'] = [
+                url_for('video_stream', stream_id=stream_id, position=position, name=ProgressiveOutput.PLAYLIST)
+                for position in range(len(video_plan.get('videos', [])))
+            ]
+        return jsonify(response), 202
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/documents/<filename>/videos', methods=['GET'])
+def document_videos(filename):
+    # Manifests are keyed by the contents of the upload, not its name
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
+    manifest = render_store.read_manifest(render_store.document_key(file_path)) if os.path.isfile(file_path) else None
+    if manifest is None:
+        return jsonify({'error': 'No videos rendered for this document'}), 404
+    
+    return jsonify(manifest)
+
+@app.route('/api/streams/<stream_id>/<int:position>/<path:name>', methods=['GET'])
+def video_stream(stream_id, position, name):
+    # Playlists change while the video renders, so they must not be cached
+    return send_from_directory(os.path.abspath(progressive_output.stream_folder(stream_id, position)), name, max_age=0)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = render_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = render_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    if job['status'] == 'failed':
+        return jsonify({'error': job['error'] or 'Unknown error'}), 500
+    
+    if job['status'] != 'done':
+        # Not finished yet; the body is the current status
+        return jsonify(job), 202
+    
+    return jsonify(render_jobs.result(job_id))
+
 @app.route('/api/download-asmr-video', methods=['POST'])
 def download_asmr_video():
     if not ENHANCED_FEATURES:
@@ -243,8 +542,10 @@ def download_asmr_video():
 @app.route('/process/<filename>', methods=['GET'])
 def process_pdf(filename):
     try:
-        # Generate a video plan for the PDF
-        plan_result = ai_integrator.generate_video_plan(filename)
+        # Generate a video plan for the PDF, attaching to the plan started at upload time
+        plan_result = background_analyzer.result(filename, 'video_plan')
+        if plan_result is None:
+            plan_result = ai_integrator.generate_video_plan(filename)
         
         if 'error' in plan_result:
             flash(f'Error processing PDF: {plan_result["error"]}')
@@ -252,26 +553,17 @@ def process_pdf(filename):
         
         video_plan = plan_result['video_generation_plan']
         
-        # Use enhanced video generator if available, otherwise fall back to basic
-        if ENHANCED_FEATURES:
-            # Try to preload some ASMR videos
-            try:
-                asmr_downloader.preload_videos_for_all_categories(videos_per_category=1)
-            except Exception as e:
-                print(f"Warning: Failed to preload ASMR videos: {str(e)}")
-            
-            # Generate videos based on the plan using the enhanced generator
-            video_result = enhanced_video_generator.generate_videos_from_plan(video_plan)
-        else:
-            # Fall back to basic video generator
-            video_result = video_generator.mock_generate_videos(video_plan)
+        # Stream the videos while they render, like /api/generate-videos does
+        stream_id = None
+        if PROGRESSIVE_OUTPUT:
+            stream_id = uuid.uuid4().hex
+            video_plan = dict(video_plan, stream_id=stream_id)
         
-        if not video_result['success']:
-            flash(f'Error generating videos: {video_result.get("error", "Unknown error")}')
-            return redirect(url_for('index'))
+        # Render in the background; the results page can follow the job
+        job_id = render_jobs.submit(video_plan)
         
         # Redirect to results page
-        return redirect(url_for('results', filename=filename))
+        return redirect(url_for('results', filename=filename, job_id=job_id, stream_id=stream_id))
     
     except Exception as e:
         flash(f'Error processing PDF: {str(e)}')
@@ -0,0 +1,104 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+class BackgroundAnalyzer:
+    """
+    Runs PDF analysis speculatively as soon as a file is uploaded.
+    
+    Each upload gets a chain of stages (content structure, AI analysis, video
+    plan) executed on a small thread pool. Endpoints that need one of those
+    results attach to the stage's future instead of starting the work again,
+    so by the time the browser asks, the answer is usually already there.
+    Results also land in the shared analysis cache, which is how other worker
+    processes benefit from them.
+    """
+    STAGES = ('content_structure', 'ai_analysis', 'video_plan')
+    
+    def __init__(self, pdf_processor, ai_integrator, max_workers=2, max_entries=256):
+        self.pdf_processor = pdf_processor
+        self.ai_integrator = ai_integrator
+        self.max_entries = max_entries
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculative-analysis')
+        self._tasks = {}
+        self._lock = threading.Lock()
+    
+    def _file_version(self, filename):
+        """Identify the current upload under a filename, so a re-upload isn't served stale results"""
+        try:
+            stat = os.stat(os.path.join(self.pdf_processor.upload_folder, filename))
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+    
+    def submit(self, filename):
+        """Start analysing an uploaded file in the background; returns False if it is already running"""
+        version = self._file_version(filename)
+        if version is None:
+            return False
+        
+        with self._lock:
+            task = self._tasks.get(filename)
+            if task and task['version'] == version:
+                return False
+            
+            futures = {stage: Future() for stage in self.STAGES}
+            self._tasks[filename] = {'version': version, 'futures': futures}
+            self._prune()
+        
+        self._executor.submit(self._run, filename, futures)
+        return True
+    
+    def _prune(self):
+        """Forget the oldest finished tasks once we track too many"""
+        if len(self._tasks) <= self.max_entries:
+            return
+        
+        for filename in list(self._tasks):
+            if len(self._tasks) <= self.max_entries:
+                break
+            if all(future.done() for future in self._tasks[filename]['futures'].values()):
+                del self._tasks[filename]
+    
+    def _run(self, filename, futures):
+        stages = [
+            ('content_structure', lambda: self.pdf_processor.generate_content_structure(filename)),
+            ('ai_analysis', lambda: self.ai_integrator.analyze_content(filename)),
+            ('video_plan', lambda: self.ai_integrator.generate_video_plan(filename)),
+        ]
+        
+        for position, (stage, run_stage) in enumerate(stages):
+            try:
+                result = run_stage()
+            except Exception as e:
+                # Later stages depend on this one, so they fail too
+                for failed_stage, _ in stages[position:]:
+                    futures[failed_stage].set_exception(e)
+                return
+            
+            futures[stage].set_result(result)
+            
+            if 'error' in result:
+                for skipped_stage, _ in stages[position + 1:]:
+                    futures[skipped_stage].set_result({'error': result['error']})
+                return
+    
+    def result(self, filename, stage, timeout=None):
+        """
+        Wait for a speculative stage of the current upload and return its result.
+        
+        Returns None when nothing was started for this upload (or it failed), in
+        which case the caller should do the work itself.
+        """
+        with self._lock:
+            task = self._tasks.get(filename)
+        
+        if not task or task['version'] != self._file_version(filename):
+            return None
+        
+        try:
+            return task['futures'][stage].result(timeout=timeout)
+        except Exception as e:
+            print(f"Warning: Background {stage} for {filename} failed: {str(e)}")
+            return None
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+from ffmpeg_tools import run_ffmpeg, probe_duration
+
+class BackgroundLibrary:
+    """
+    Normalised proxies of the downloaded ASMR background videos.
+    
+    Each source is transcoded once, with ffmpeg, to the render size and frame
+    rate with a fixed keyframe interval and loudness-normalised (or stripped)
+    audio. Renders then read the proxy as is instead of decoding the full-size
+    download and scaling every frame again on every render.
+    
+    A proxy's name includes a hash of the source file's size and mtime and of
+    the proxy settings, so a replaced download or a new setting produces a new
+    proxy. Its metadata is kept in a JSON file next to it.
+    """
+    # Bump when the transcode command changes
+    VERSION = '1'
+    
+    def __init__(self, source_folder='static/asmr_videos', proxy_folder=None, width=1280, height=720, fps=24,
+                 keyframe_interval=48, audio='normalize', timeout=1800):
+        self.source_folder = source_folder
+        self.proxy_folder = proxy_folder or os.path.join(source_folder, '.proxies')
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.keyframe_interval = keyframe_interval
+        self.audio = audio  # 'normalize' or 'strip'
+        self.timeout = timeout
+        
+        # Create proxy directory if it doesn't exist
+        os.makedirs(self.proxy_folder, exist_ok=True)
+    
+    def _settings(self):
+        return {
+            "version": self.VERSION,
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "keyframe_interval": self.keyframe_interval,
+            "audio": self.audio
+        }
+    
+    def proxy_path(self, source_path):
+        """Where the proxy of a source video lives with the current settings"""
+        stat = os.stat(source_path)
+        signature = json.dumps([os.path.basename(source_path), stat.st_size, int(stat.st_mtime), self._settings()])
+        digest = hashlib.sha256(signature.encode('utf-8')).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.proxy_folder, f"{name}-{self.width}x{self.height}-{digest}.mp4")
+    
+    def get_proxy(self, source_path):
+        """Return the proxy for a source video, transcoding it first if needed; None if that fails"""
+        try:
+            proxy_path = self.proxy_path(source_path)
+        except OSError as e:
+            print(f"Warning: Background video {source_path} is not readable: {str(e)}")
+            return None
+        
+        if os.path.exists(proxy_path):
+            return proxy_path
+        
+        # Render processes and replicas share the folder; only one of them transcodes a source
+        with open(f"{proxy_path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.exists(proxy_path):
+                return proxy_path
+            
+            try:
+                self._transcode(source_path, proxy_path)
+            except Exception as e:
+                print(f"Warning: Failed to create proxy for {source_path}: {str(e)}")
+                return None
+        
+        return proxy_path
+    
+    def _transcode(self, source_path, proxy_path):
+        temp_path = f"{proxy_path}.{os.getpid()}.tmp.mp4"
+        
+        # Scale to cover the frame and crop the overflow, so every proxy has exactly the render size
+        video_filter = (f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase,"
+                        f"crop={self.width}:{self.height},setsar=1,fps={self.fps}")
+        args = [
+            '-y', '-i', source_path,
+            '-map', '0:v:0', '-vf', video_filter,
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20', '-pix_fmt', 'yuv420p',
+            '-g', str(self.keyframe_interval), '-keyint_min', str(self.keyframe_interval), '-sc_threshold', '0'
+        ]
+        if self.audio == 'strip':
+            args += ['-an']
+        else:
+            args += ['-map', '0:a:0?', '-af', 'loudnorm', '-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2']
+        args += ['-movflags', '+faststart', temp_path]
+        
+        start = time.time()
+        try:
+            run_ffmpeg(args, timeout=self.timeout)
+            os.replace(temp_path, proxy_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        metadata = dict(self._settings(), **{
+            "source": os.path.basename(source_path),
+            "source_size": os.path.getsize(source_path),
+            "proxy": os.path.basename(proxy_path),
+            "duration": probe_duration(proxy_path),
+            "transcode_seconds": round(time.time() - start, 2),
+            "created": time.time()
+        })
+        with open(f"{proxy_path}.json", 'w') as f:
+            json.dump(metadata, f, indent=2)
+    
+    def ingest_all(self):
+        """Make sure every downloaded background has a proxy"""
+        proxies = []
+        for filename in sorted(os.listdir(self.source_folder)):
+            if filename.endswith('.mp4'):
+                proxy_path = self.get_proxy(os.path.join(self.source_folder, filename))
+                if proxy_path:
+                    proxies.append(proxy_path)
+        return proxies
+    
+    def list_proxies(self):
+        """Metadata of every proxy in the library"""
+        proxies = []
+        for filename in sorted(os.listdir(self.proxy_folder)):
+            if filename.endswith('.mp4.json'):
+                try:
+                    with open(os.path.join(self.proxy_folder, filename), 'r') as f:
+                        proxies.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return proxies
@@ -0,0 +1,61 @@
+"""
+Cold vs warm AI analysis against the mock AI server, with the completion cache on.
+
+Run from the repository root:
+    python -m benchmarks.ai_cache --latency 2 --documents 5
+"""
+import argparse
+import tempfile
+import time
+
+from ai_integrator import AIIntegrator
+from completion_cache import CompletionCache
+from benchmarks.mock_ai_server import MockAIServer
+from benchmarks.synthetic_pdf import make_synthetic_text
+
+
+def content_structure(seed):
+    """A content structure like PDFProcessor.generate_content_structure returns"""
+    words = make_synthetic_text(60, seed=seed).split()
+    return {
+        'filename': f"document{seed}.pdf",
+        'topics': [{'name': word, 'frequency': 10 - i} for i, word in enumerate(words[:5])],
+        'key_sentences': [" ".join(words[i:i + 12]) + "." for i in range(0, 60, 12)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=1.0)
+    parser.add_argument('--documents', type=int, default=5)
+    args = parser.parse_args()
+    
+    server = MockAIServer(latency=args.latency).start()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        ai_integrator = AIIntegrator(
+            upload_folder=folder,
+            api_url=server.url,
+            completion_cache=CompletionCache(cache_folder=folder)
+        )
+        documents = [content_structure(seed) for seed in range(args.documents)]
+        
+        for label in ('cold', 'warm'):
+            start = time.perf_counter()
+            for document in documents:
+                result = ai_integrator._call_ai_api(document)
+                if 'error' in result:
+                    raise SystemExit(result['error'])
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {args.documents} analyses in {elapsed:.2f}s "
+                  f"({elapsed / args.documents * 1000:.1f} ms each)")
+        
+        stats = ai_integrator.completion_cache.stats()
+        print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries, "
+              f"{stats['bytes']} bytes; server saw {server.requests} requests")
+    
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
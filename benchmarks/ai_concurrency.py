@@ -0,0 +1,60 @@
+"""
+Single-prompt vs concurrent per-concept AI analysis against the mock AI server.
+
+The mock server's latency grows with the length of its reply, so one prompt
+describing every concept takes much longer than an outline followed by
+parallel per-concept requests. Run from the repository root:
+    python -m benchmarks.ai_concurrency --latency 0.5 --token-latency 0.01 --failure-rate 0.1
+"""
+import argparse
+import tempfile
+import time
+
+from ai_integrator import AIIntegrator
+from benchmarks.mock_ai_server import MockAIServer
+from benchmarks.ai_cache import content_structure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--token-latency', type=float, default=0.01)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--documents', type=int, default=3)
+    parser.add_argument('--max-concurrency', type=int, default=5)
+    parser.add_argument('--requests-per-second', type=float, default=None)
+    args = parser.parse_args()
+    
+    server = MockAIServer(latency=args.latency, token_latency=args.token_latency,
+                          failure_rate=args.failure_rate).start()
+    documents = [content_structure(seed) for seed in range(args.documents)]
+    
+    with tempfile.TemporaryDirectory() as folder:
+        # 'chunked' analyses the whole PDF rather than a content structure, so it isn't comparable here
+        for ai_mode in ('single', 'concurrent'):
+            ai_integrator = AIIntegrator(
+                upload_folder=folder,
+                api_url=server.url,
+                ai_mode=ai_mode,
+                max_concurrency=args.max_concurrency,
+                requests_per_second=args.requests_per_second
+            )
+            call = ai_integrator._call_ai_api_concurrent if ai_mode == 'concurrent' else ai_integrator._call_ai_api
+            
+            requests_before = server.requests
+            start = time.perf_counter()
+            for document in documents:
+                result = call(document)
+                if 'error' in result:
+                    raise SystemExit(result['error'])
+            elapsed = time.perf_counter() - start
+            
+            print(f"{ai_mode:>10}: {elapsed / args.documents:.2f}s per analysis, "
+                  f"{(server.requests - requests_before) / args.documents:.1f} requests each "
+                  f"(including retries)")
+    
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Rendering from the full-HD download vs from its normalised 720p proxy.
+
+Needs moviepy and ffmpeg. Run from the repository root:
+    python -m benchmarks.background_proxies --concepts 3 --duration 10
+"""
+import argparse
+import tempfile
+import time
+
+from background_library import BackgroundLibrary
+from enhanced_video_generator import EnhancedVideoGenerator
+from benchmarks.reference_plan import make_reference_plan, write_background_clip
+
+
+class DownloadsOnly(BackgroundLibrary):
+    """A library that never has a proxy, so renders scale the download as before"""
+    def get_proxy(self, source_path):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concepts', type=int, default=3)
+    parser.add_argument('--duration', type=int, default=10)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        write_background_clip(folder, duration=args.duration)
+        plan = make_reference_plan(args.concepts)
+        
+        library = BackgroundLibrary(source_folder=folder)
+        start = time.perf_counter()
+        library.ingest_all()
+        print(f"{'ingest (once)':>14}: {time.perf_counter() - start:.1f}s")
+        
+        for label, background_library in (('download', DownloadsOnly(source_folder=folder)), ('proxy', library)):
+            generator = EnhancedVideoGenerator(
+                upload_folder=folder,
+                output_folder=f"{folder}/videos-{label}",
+                asmr_folder=folder,
+                render_processes=1,
+                background_library=background_library
+            )
+            generator.default_duration = args.duration
+            
+            start = time.perf_counter()
+            result = generator.generate_videos_from_plan(plan)
+            elapsed = time.perf_counter() - start
+            
+            rendered = sum(1 for video in result.get('videos', []) if video.get('success'))
+            print(f"{label:>14}: {rendered}/{args.concepts} videos in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Encode time and file size of the reference plan per encoding profile.
+
+Renders every concept of the plan once per profile over a background clip
+(through its proxy, transcoded before timing starts). Each profile renders
+into its own output folder, so no render is served from another profile's
+store or segment cache. Run from the repository root:
+    python -m benchmarks.encoding_profiles --concepts 3 --duration 10 --backend moviepy
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from background_library import BackgroundLibrary
+from encoding_profiles import ENCODING_PROFILES
+from enhanced_video_generator import EnhancedVideoGenerator
+from ffmpeg_tools import find_ffmpeg
+from benchmarks.reference_plan import make_reference_plan, write_background_clip
+
+
+def render(folder, asmr_folder, backend, profile, plan, duration):
+    generator = EnhancedVideoGenerator(
+        upload_folder=folder,
+        output_folder=os.path.join(folder, f"videos-{profile}"),
+        asmr_folder=asmr_folder,
+        render_processes=1,
+        render_backend=backend,
+        encoding_profile=profile
+    )
+    generator.default_duration = duration
+    
+    start = time.perf_counter()
+    result = generator.generate_videos_from_plan(plan)
+    elapsed = time.perf_counter() - start
+    
+    paths = [video['video_path'] for video in result.get('videos', []) if video.get('success')]
+    return len(paths), elapsed, sum(os.path.getsize(path) for path in paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concepts', type=int, default=3)
+    parser.add_argument('--duration', type=int, default=10)
+    parser.add_argument('--backend', choices=EnhancedVideoGenerator.RENDER_BACKENDS, default='moviepy')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(ENCODING_PROFILES),
+                        default=['draft', 'standard', 'final'])
+    args = parser.parse_args()
+    
+    if not find_ffmpeg():
+        raise SystemExit("ffmpeg is not installed")
+    
+    plan = make_reference_plan(args.concepts)
+    
+    with tempfile.TemporaryDirectory() as folder:
+        background_folder = os.path.join(folder, 'backgrounds')
+        os.makedirs(background_folder)
+        write_background_clip(background_folder, duration=args.duration)
+        
+        # Transcode the proxy up front so no profile's timing includes it
+        BackgroundLibrary(source_folder=background_folder).ingest_all()
+        
+        for profile in args.profiles:
+            settings = ENCODING_PROFILES[profile]
+            rendered, elapsed, size = render(folder, background_folder, args.backend, profile, plan, args.duration)
+            print(f"{profile:>8} ({settings['width']}x{settings['height']}@{settings['fps']}, "
+                  f"{settings['preset']}, crf {settings['crf']}): {rendered}/{args.concepts} videos in "
+                  f"{elapsed:6.1f}s, {size / 1024:8.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Every request waits --latency seconds plus --token-latency per generated
+token, like a slow model would, and then answers with concepts built from
+the topics (or the single concept) named in the prompt. --failure-rate
+makes that share of requests fail with 503 to exercise retries. Run from the
+repository root:
+    python -m benchmarks.mock_ai_server --port 8765 --latency 2 --token-latency 0.01
+and start the app with AI_API_URL=http://localhost:8765/v1.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_TOPICS_RE = re.compile(r'^\s*Topics:\s*(.*)$', re.MULTILINE)
+_CONCEPT_RE = re.compile(r'^\s*Concept:\s*(.*)$', re.MULTILINE)
+_LONG_WORD_RE = re.compile(r'[A-Za-z]{6,}')
+
+
+def describe_concept(name):
+    return {
+        "name": name,
+        "explanation": f"{name} explained in a few calm sentences. " * 8,
+        "visuals": ["Animated diagrams", "Text overlays with key points", "Visual metaphors"],
+        "sounds": ["Gentle water sounds", "Soft tapping", "Nature ambience"]
+    }
+
+
+def chunk_reply(excerpt):
+    """Name the excerpt's most frequent long words as its concepts"""
+    counts = Counter(word.lower() for word in _LONG_WORD_RE.findall(excerpt))
+    return {
+        "concepts": [
+            dict(describe_concept(word.capitalize()), importance=min(10, count))
+            for word, count in counts.most_common(3)
+        ],
+        "theme": "Mock chunk analysis from the local AI server"
+    }
+
+
+def analysis_reply(prompt):
+    """Build a response in the shape AIIntegrator asks for: a whole analysis, one concept or one chunk"""
+    match = _CONCEPT_RE.search(prompt)
+    if match:
+        return describe_concept(match.group(1).strip())
+    
+    if 'Excerpt:' in prompt:
+        return chunk_reply(prompt.split('Excerpt:', 1)[1].split('Identify up to', 1)[0])
+    
+    match = _TOPICS_RE.search(prompt)
+    topics = [topic.strip() for topic in match.group(1).split(',') if topic.strip()] if match else []
+    topics = topics[:5] or ['overview']
+    
+    # An outline request only asks for names, so it gets a much shorter answer
+    if '"explanation"' in prompt:
+        concepts = [describe_concept(topic.capitalize()) for topic in topics]
+    else:
+        concepts = [{"name": topic.capitalize()} for topic in topics]
+    
+    return {
+        "concepts": concepts,
+        "learning_sequence": [concept["name"] for concept in concepts],
+        "overall_theme": "Mock analysis from the local AI server"
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        prompt = request.get('messages', [{}])[-1].get('content', '')
+        
+        self.server.count_request()
+        if random.random() < self.server.failure_rate:
+            self.send_error(503)
+            return
+        
+        # A reply function can return a string to send verbatim, such as a malformed answer
+        reply = self.server.reply(prompt)
+        content = reply if isinstance(reply, str) else json.dumps(reply)
+        
+        # Roughly four characters per token
+        time.sleep(self.server.latency + self.server.token_latency * len(content) / 4)
+        
+        body = json.dumps({
+            "id": "mock-completion",
+            "object": "chat.completion",
+            "model": request.get('model'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }]
+        }).encode('utf-8')
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class MockAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering chat completions after a fixed delay"""
+    daemon_threads = True
+    
+    def __init__(self, port=0, latency=1.0, token_latency=0.0, failure_rate=0.0, reply=analysis_reply):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency = latency
+        self.token_latency = token_latency
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+    
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def start(self):
+        """Serve from a background thread and return self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0)
+    parser.add_argument('--token-latency', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    server = MockAIServer(port=args.port, latency=args.latency, token_latency=args.token_latency,
+                          failure_rate=args.failure_rate)
+    print(f"Mock AI server on {server.url} with {args.latency}s latency")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Bulk-insert and query benchmark for the MinHash/LSH near-duplicate index.
+
+Run from the repository root:
+    python -m benchmarks.near_duplicates --documents 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from duplicate_index import NearDuplicateIndex
+from benchmarks.synthetic_pdf import make_synthetic_text
+
+
+def edit_text(text, rng, edits):
+    """Replace a few words, like a student's lightly edited copy of the notes"""
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = f"edit{rng.randrange(1000)}"
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    rng = random.Random(0)
+    
+    with tempfile.TemporaryDirectory() as folder:
+        index = NearDuplicateIndex(index_folder=folder)
+        
+        # Signatures are computed up front so insert timing covers only the index
+        start = time.perf_counter()
+        texts = {}
+        signatures = np.zeros((args.documents, index.num_perm), dtype=np.uint32)
+        for i in range(args.documents):
+            text = make_synthetic_text(args.words, seed=i)
+            signatures[i] = index.signature(text)
+            if i < args.queries:
+                texts[i] = text
+        signature_time = time.perf_counter() - start
+        print(f"signatures: {args.documents} in {signature_time:.2f}s "
+              f"({args.documents / signature_time:,.0f} docs/s)")
+        
+        start = time.perf_counter()
+        for batch_start in range(0, args.documents, args.batch_size):
+            batch_end = min(batch_start + args.batch_size, args.documents)
+            index.add_many([f"doc{i}" for i in range(batch_start, batch_end)], signatures[batch_start:batch_end])
+        insert_time = time.perf_counter() - start
+        print(f"bulk insert: {len(index)} in {insert_time:.2f}s ({len(index) / insert_time:,.0f} docs/s)")
+        
+        # Reopening the index rebuilds band keys from the memory-mapped signatures
+        start = time.perf_counter()
+        index = NearDuplicateIndex(index_folder=folder)
+        print(f"reload: {time.perf_counter() - start:.2f}s")
+        
+        for edits in (2, 10, 30):
+            query_texts = [(i, edit_text(texts[i], rng, edits)) for i in range(args.queries)]
+            
+            start = time.perf_counter()
+            hits = 0
+            for i, text in query_texts:
+                match = index.query(text)
+                if match and match[0] == f"doc{i}":
+                    hits += 1
+            query_time = time.perf_counter() - start
+            
+            print(f"query with {edits:>2} edited words: {args.queries / query_time:,.0f} queries/s, "
+                  f"recall {hits / args.queries:.1%}")
+        
+        start = time.perf_counter()
+        false_positives = 0
+        for i in range(args.queries):
+            if index.query(make_synthetic_text(args.words, seed=args.documents + i)):
+                false_positives += 1
+        query_time = time.perf_counter() - start
+        print(f"query unrelated documents: {args.queries / query_time:,.0f} queries/s, "
+              f"false positives {false_positives / args.queries:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the accurate and fast NLP modes of PDFProcessor for speed and topic agreement.
+
+Run from the repository root against a folder of sample PDFs:
+    python -m benchmarks.nlp_modes --pdf-folder samples/
+Without --pdf-folder a handful of synthetic PDFs is generated instead.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pdf_processor
+from pdf_processor import PDFProcessor
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+
+def analyze(processor, text, num_topics):
+    """Return (seconds, topics, key sentence offsets) for one analysis of a text"""
+    start = time.perf_counter()
+    sentence_index = processor.build_sentence_index(text)
+    topics = processor.identify_topics(None, num_topics=num_topics, sentence_index=sentence_index)
+    key_sentences = processor.extract_key_sentences(None, topics, sentence_index=sentence_index)
+    return time.perf_counter() - start, topics, key_sentences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pdf-folder', default=None)
+    parser.add_argument('--num-topics', type=int, default=20)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as synthetic_folder:
+        folder = args.pdf_folder
+        if not folder:
+            folder = synthetic_folder
+            for num_pages in (5, 50, 200):
+                write_synthetic_pdf(os.path.join(folder, f"synthetic_{num_pages}.pdf"), num_pages, seed=num_pages)
+        
+        accurate = PDFProcessor(upload_folder=folder, nlp_mode='accurate')
+        fast = PDFProcessor(upload_folder=folder, nlp_mode='fast')
+        pdf_processor._cached_lemmatize.cache_clear()
+        
+        print(f"{'document':<32} {'accurate (s)':>12} {'fast (s)':>9} {'speedup':>8} "
+              f"{'topic overlap':>14} {'same order':>11} {'same sentences':>15}")
+        
+        totals = [0.0, 0.0]
+        for filename in sorted(f for f in os.listdir(folder) if f.lower().endswith('.pdf')):
+            text = accurate.extract_text(filename)
+            
+            accurate_time, accurate_topics, accurate_sentences = analyze(accurate, text, args.num_topics)
+            fast_time, fast_topics, fast_sentences = analyze(fast, text, args.num_topics)
+            totals[0] += accurate_time
+            totals[1] += fast_time
+            
+            accurate_words = [topic for topic, _ in accurate_topics]
+            fast_words = [topic for topic, _ in fast_topics]
+            overlap = len(set(accurate_words) & set(fast_words)) / max(len(accurate_words), 1)
+            
+            print(f"{filename[:32]:<32} {accurate_time:>12.3f} {fast_time:>9.3f} "
+                  f"{accurate_time / max(fast_time, 1e-9):>7.2f}x {overlap:>13.0%} "
+                  f"{str(accurate_topics == fast_topics):>11} {str(accurate_sentences == fast_sentences):>15}")
+        
+        print(f"{'total':<32} {totals[0]:>12.3f} {totals[1]:>9.3f} {totals[0] / max(totals[1], 1e-9):>7.2f}x")
+        print(f"lemma cache: {pdf_processor._cached_lemmatize.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
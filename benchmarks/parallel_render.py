@@ -0,0 +1,48 @@
+"""
+Serial vs process-pool rendering of a five-concept plan.
+
+Needs moviepy with ffmpeg and ImageMagick, like the app's enhanced features.
+Run from the repository root:
+    python -m benchmarks.parallel_render --concepts 5 --duration 10
+"""
+import argparse
+import tempfile
+import time
+
+from enhanced_video_generator import EnhancedVideoGenerator, available_cpus
+from benchmarks.reference_plan import make_reference_plan, write_background_clip
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concepts', type=int, default=5)
+    parser.add_argument('--duration', type=int, default=10)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+    
+    processes = args.processes or available_cpus()
+    print(f"CPUs available to this container: {available_cpus()}")
+    
+    with tempfile.TemporaryDirectory() as folder:
+        write_background_clip(folder, duration=args.duration)
+        plan = make_reference_plan(args.concepts)
+        
+        for label, render_processes in (('serial', 1), (f'parallel x{processes}', processes)):
+            generator = EnhancedVideoGenerator(
+                upload_folder=folder,
+                output_folder=f"{folder}/videos-{render_processes}",
+                asmr_folder=folder,
+                render_processes=render_processes
+            )
+            generator.default_duration = args.duration
+            
+            start = time.perf_counter()
+            result = generator.generate_videos_from_plan(plan)
+            elapsed = time.perf_counter() - start
+            
+            rendered = sum(1 for video in result.get('videos', []) if video.get('success'))
+            print(f"{label:>14}: {rendered}/{args.concepts} videos in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
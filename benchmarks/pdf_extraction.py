@@ -0,0 +1,54 @@
+"""
+Compare serial and process-pool PDF text extraction.
+
+Run from the repository root:
+    python -m benchmarks.pdf_extraction --pages 10 100 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pdf_processor import PDFProcessor
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+
+def time_extraction(processor, filename, parallel, repeats):
+    """Return the best wall-clock time over several extraction runs"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        # Bypass the page sidecar, which would answer every run after the first
+        text = processor.extract_text(filename, parallel=parallel, use_sidecar=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        processor = PDFProcessor(upload_folder=folder, max_workers=args.workers)
+        print(f"workers: {processor.max_workers}")
+        print(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+        
+        for num_pages in args.pages:
+            filename = f"synthetic_{num_pages}.pdf"
+            write_synthetic_pdf(os.path.join(folder, filename), num_pages)
+            
+            serial_time, serial_length = time_extraction(processor, filename, False, args.repeats)
+            parallel_time, parallel_length = time_extraction(processor, filename, True, args.repeats)
+            
+            if serial_length != parallel_length:
+                raise SystemExit(f"Output mismatch for {num_pages} pages: {serial_length} != {parallel_length}")
+            
+            print(f"{num_pages:>6} {serial_time:>11.3f} {parallel_time:>13.3f} {serial_time / parallel_time:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
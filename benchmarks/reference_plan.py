@@ -0,0 +1,46 @@
+import os
+
+from moviepy.editor import ColorClip
+
+TOPICS = ["Energy", "Learning", "Memory", "Network", "Signal", "Structure", "Pattern", "Theory"]
+
+
+def make_reference_plan(num_concepts=5, filename='reference.pdf'):
+    """A video plan shaped like AIIntegrator.generate_video_plan output"""
+    videos = []
+    for i in range(num_concepts):
+        name = TOPICS[i % len(TOPICS)]
+        explanation = (f"Understanding {name} is essential for mastering this subject. It involves "
+                       f"recognizing patterns and applying principles in various contexts.")
+        videos.append({
+            "video_id": f"video_{i + 1}",
+            "title": name,
+            "description": explanation,
+            "duration": "2-3 minutes",
+            "segments": [
+                {"type": "intro", "content": f"Introduction to {name}", "duration": "15-20 seconds",
+                 "visuals": "Animated diagrams", "audio": "Gentle water sounds"},
+                {"type": "explanation", "content": explanation, "duration": "60-90 seconds",
+                 "visuals": "Text overlays with key points", "audio": "ASMR whispers"},
+                {"type": "summary", "content": f"Key takeaways about {name}", "duration": "30-45 seconds",
+                 "visuals": "Mind map of concept", "audio": "Calming nature sounds"}
+            ],
+            "tags": [name.lower(), "educational", "brainrot", "asmr", "learning"]
+        })
+    
+    return {
+        "filename": filename,
+        "overall_theme": "Reference plan for render benchmarks",
+        "learning_sequence": [video["title"] for video in videos],
+        "video_style": "Short, focused videos with clear text overlays and pleasant background sounds",
+        "videos": videos
+    }
+
+
+def write_background_clip(folder, duration=10, size=(1920, 1080), fps=24):
+    """Write a full-HD background clip, standing in for a downloaded ASMR video"""
+    path = os.path.join(folder, 'reference-background.mp4')
+    if not os.path.exists(path):
+        clip = ColorClip(size=size, color=(20, 60, 90)).set_duration(duration)
+        clip.write_videofile(path, fps=fps, codec='libx264', audio=False, logger=None)
+    return path
@@ -0,0 +1,70 @@
+"""
+moviepy vs ffmpeg filter-graph rendering of the reference plan, on CPU only.
+
+Renders every concept once per backend, over a 1080p background clip (through
+its 720p proxy) and over the plain-colour background used when no ASMR clip is
+available. Run from the repository root:
+    python -m benchmarks.render_backends --concepts 3 --duration 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from background_library import BackgroundLibrary
+from enhanced_video_generator import EnhancedVideoGenerator
+from ffmpeg_tools import find_ffmpeg
+from benchmarks.reference_plan import make_reference_plan, write_background_clip
+
+
+def render(folder, asmr_folder, backend, plan, duration):
+    generator = EnhancedVideoGenerator(
+        upload_folder=folder,
+        output_folder=os.path.join(folder, f"videos-{backend}"),
+        asmr_folder=asmr_folder,
+        render_processes=1,
+        render_backend=backend
+    )
+    generator.default_duration = duration
+    
+    start = time.perf_counter()
+    result = generator.generate_videos_from_plan(plan)
+    elapsed = time.perf_counter() - start
+    
+    rendered = sum(1 for video in result.get('videos', []) if video.get('success'))
+    return rendered, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concepts', type=int, default=3)
+    parser.add_argument('--duration', type=int, default=10)
+    args = parser.parse_args()
+    
+    if not find_ffmpeg():
+        raise SystemExit("ffmpeg is not installed")
+    
+    plan = make_reference_plan(args.concepts)
+    
+    with tempfile.TemporaryDirectory() as folder:
+        background_folder = os.path.join(folder, 'backgrounds')
+        colour_folder = os.path.join(folder, 'no-backgrounds')
+        os.makedirs(background_folder)
+        os.makedirs(colour_folder)
+        write_background_clip(background_folder, duration=args.duration)
+        
+        # Transcode the proxy up front so neither backend's timing includes it
+        BackgroundLibrary(source_folder=background_folder).ingest_all()
+        
+        for scenario, asmr_folder in (('background clip', background_folder), ('colour background', colour_folder)):
+            timings = {}
+            for backend in EnhancedVideoGenerator.RENDER_BACKENDS:
+                rendered, elapsed = render(folder, asmr_folder, backend, plan, args.duration)
+                timings[backend] = elapsed
+                print(f"{scenario:>17} / {backend:<7}: {rendered}/{args.concepts} videos in {elapsed:6.1f}s "
+                      f"({args.concepts * args.duration / elapsed:5.1f} video-seconds/s)")
+            print(f"{scenario:>17}: ffmpeg is {timings['moviepy'] / timings['ffmpeg']:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
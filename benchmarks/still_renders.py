@@ -0,0 +1,60 @@
+"""
+Frame-by-frame vs still-image rendering of static videos.
+
+Renders the reference plan's concepts over the plain-colour background used
+when no ASMR clip is available, compositing every frame with moviepy and then
+through the still-image fast path. Run from the repository root:
+    python -m benchmarks.still_renders --concepts 3 --duration 30
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from enhanced_video_generator import EnhancedVideoGenerator
+from video_generator import VideoGenerator
+from benchmarks.reference_plan import make_reference_plan
+
+
+class FrameByFrame(EnhancedVideoGenerator):
+    """A generator without the still-image fast path"""
+    def _render_still(self, color, overlays, duration, output_path, audio_path=None):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concepts', type=int, default=3)
+    parser.add_argument('--duration', type=int, default=30)
+    args = parser.parse_args()
+    
+    plan = make_reference_plan(args.concepts)
+    
+    with tempfile.TemporaryDirectory() as folder:
+        for label, generator_class in (('frame by frame', FrameByFrame), ('still image', EnhancedVideoGenerator)):
+            generator = generator_class(
+                upload_folder=folder,
+                output_folder=os.path.join(folder, label.replace(' ', '-')),
+                asmr_folder=os.path.join(folder, 'no-backgrounds'),
+                render_processes=1
+            )
+            generator.default_duration = args.duration
+            
+            start = time.perf_counter()
+            for video in plan['videos']:
+                concept = {'name': video['title'], 'explanation': video['description']}
+                generator.mock_generate_concept_video(concept, video['video_id'])
+            elapsed = time.perf_counter() - start
+            print(f"{label:>15}: {elapsed / args.concepts:6.2f}s per {args.duration}s video")
+        
+        slides = VideoGenerator(upload_folder=folder, output_folder=os.path.join(folder, 'slides'))
+        start = time.perf_counter()
+        for video in plan['videos']:
+            slides.render_slide(video['title'], os.path.join(slides.output_folder, f"{video['video_id']}.mp4"),
+                                duration=args.duration)
+        elapsed = time.perf_counter() - start
+        print(f"{'slide':>15}: {elapsed / args.concepts:6.2f}s per {args.duration}s video")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import random
+
+# Small vocabulary so generated pages look like running text to the NLP pipeline
+VOCABULARY = [
+    "learning", "model", "data", "energy", "cell", "theory", "history", "function",
+    "system", "network", "process", "structure", "memory", "signal", "pattern",
+    "the", "of", "and", "a", "in", "is", "that", "for", "with", "as"
+]
+
+
+def make_synthetic_text(num_words, seed=0):
+    """Generate sentence-shaped filler text"""
+    rng = random.Random(seed)
+    sentences = []
+    remaining = num_words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        sentences.append(" ".join(words).capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def write_synthetic_pdf(path, num_pages, words_per_page=350, seed=0):
+    """
+    Write a text-only PDF with num_pages pages using the built-in Helvetica font.
+    
+    The file is assembled by hand so benchmarks don't need a PDF authoring library.
+    """
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(num_pages)), num_pages
+        )
+    ]
+    font_id = 3 + 2 * num_pages
+    
+    for i in range(num_pages):
+        text = make_synthetic_text(words_per_page, seed=seed + i)
+        text = text.replace("\\", "").replace("(", "").replace(")", "")
+        lines = [text[j:j + 95] for j in range(0, len(text), 95)]
+        stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode('latin-1')
+    
+    with open(path, 'wb') as f:
+        f.write(output)
+    
+    return path
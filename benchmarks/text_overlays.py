@@ -0,0 +1,66 @@
+"""
+Text overlays per second: moviepy's TextClip vs the PIL overlay cache.
+
+TextClip needs ImageMagick and is skipped when it isn't installed. Run from the
+repository root:
+    python -m benchmarks.text_overlays --renders 5
+"""
+import argparse
+import tempfile
+import time
+
+from overlay_cache import OverlayCache
+from benchmarks.reference_plan import make_reference_plan
+
+
+def overlay_texts():
+    """The titles and descriptions the renderer draws for the reference plan"""
+    texts = []
+    for video in make_reference_plan(8)['videos']:
+        texts.append((video['title'], 80))
+        texts.append((video['description'], 40))
+    return texts
+
+
+def rate(label, texts, renders, make_overlay):
+    start = time.perf_counter()
+    for _ in range(renders):
+        for text, font_size in texts:
+            make_overlay(text, font_size)
+    elapsed = time.perf_counter() - start
+    count = renders * len(texts)
+    print(f"{label:>22}: {count / elapsed:8.1f} overlays/s ({elapsed / count * 1000:.2f} ms each)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--renders', type=int, default=5, help="times each overlay is drawn, as in repeated renders")
+    args = parser.parse_args()
+    
+    texts = overlay_texts()
+    
+    try:
+        from moviepy.editor import TextClip
+        TextClip("probe", fontsize=20, method='caption', size=(200, None))
+        rate('TextClip', texts, args.renders,
+             lambda text, size: TextClip(text, fontsize=size, font='Arial', color='white',
+                                         size=(1280, None), method='caption', align='center'))
+    except Exception as e:
+        print(f"{'TextClip':>22}: unavailable ({str(e).splitlines()[0]})")
+    
+    with tempfile.TemporaryDirectory() as folder:
+        cache = OverlayCache(cache_folder=folder)
+        render = lambda text, size: cache.render(text, font='Arial', font_size=size, width=1280)
+        
+        rate('cache, cold', texts, 1, render)
+        rate('cache, warm (memory)', texts, args.renders, render)
+        
+        # A fresh instance, like a new worker process, reads the PNGs written above
+        cache = OverlayCache(cache_folder=folder)
+        rate('cache, warm (disk)', texts, 1, render)
+        
+        print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
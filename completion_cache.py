@@ -0,0 +1,145 @@
+import os
+import json
+import hashlib
+import threading
+import time
+
+class CompletionCache:
+    """
+    On-disk cache for AI completion responses.
+    
+    Entries are keyed by a SHA-256 of the model, the prompt messages and the
+    request parameters, so only a byte-identical request is served from the
+    cache. Entries expire after ttl seconds and the total size is bounded with
+    least-recently-used eviction based on file modification times, like
+    AnalysisCache. Keeping the folder on a shared volume shares entries across
+    replicas; hit and miss counters are per process.
+    """
+    def __init__(self, cache_folder='uploads/.ai_cache', ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.cache_folder = cache_folder
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        
+        # Create cache directory if it doesn't exist
+        os.makedirs(cache_folder, exist_ok=True)
+        
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def key(self, model, messages, params=None):
+        """Return the cache key for a completion request"""
+        request = {'model': model, 'messages': messages, 'params': params or {}}
+        payload = json.dumps(request, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _entry_path(self, key):
+        # Fan out over subfolders so no single directory grows huge
+        return os.path.join(self.cache_folder, key[:2], f"{key}.json")
+    
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def get(self, key):
+        """Return a cached response, or None on a miss or an expired entry"""
+        path = self._entry_path(key)
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(False)
+            return None
+        
+        if self.ttl is not None and entry.get('created', 0) + self.ttl < time.time():
+            self._remove(path)
+            self._count(False)
+            return None
+        
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        self._count(True)
+        return entry.get('response')
+    
+    def set(self, key, response):
+        """Store a response and evict old entries if the cache is over budget"""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.time(), 'response': response}, f)
+        os.replace(temp_path, path)
+        
+        self.evict()
+    
+    def _entries(self):
+        """List (mtime, size, path) for every entry, cleaning up stale temporary files"""
+        entries = []
+        for prefix in os.listdir(self.cache_folder):
+            prefix_folder = os.path.join(self.cache_folder, prefix)
+            if not os.path.isdir(prefix_folder):
+                continue
+            
+            for name in os.listdir(prefix_folder):
+                path = os.path.join(prefix_folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                
+                # Clean up temporary files left behind by crashed writers
+                if name.endswith('.tmp'):
+                    if stat.st_mtime < time.time() - 3600:
+                        self._remove(path)
+                    continue
+                
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        return entries
+    
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+        
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def stats(self):
+        """Return hit/miss counters for this process and the size of the shared cache"""
+        entries = self._entries()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl
+        }
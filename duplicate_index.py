@@ -0,0 +1,284 @@
+import os
+import re
+import zlib
+import fcntl
+import threading
+import numpy as np
+
+# Largest prime below 2**32, so (a * x + b) for 32-bit a, x and b never overflows uint64
+_HASH_PRIME = np.uint64(4294967291)
+
+_WORD_RE = re.compile(r'\w+')
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures with LSH banding for spotting near-duplicate uploads.
+    
+    Each document is reduced to the set of its word shingles, and a MinHash
+    signature of num_perm values estimates the Jaccard similarity between two
+    such sets. Signatures are split into bands; documents sharing any band are
+    candidates and are then checked against the full signature.
+    
+    Signatures are kept in a memory-mapped NumPy array next to an append-only
+    list of document ids, so the index survives restarts and is shared by
+    every replica using the same folder.
+    
+    Texts with fewer than min_shingles shingles (scanned PDFs without a text
+    layer, a few words) have no meaningful signature: they are neither
+    indexed nor matched, since all of them would look identical.
+    """
+    def __init__(self, index_folder='uploads/.minhash', num_perm=128, bands=16, threshold=0.8,
+                 shingle_size=5, initial_capacity=1024, min_shingles=20):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        
+        self.index_folder = index_folder
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.initial_capacity = initial_capacity
+        self.min_shingles = min_shingles
+        
+        # Create index directory if it doesn't exist
+        os.makedirs(index_folder, exist_ok=True)
+        
+        self.signatures_path = os.path.join(index_folder, 'signatures.npy')
+        self.documents_path = os.path.join(index_folder, 'documents.txt')
+        self.lock_path = os.path.join(index_folder, '.lock')
+        
+        # Fixed seed so every process hashes with the same permutations
+        rng = np.random.default_rng(20240501)
+        self._a = rng.integers(1, int(_HASH_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_HASH_PRIME), size=num_perm, dtype=np.uint64)
+        
+        # Multipliers that fold a band's values into a single uint64 key
+        self._band_multipliers = rng.integers(1, 2 ** 63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+        
+        self.document_ids = []
+        self._row_by_document = {}
+        self._documents_offset = 0
+        self._signatures = None
+        self._signatures_stat = None
+        
+        # Band keys for every row, plus per-band sorted views for lookups
+        self._band_keys = np.zeros((0, bands), dtype=np.uint64)
+        self._sorted_rows = None
+        self._sorted_keys = None
+        self._unsorted_from = 0
+        
+        self._thread_lock = threading.Lock()
+        
+        with self._thread_lock:
+            self._refresh()
+    
+    def __len__(self):
+        return len(self.document_ids)
+    
+    def shingles(self, text):
+        """Hash the document's overlapping word n-grams to 32-bit integers"""
+        words = _WORD_RE.findall(text.lower())
+        size = self.shingle_size
+        if len(words) < size:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = (' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+        return np.unique(np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64))
+    
+    def signature(self, text):
+        """Compute the MinHash signature of a text, or None if it has fewer than min_shingles shingles"""
+        shingles = self.shingles(text)
+        if len(shingles) < self.min_shingles:
+            return None
+        
+        signature = np.full(self.num_perm, _HASH_PRIME, dtype=np.uint64)
+        
+        # Hash in blocks to keep the num_perm x shingles matrix small for long documents
+        for start in range(0, len(shingles), 4096):
+            block = shingles[start:start + 4096] % _HASH_PRIME
+            hashed = (self._a[:, None] * block[None, :] + self._b[:, None]) % _HASH_PRIME
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        
+        return signature.astype(np.uint32)
+    
+    def _compute_band_keys(self, signatures):
+        """Fold each band of each signature into one uint64 key"""
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows_per_band)
+        return (bands * self._band_multipliers).sum(axis=2, dtype=np.uint64)
+    
+    def _refresh(self):
+        """Pick up documents appended by other processes"""
+        new_ids = []
+        if os.path.exists(self.documents_path):
+            with open(self.documents_path, 'rb') as f:
+                f.seek(self._documents_offset)
+                for line in f:
+                    # A line without a newline is still being written
+                    if not line.endswith(b'\n'):
+                        break
+                    new_ids.append(line[:-1].decode('utf-8'))
+                    self._documents_offset += len(line)
+        
+        try:
+            stat = os.stat(self.signatures_path)
+            stat_key = (stat.st_ino, stat.st_size)
+        except OSError:
+            stat_key = None
+        
+        if stat_key is not None and stat_key != self._signatures_stat:
+            self._signatures = np.load(self.signatures_path, mmap_mode='r+')
+        self._signatures_stat = stat_key
+        
+        if new_ids:
+            first_row = len(self.document_ids)
+            for offset, document_id in enumerate(new_ids):
+                self._row_by_document[document_id] = first_row + offset
+            self.document_ids.extend(new_ids)
+            
+            rows = np.asarray(self._signatures[first_row:len(self.document_ids)])
+            self._band_keys = np.concatenate([self._band_keys, self._compute_band_keys(rows)])
+    
+    def _ensure_capacity(self, size):
+        """Grow the signature array by doubling so appends stay amortised O(1)"""
+        capacity = 0 if self._signatures is None else len(self._signatures)
+        if size <= capacity:
+            return
+        
+        new_capacity = max(capacity, self.initial_capacity)
+        while new_capacity < size:
+            new_capacity *= 2
+        
+        temp_path = f"{self.signatures_path}.{os.getpid()}.tmp"
+        signatures = np.lib.format.open_memmap(
+            temp_path, mode='w+', dtype=np.uint32, shape=(new_capacity, self.num_perm)
+        )
+        if capacity:
+            signatures[:capacity] = self._signatures
+        signatures.flush()
+        del signatures
+        os.replace(temp_path, self.signatures_path)
+        
+        self._signatures = np.load(self.signatures_path, mmap_mode='r+')
+        stat = os.stat(self.signatures_path)
+        self._signatures_stat = (stat.st_ino, stat.st_size)
+    
+    def add(self, document_id, text=None, signature=None):
+        """Add one document; returns False if it is already indexed or has too little text to index"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return False
+        return self.add_many([document_id], np.asarray(signature)[None, :]) == 1
+    
+    def add_many(self, document_ids, signatures):
+        """Bulk-add documents from precomputed signatures; returns how many were new"""
+        signatures = np.asarray(signatures, dtype=np.uint32)
+        
+        with self._thread_lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                
+                # Skip documents we already have, and repeats within this batch
+                keep = []
+                seen = set()
+                for position, document_id in enumerate(document_ids):
+                    if document_id not in self._row_by_document and document_id not in seen:
+                        seen.add(document_id)
+                        keep.append(position)
+                if not keep:
+                    return 0
+                
+                first_row = len(self.document_ids)
+                new_ids = [document_ids[position] for position in keep]
+                new_signatures = signatures[keep]
+                
+                # Signatures go in before their ids, so readers never see an id without its row
+                self._ensure_capacity(first_row + len(new_ids))
+                self._signatures[first_row:first_row + len(new_ids)] = new_signatures
+                self._signatures.flush()
+                
+                with open(self.documents_path, 'ab') as f:
+                    f.write(''.join(f"{document_id}\n" for document_id in new_ids).encode('utf-8'))
+                self._documents_offset = os.path.getsize(self.documents_path)
+                
+                for offset, document_id in enumerate(new_ids):
+                    self._row_by_document[document_id] = first_row + offset
+                self.document_ids.extend(new_ids)
+                self._band_keys = np.concatenate([self._band_keys, self._compute_band_keys(new_signatures)])
+                
+                return len(new_ids)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _sort_bands(self):
+        """Rebuild the per-band sorted keys once enough rows were added since the last sort"""
+        total = len(self._band_keys)
+        if self._sorted_keys is not None and total - self._unsorted_from <= max(1024, total // 8):
+            return
+        
+        self._sorted_rows = np.argsort(self._band_keys, axis=0, kind='stable')
+        self._sorted_keys = np.take_along_axis(self._band_keys, self._sorted_rows, axis=0)
+        self._unsorted_from = total
+    
+    def _candidate_rows(self, band_keys):
+        """Rows sharing at least one band key with the query"""
+        self._sort_bands()
+        
+        candidates = []
+        for band in range(self.bands):
+            keys = self._sorted_keys[:, band]
+            low = np.searchsorted(keys, band_keys[band], side='left')
+            high = np.searchsorted(keys, band_keys[band], side='right')
+            if high > low:
+                candidates.append(self._sorted_rows[low:high, band])
+        
+        # Rows added since the last sort are compared directly
+        recent = self._band_keys[self._unsorted_from:]
+        if len(recent):
+            matches = np.nonzero((recent == band_keys[None, :]).any(axis=1))[0]
+            candidates.append(matches + self._unsorted_from)
+        
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(candidates))
+    
+    def query(self, text=None, signature=None, threshold=None, exclude=None):
+        """
+        Find the most similar indexed document.
+        
+        Returns (document_id, estimated_similarity) or None when nothing reaches
+        the threshold or the text is too short to compare.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+        signature = np.asarray(signature, dtype=np.uint32)
+        threshold = self.threshold if threshold is None else threshold
+        
+        with self._thread_lock:
+            self._refresh()
+            if not self.document_ids:
+                return None
+            
+            band_keys = self._compute_band_keys(signature[None, :])[0]
+            rows = self._candidate_rows(band_keys)
+            if not len(rows):
+                return None
+            
+            # Estimate Jaccard similarity as the fraction of matching MinHash values
+            similarities = (self._signatures[rows] == signature[None, :]).mean(axis=1)
+            
+            best = None
+            for position in np.argsort(-similarities, kind='stable'):
+                document_id = self.document_ids[rows[position]]
+                if document_id == exclude:
+                    continue
+                if similarities[position] >= threshold:
+                    best = (document_id, float(similarities[position]))
+                break
+            
+            return best
@@ -0,0 +1,55 @@
+ENCODING_PROFILES = {
+    # Low resolution and frame rate with the fastest x264 preset, for previews while a plan is being edited
+    'draft': {
+        'width': 640,
+        'height': 360,
+        'fps': 12,
+        'preset': 'ultrafast',
+        'crf': 30,
+        'threads': None,
+        'audio_bitrate': '64k'
+    },
+    # What renders have always used: x264's default preset and quality at 720p
+    'standard': {
+        'width': 1280,
+        'height': 720,
+        'fps': 24,
+        'preset': 'medium',
+        'crf': 23,
+        'threads': None,
+        'audio_bitrate': '128k'
+    },
+    # Higher quality for publishing, at the cost of a slower encode
+    'final': {
+        'width': 1280,
+        'height': 720,
+        'fps': 24,
+        'preset': 'slow',
+        'crf': 18,
+        'threads': None,
+        'audio_bitrate': '192k'
+    }
+}
+
+DEFAULT_PROFILE = 'standard'
+
+
+def get_profile(name=None):
+    """Return the named encoding profile (the default one if name is empty), raising ValueError if it is unknown"""
+    name = name or DEFAULT_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile: {name}")
+    return dict(ENCODING_PROFILES[name], name=name)
+
+
+def x264_args(profile):
+    """ffmpeg output options encoding video with a profile's x264 settings"""
+    args = ['-c:v', 'libx264', '-preset', profile['preset'], '-crf', str(profile['crf'])]
+    if profile.get('threads'):
+        args += ['-threads', str(profile['threads'])]
+    return args
+
+
+def scale_to_profile(size, profile, reference_height=720):
+    """Scale a size designed for reference_height-high frames, like a font size or margin, to the profile's frames"""
+    return max(1, round(size * profile['height'] / reference_height))
@@ -1,20 +1,138 @@
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, AudioFileClip
+from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, AudioFileClip
 import os
+import re
 import json
 import random
+import hashlib
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import time
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+from overlay_cache import OverlayCache
+from background_library import BackgroundLibrary
+from segment_cache import SegmentCache
+from render_store import RenderStore
+from ffmpeg_tools import find_ffmpeg, run_ffmpeg, encode_still, concat_copy
+from encoding_profiles import get_profile, x264_args, scale_to_profile
+from progressive_output import ProgressiveOutput
+
+
+def available_cpus():
+    """Number of CPUs this process may use, honouring the container's cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+    return max(1, cpus)
+
+
+# Generator used by render worker processes, created once per process
+_WORKER_GENERATOR = None
+
+
+def _init_render_worker(upload_folder, output_folder, asmr_folder, overlay_folder, settings):
+    global _WORKER_GENERATOR
+    _WORKER_GENERATOR = EnhancedVideoGenerator(
+        upload_folder=upload_folder,
+        output_folder=output_folder,
+        asmr_folder=asmr_folder,
+        render_processes=1,
+        overlay_cache=OverlayCache(cache_folder=overlay_folder)
+    )
+    # Render with the same settings as the generator that started the pool
+    for name, value in settings.items():
+        setattr(_WORKER_GENERATOR, name, value)
+
+
+def _render_concept_video(concept, video_id, backend=None, seed=None, profile=None, stream=None):
+    """Render one concept in a worker process"""
+    return _WORKER_GENERATOR.generate_concept_video(concept, video_id, backend=backend, seed=seed, profile=profile,
+                                                    stream=stream)
+
 
 class EnhancedVideoGenerator:
-    def __init__(self, upload_folder='uploads', output_folder='static/videos', asmr_folder='static/asmr_videos'):
+    # 'moviepy' composites every frame in Python; 'ffmpeg' hands the static overlays to one ffmpeg filter graph
+    RENDER_BACKENDS = ('moviepy', 'ffmpeg')
+    
+    # Where static overlays go, as ffmpeg overlay filter coordinates
+    OVERLAY_POSITIONS = {
+        'top': ('(W-w)/2', '{margin}'),
+        'center': ('(W-w)/2', '(H-h)/2'),
+        'bottom': ('(W-w)/2', 'H-h-{margin}')
+    }
+    
+    # Distance of top and bottom overlays from the frame's edge in a 720p frame; scaled with the frame height
+    OVERLAY_MARGIN = 50
+    
+    def __init__(self, upload_folder='uploads', output_folder='static/videos', asmr_folder='static/asmr_videos',
+                 single_flight=None, render_processes=None, overlay_cache=None, background_library=None,
+                 render_backend='moviepy', segment_cache=None, render_store=None, render_seed=None,
+                 encoding_profile='standard', progressive_output=None):
         self.upload_folder = upload_folder
         self.output_folder = output_folder
         self.asmr_folder = asmr_folder
         
+        # Optional SingleFlight so identical render requests share one render
+        self.single_flight = single_flight
+        
+        # Concepts of a plan render in this many processes; by default one per CPU the container may use
+        self.render_processes = render_processes or available_cpus()
+        
+        if render_backend not in self.RENDER_BACKENDS:
+            raise ValueError(f"Unknown render backend: {render_backend}")
+        self.render_backend = render_backend
+        
+        # Named x264/resolution/audio settings from encoding_profiles; 'draft' renders quick previews
+        get_profile(encoding_profile)
+        self.encoding_profile = encoding_profile
+        
+        # Scratch space for renders in progress, on the same volume so finished files can be moved into place
+        self.temp_folder = os.path.join(output_folder, '.tmp')
+        
         # Create necessary directories
         os.makedirs(output_folder, exist_ok=True)
         os.makedirs(asmr_folder, exist_ok=True)
+        os.makedirs(self.temp_folder, exist_ok=True)
+        
+        # Text overlays are drawn with PIL once and reused; worker processes share the on-disk store
+        self.overlay_cache = overlay_cache or OverlayCache(os.path.join(output_folder, '.overlays'))
+        
+        # Encoded segments, reused when a plan is rendered again with only some segments changed
+        self.segment_cache = segment_cache or SegmentCache(os.path.join(output_folder, '.segments'))
+        
+        # Finished videos are stored by a hash of their render inputs and listed in per-document manifests
+        self.render_store = render_store or RenderStore(output_folder)
+        
+        # Seed for background and font choices; the same seed and concept always make the same choices
+        self.render_seed = render_seed
+        
+        # HLS streams of renders in progress, for plans that ask for progressive output
+        self.progressive_output = progressive_output or ProgressiveOutput(output_folder)
         
         # Font settings
         self.fonts = [
@@ -48,6 +166,14 @@ class EnhancedVideoGenerator:
         self.default_video_height = 720
         self.default_duration = 30  # seconds per concept
         self.default_fps = 24
+        
+        # Downloads are transcoded once to the render size and frame rate, and renders read those proxies
+        self.background_library = background_library or BackgroundLibrary(
+            source_folder=asmr_folder,
+            width=self.default_video_width,
+            height=self.default_video_height,
+            fps=self.default_fps
+        )
     
     def download_asmr_video(self, url, output_path=None):
         """Download an ASMR video from YouTube"""
@@ -74,20 +200,24 @@ class EnhancedVideoGenerator:
             # Return a default video path or None
             return None
     
-    def get_random_asmr_video(self):
-        """Get a random ASMR video from our sources"""
+    def get_random_asmr_video(self, rng=None):
+        """Get a random ASMR video from our sources, picked with rng if given"""
+        rng = rng or random
+        
         # Check if we have any downloaded videos
-        existing_videos = [os.path.join(self.asmr_folder, f) for f in os.listdir(self.asmr_folder) if f.endswith('.mp4')]
+        existing_videos = sorted(
+            os.path.join(self.asmr_folder, f) for f in os.listdir(self.asmr_folder) if f.endswith('.mp4')
+        )
         
         if existing_videos:
-            return random.choice(existing_videos)
+            return rng.choice(existing_videos)
         
         # If no videos, download one
-        url = random.choice(self.asmr_video_sources)
+        url = rng.choice(self.asmr_video_sources)
         return self.download_asmr_video(url)
     
     def create_text_overlay(self, text, font=None, font_size=60, color='white', bg_color=None, 
-                           width=None, height=None, position='center'):
+                           width=None, height=None, position='center', margin=None):
         """Create a text overlay for the video"""
         if not font:
             font = random.choice(self.fonts)
@@ -98,145 +228,493 @@ class EnhancedVideoGenerator:
         if not height:
             height = self.default_video_height
         
-        # Create text clip
-        text_clip = TextClip(text, fontsize=font_size, font=font, color=color, bg_color=bg_color,
-                            size=(width, None), method='caption', align='center')
+        if margin is None:
+            margin = self.OVERLAY_MARGIN
+        
+        # Create text clip from the cached raster of this text
+        overlay = self.overlay_cache.render(text, font=font, font_size=font_size, color=color,
+                                            bg_color=bg_color, width=width, align='center')
+        text_clip = ImageClip(overlay, transparent=True)
         
         # Set position
         if position == 'center':
             text_clip = text_clip.set_position('center')
         elif position == 'top':
-            text_clip = text_clip.set_position(('center', 50))
+            text_clip = text_clip.set_position(('center', margin))
         elif position == 'bottom':
-            text_clip = text_clip.set_position(('center', height - text_clip.h - 50))
+            text_clip = text_clip.set_position(('center', height - text_clip.h - margin))
         
         return text_clip
     
-    def generate_concept_video(self, concept, video_id, duration=None):
-        """Generate a video for a single concept using ASMR background"""
+    def _render_settings(self):
+        """Settings a render worker process needs to match this generator's output"""
+        return {
+            'fonts': self.fonts,
+            'default_video_width': self.default_video_width,
+            'default_video_height': self.default_video_height,
+            'default_duration': self.default_duration,
+            'default_fps': self.default_fps,
+            'encoding_profile': self.encoding_profile,
+            'progressive_output': self.progressive_output
+        }
+    
+    def _encoding(self, profile=None):
+        """The settings of an encoding profile, by default the generator's"""
+        return get_profile(profile or self.encoding_profile)
+    
+    def _encode_target(self, temp_path, encoding, stream=None):
+        """
+        Where an encode writes and the muxer options for it.
+        
+        Without a stream that is a faststart MP4 at temp_path; with one it is
+        the stream's playlist, and the caller remuxes the finished stream into
+        temp_path.
+        """
+        if not stream:
+            return temp_path, ['-movflags', '+faststart']
+        
+        self.progressive_output.start(stream)
+        return self.progressive_output.playlist_path(stream), self.progressive_output.hls_args(stream, encoding['fps'])
+    
+    def _write_video(self, clip, output_path, encoding=None, stream=None):
+        """
+        Encode a clip to output_path using a temporary folder of its own.
+        
+        moviepy's intermediate audio file and the partially written video stay
+        in that folder, so concurrent renders never clobber each other, and the
+        finished file is moved into place in one step. With a stream folder the
+        encode is watchable as an HLS stream while it runs.
+        """
+        encoding = encoding or self._encoding()
+        temp_folder = tempfile.mkdtemp(prefix='render-', dir=self.temp_folder)
+        try:
+            temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+            target, output_args = self._encode_target(temp_path, encoding, stream)
+            clip.write_videofile(
+                target, 
+                fps=encoding['fps'], 
+                codec='libx264', 
+                audio_codec='aac', 
+                preset=encoding['preset'], 
+                threads=encoding['threads'], 
+                audio_bitrate=encoding['audio_bitrate'], 
+                ffmpeg_params=['-crf', str(encoding['crf'])] + output_args, 
+                temp_audiofile=os.path.join(temp_folder, 'temp-audio.m4a'), 
+                remove_temp=True
+            )
+            if stream:
+                self.progressive_output.remux(stream, temp_path)
+            os.replace(temp_path, output_path)
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+    
+    def _render_with_ffmpeg(self, background_args, overlays, duration, output_path, encoding=None, stream=None):
+        """
+        Render a background with static overlays in a single ffmpeg run.
+        
+        background_args are the ffmpeg input options of the background (a file
+        or a lavfi source) and overlays a list of (text, font_size, position,
+        font). Each overlay is the cached PNG of its text, placed by the overlay
+        filter, so no frame passes through Python. Returns None when ffmpeg is
+        missing or fails, so the caller can render with moviepy instead.
+        """
+        if not find_ffmpeg():
+            return None
+        
+        encoding = encoding or self._encoding()
+        margin = scale_to_profile(self.OVERLAY_MARGIN, encoding)
+        
+        inputs = list(background_args)
+        filters = [f"[0:v]scale=-2:{encoding['height']},fps={encoding['fps']}[base0]"]
+        for number, (text, font_size, position, font) in enumerate(overlays, start=1):
+            overlay_path = self.overlay_cache.render_file(
+                text, font=font, font_size=font_size, width=encoding['width']
+            )
+            inputs += ['-i', overlay_path]
+            x, y = self.OVERLAY_POSITIONS.get(position, self.OVERLAY_POSITIONS['center'])
+            y = y.format(margin=margin)
+            filters.append(f"[base{number - 1}][{number}:v]overlay=x={x}:y={y}[base{number}]")
+        filters.append(f"[base{len(overlays)}]format=yuv420p[video]")
+        
+        temp_folder = tempfile.mkdtemp(prefix='render-', dir=self.temp_folder)
         try:
-            # Extract concept details
-            title = concept['name']
-            description = concept['explanation']
+            temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+            target, output_args = self._encode_target(temp_path, encoding, stream)
+            run_ffmpeg([
+                '-y', *inputs,
+                '-filter_complex', ';'.join(filters),
+                '-map', '[video]', '-map', '0:a?',
+                '-t', str(duration),
+                *x264_args(encoding), '-r', str(encoding['fps']),
+                '-c:a', 'aac', '-b:a', encoding['audio_bitrate'],
+                *output_args, target
+            ])
+            if stream:
+                self.progressive_output.remux(stream, temp_path)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            print(f"Warning: ffmpeg render failed, falling back to moviepy: {str(e)}")
+            return None
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+        
+        return {
+            "success": True,
+            "video_path": output_path,
+            "duration": duration
+        }
+    
+    def _compose_still_frame(self, color, overlays, encoding=None):
+        """Draw a colour background with overlays placed as create_text_overlay places them"""
+        encoding = encoding or self._encoding()
+        width, height = encoding['width'], encoding['height']
+        margin = scale_to_profile(self.OVERLAY_MARGIN, encoding)
+        frame = Image.new('RGBA', (width, height), tuple(color) + (255,))
+        
+        for text, font_size, position, font in overlays:
+            overlay = Image.fromarray(self.overlay_cache.render(
+                text, font=font, font_size=font_size, width=width
+            ), 'RGBA')
+            x = (width - overlay.width) // 2
+            if position == 'top':
+                y = margin
+            elif position == 'bottom':
+                y = height - overlay.height - margin
+            else:
+                y = (height - overlay.height) // 2
+            frame.alpha_composite(overlay, (max(x, 0), max(y, 0)))
+        
+        return frame.convert('RGB')
+    
+    def _render_still(self, color, overlays, duration, output_path, audio_path=None, encoding=None):
+        """
+        Render a composition that doesn't change over time from a single frame.
+        
+        A colour background with static overlays looks the same in every frame,
+        so the frame is drawn once and encoded as a looped still. Returns None
+        if ffmpeg is missing or fails.
+        """
+        if not find_ffmpeg():
+            return None
+        
+        encoding = encoding or self._encoding()
+        temp_folder = tempfile.mkdtemp(prefix='render-', dir=self.temp_folder)
+        try:
+            frame_path = os.path.join(temp_folder, 'frame.png')
+            self._compose_still_frame(color, overlays, encoding).save(frame_path)
+            
+            temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+            encode_still(frame_path, temp_path, duration, fps=encoding['fps'], audio_path=audio_path,
+                         preset=encoding['preset'], crf=encoding['crf'], threads=encoding['threads'],
+                         audio_bitrate=encoding['audio_bitrate'])
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            print(f"Warning: Still render failed: {str(e)}")
+            return None
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+        
+        return {
+            "success": True,
+            "video_path": output_path,
+            "duration": duration
+        }
+    
+    def _render_with_moviepy(self, background, overlays, duration, output_path, offset=0, encoding=None,
+                             stream=None):
+        """Composite the background and overlays frame by frame with moviepy"""
+        encoding = encoding or self._encoding()
+        width, height = encoding['width'], encoding['height']
+        
+        if isinstance(background, tuple):
+            from moviepy.editor import ColorClip
+            background_clip = ColorClip(size=(width, height), color=background).set_duration(duration)
+        else:
+            background_clip = VideoFileClip(background).subclip(offset, offset + duration)
             
+            # Resize to our target dimensions (proxies already have them at the standard size)
+            if background_clip.h != height:
+                background_clip = background_clip.resize(height=height)
+        
+        # Create text overlays
+        overlay_clips = [
+            self.create_text_overlay(
+                text, font=font, font_size=font_size, width=width, height=height, position=position,
+                margin=scale_to_profile(self.OVERLAY_MARGIN, encoding)
+            ).set_duration(duration)
+            for text, font_size, position, font in overlays
+        ]
+        
+        # Combine clips
+        final_clip = CompositeVideoClip([background_clip] + overlay_clips)
+        
+        # Write video file
+        self._write_video(final_clip, output_path, encoding, stream)
+        
+        return {
+            "success": True,
+            "video_path": output_path,
+            "duration": final_clip.duration
+        }
+    
+    def _render_composition(self, background, overlays, duration, output_path, backend=None, offset=0,
+                            encoding=None, stream=None):
+        """
+        Render static overlays over a background with the fastest renderer that can.
+        
+        background is either a video path, read from offset seconds on, or an
+        RGB colour. A colour background never changes, so it is rendered as a
+        still; otherwise the ffmpeg backend is tried when selected, and moviepy
+        renders whatever the others couldn't. Stills take too little time to
+        be worth streaming, so only the other two write to stream.
+        """
+        encoding = encoding or self._encoding()
+        
+        if isinstance(background, tuple):
+            # Nothing on screen moves, so one frame is enough
+            result = self._render_still(background, overlays, duration, output_path, encoding=encoding)
+            if result:
+                return result
+            
+            background_args = ['-f', 'lavfi', '-i', 'color=c=0x{:02x}{:02x}{:02x}:s={}x{}:r={}:d={}'.format(
+                *background, encoding['width'], encoding['height'], encoding['fps'], duration)]
+        else:
+            background_args = ['-ss', str(offset), '-t', str(duration), '-i', background]
+        
+        if (backend or self.render_backend) == 'ffmpeg':
+            result = self._render_with_ffmpeg(background_args, overlays, duration, output_path, encoding, stream)
+            if result:
+                return result
+        
+        return self._render_with_moviepy(background, overlays, duration, output_path, offset, encoding, stream)
+    
+    def _segment_durations(self, segments, duration, fps=None):
+        """Split a video's duration over its segments in proportion to their planned lengths"""
+        weights = []
+        for segment in segments:
+            # Planned lengths look like "15-20 seconds" or "1-2 minutes"; use the middle of the range
+            planned = str(segment.get('duration', ''))
+            numbers = [float(number) for number in re.findall(r"\d+(?:\.\d+)?", planned)]
+            weight = sum(numbers) / len(numbers) if numbers else 1
+            if 'minute' in planned:
+                weight *= 60
+            weights.append(weight or 1)
+        
+        # Whole frames, so segments join without drifting off the frame grid
+        fps = fps or self.default_fps
+        total_frames = round(duration * fps)
+        frames = [max(1, round(total_frames * weight / sum(weights))) for weight in weights]
+        return [count / fps for count in frames]
+    
+    def _render_segments(self, concept, background, fonts, duration, output_path, backend=None, encoding=None,
+                         stream=None):
+        """
+        Render a concept segment by segment and join the segments by stream copy.
+        
+        Each segment shows the concept's title over the segment's own content
+        and continues the background where the previous segment left off. It is
+        encoded once into the segment cache, keyed by all of its inputs, so
+        when a plan comes back with one segment changed only that segment is
+        encoded again. With a stream folder, each segment is appended to that
+        stream as soon as it is ready. Returns None if the segments can't be
+        joined.
+        """
+        backend = backend or self.render_backend
+        encoding = encoding or self._encoding()
+        title_font, body_font = fonts
+        
+        # A background file is identified by name, size and mtime; proxies have the source hash in their name
+        if isinstance(background, tuple):
+            background_id = list(background)
+        else:
+            stat = os.stat(background)
+            background_id = [os.path.basename(background), stat.st_size, int(stat.st_mtime)]
+        
+        segments = concept['segments']
+        segment_paths = []
+        offset = 0
+        if stream:
+            self.progressive_output.start(stream)
+        for segment, segment_duration in zip(segments, self._segment_durations(segments, duration, encoding['fps'])):
+            overlays = [
+                (concept['name'], scale_to_profile(80, encoding), 'top', title_font),
+                (segment.get('content') or concept['explanation'], scale_to_profile(40, encoding), 'bottom', body_font)
+            ]
+            key = self.segment_cache.key({
+                'background': background_id,
+                'offset': offset,
+                'duration': segment_duration,
+                'overlays': overlays,
+                'backend': backend,
+                'encoding': dict(encoding, codec='libx264', audio_codec='aac')
+            })
+            
+            segment_path = self.segment_cache.get(key)
+            if not segment_path:
+                segment_path = self.segment_cache.path(key)
+                result = self._render_composition(background, overlays, segment_duration, segment_path, backend, offset,
+                                                  encoding)
+                if not result.get('success'):
+                    return None
+            
+            segment_paths.append(segment_path)
+            offset += segment_duration
+            
+            if stream:
+                try:
+                    self.progressive_output.append(stream, segment_path)
+                except Exception as e:
+                    # Only the preview suffers; the video itself is still rendered
+                    print(f"Warning: Failed to stream segment: {str(e)}")
+                    stream = None
+        
+        temp_folder = tempfile.mkdtemp(prefix='render-', dir=self.temp_folder)
+        try:
+            temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+            concat_copy(segment_paths, temp_path)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            print(f"Warning: Failed to join segments: {str(e)}")
+            return None
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+        
+        self.segment_cache.evict(keep=set(segment_paths))
+        
+        return {
+            "success": True,
+            "video_path": output_path,
+            "duration": offset
+        }
+    
+    def _concept_rng(self, concept, seed=None):
+        """Random choices for a concept, reproducible from the seed and the concept's title"""
+        if seed is None:
+            seed = self.render_seed
+        return random.Random(json.dumps([seed, concept['name']]))
+    
+    def _render_key(self, concept, background_id, fonts, duration, backend, encoding=None):
+        """Content key of a concept render: everything that affects the output file"""
+        return self.render_store.key({
+            'title': concept['name'],
+            'explanation': concept['explanation'],
+            'segments': [
+                {'content': segment.get('content'), 'duration': segment.get('duration')}
+                for segment in concept.get('segments') or []
+            ],
+            'background': background_id,
+            'fonts': fonts,
+            'duration': duration,
+            'backend': backend or self.render_backend,
+            'encoding': encoding or self._encoding()
+        })
+    
+    def _render_concept(self, concept, background, fonts, duration, output_path, backend=None, encoding=None,
+                        stream=None):
+        """Render a concept over a background, by segments when the plan has them"""
+        encoding = encoding or self._encoding()
+        if concept.get('segments') and find_ffmpeg():
+            result = self._render_segments(concept, background, fonts, duration, output_path, backend, encoding,
+                                           stream)
+            if result:
+                return result
+        
+        overlays = [
+            (concept['name'], scale_to_profile(80, encoding), 'top', fonts[0]),
+            (concept['explanation'], scale_to_profile(40, encoding), 'bottom', fonts[1])
+        ]
+        return self._render_composition(background, overlays, duration, output_path, backend, encoding=encoding,
+                                        stream=stream)
+    
+    def _stored_render(self, key, duration):
+        """The result for a render that is already in the render store, or None"""
+        stored_path = self.render_store.get(key)
+        if not stored_path:
+            return None
+        
+        return {
+            "success": True,
+            "video_path": stored_path,
+            "duration": duration,
+            "render_key": key,
+            "cached": True
+        }
+    
+    def _render_into_store(self, key, concept, background, fonts, duration, backend, encoding, stream=None):
+        result = self._render_concept(concept, background, fonts, duration, self.render_store.object_path(key), backend,
+                                      encoding, stream)
+        result["render_key"] = key
+        if stream:
+            self.progressive_output.finish(stream)
+        return result
+    
+    def generate_concept_video(self, concept, video_id, duration=None, backend=None, seed=None, profile=None,
+                               stream=None):
+        """
+        Generate a video for a single concept using ASMR background, encoded with the named profile.
+        
+        If stream is a ProgressiveOutput stream folder, the video can be
+        watched there while it renders.
+        """
+        try:
             if not duration:
                 duration = self.default_duration
             
+            encoding = self._encoding(profile)
+            
+            # The same seed and concept pick the same background and fonts, so identical inputs
+            # map to the same stored render and cached segments
+            rng = self._concept_rng(concept, seed)
+            
             # Get a background ASMR video
-            asmr_video_path = self.get_random_asmr_video()
+            asmr_video_path = self.get_random_asmr_video(rng)
             
             if not asmr_video_path or not os.path.exists(asmr_video_path):
                 # For development, create a mock video
-                return self.mock_generate_concept_video(concept, video_id, duration)
+                return self.mock_generate_concept_video(concept, video_id, duration, backend, seed, profile, stream)
             
-            # Load the background video
-            background_clip = VideoFileClip(asmr_video_path).subclip(0, duration)
+            fonts = (rng.choice(self.fonts), rng.choice(self.fonts))
             
-            # Resize to our target dimensions
-            background_clip = background_clip.resize(height=self.default_video_height)
+            # The proxy's name identifies the source file and the proxy settings, without transcoding first
+            background_id = os.path.basename(self.background_library.proxy_path(asmr_video_path))
             
-            # Create text overlays
-            title_clip = self.create_text_overlay(
-                title, 
-                font_size=80, 
-                position='top'
-            ).set_duration(duration)
+            # Nothing to do if these exact inputs were rendered before
+            key = self._render_key(concept, background_id, fonts, duration, backend, encoding)
+            stored = self._stored_render(key, duration)
+            if stored:
+                return stored
             
-            description_clip = self.create_text_overlay(
-                description, 
-                font_size=40, 
-                position='bottom'
-            ).set_duration(duration)
-            
-            # Combine clips
-            final_clip = CompositeVideoClip([
-                background_clip, 
-                title_clip, 
-                description_clip
-            ])
+            # Load the normalised proxy of the background, or the download itself if no proxy could be made
+            background_path = self.background_library.get_proxy(asmr_video_path) or asmr_video_path
             
-            # Set output path
-            output_path = os.path.join(self.output_folder, f"{video_id}.mp4")
-            
-            # Write video file
-            final_clip.write_videofile(
-                output_path, 
-                fps=self.default_fps, 
-                codec='libx264', 
-                audio_codec='aac', 
-                temp_audiofile='temp-audio.m4a', 
-                remove_temp=True
-            )
-            
-            return {
-                "success": True,
-                "video_path": output_path,
-                "duration": final_clip.duration
-            }
+            return self._render_into_store(key, concept, background_path, fonts, duration, backend, encoding, stream)
             
         except Exception as e:
             print(f"Error generating video: {str(e)}")
             # Fall back to mock generation
-            return self.mock_generate_concept_video(concept, video_id, duration)
+            return self.mock_generate_concept_video(concept, video_id, duration, backend, seed, profile, stream)
     
-    def mock_generate_concept_video(self, concept, video_id, duration=None):
+    def mock_generate_concept_video(self, concept, video_id, duration=None, backend=None, seed=None, profile=None,
+                                    stream=None):
         """Generate a mock video for development purposes"""
-        # Set output path
-        output_path = os.path.join(self.output_folder, f"{video_id}.mp4")
-        
         # Create a simple video with text
         try:
-            # Extract concept details
-            title = concept['name']
-            description = concept['explanation']
-            
             if not duration:
                 duration = self.default_duration
             
-            # Create a blank background
-            width, height = self.default_video_width, self.default_video_height
-            color = (30, 30, 60)  # Dark blue background
-            
-            # Create a clip with the background color
-            from moviepy.editor import ColorClip
-            background_clip = ColorClip(size=(width, height), color=color).set_duration(duration)
-            
-            # Create text overlays
-            title_clip = self.create_text_overlay(
-                title, 
-                font_size=80, 
-                position='top'
-            ).set_duration(duration)
+            # Dark blue background
+            color = (30, 30, 60)
             
-            description_clip = self.create_text_overlay(
-                description, 
-                font_size=40, 
-                position='bottom'
-            ).set_duration(duration)
+            encoding = self._encoding(profile)
+            rng = self._concept_rng(concept, seed)
+            fonts = (rng.choice(self.fonts), rng.choice(self.fonts))
             
-            # Combine clips
-            final_clip = CompositeVideoClip([
-                background_clip, 
-                title_clip, 
-                description_clip
-            ])
-            
-            # Write video file
-            final_clip.write_videofile(
-                output_path, 
-                fps=self.default_fps, 
-                codec='libx264', 
-                audio_codec='aac', 
-                temp_audiofile='temp-audio.m4a', 
-                remove_temp=True
+            key = self._render_key(concept, list(color), fonts, duration, backend, encoding)
+            result = self._stored_render(key, duration) or self._render_into_store(
+                key, concept, color, fonts, duration, backend, encoding, stream
             )
-            
-            return {
-                "success": True,
-                "video_path": output_path,
-                "duration": final_clip.duration,
-                "note": "Mock video generated for development"
-            }
+            result["note"] = "Mock video generated for development"
+            return result
             
         except Exception as e:
             print(f"Error generating mock video: {str(e)}")
@@ -245,40 +723,141 @@ class EnhancedVideoGenerator:
                 "error": str(e)
             }
     
-    def generate_videos_from_plan(self, video_plan):
-        """Generate videos based on a video generation plan"""
+    def generate_videos_from_plan(self, video_plan, on_result=None, completed=None):
+        """
+        Generate videos based on a video generation plan
+        
+        on_result(position, result) is called as each video finishes, and videos
+        whose position is in completed reuse that result instead of rendering.
+        A plan's 'render_backend', 'render_seed' and 'encoding_profile' override
+        the generator's. A plan with a 'stream_id' streams each video while it
+        renders, in progressive_output.stream_folder(stream_id, position).
+        The rendered videos are recorded in the document's manifest. Identical
+        plans rendering at the same time, in this process or another one
+        sharing single_flight's folder, are rendered once.
+        """
+        if not self.single_flight:
+            result = self._generate_videos_from_plan(video_plan, on_result, completed)
+        else:
+            # Renders only depend on the videos in the plan, the backend, the seed and the encoding profile,
+            # not on which upload asked for them; only the first caller's stream shows the render in progress
+            backend = video_plan.get('render_backend') or self.render_backend
+            seed = video_plan.get('render_seed', self.render_seed)
+            profile = video_plan.get('encoding_profile') or self.encoding_profile
+            plan_key = hashlib.sha256(
+                json.dumps([video_plan.get('videos', []), seed], sort_keys=True).encode('utf-8')
+            ).hexdigest()
+            
+            rendered = []
+            
+            def render():
+                rendered.append(True)
+                return self._generate_videos_from_plan(video_plan, on_result, completed)
+            
+            try:
+                result = self.single_flight.do(f"render:{backend}:{profile}:{plan_key}", render)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+            
+            result = dict(result)
+            if 'filename' in result:
+                result['filename'] = video_plan.get('filename', 'document.pdf')
+            
+            # Callers that waited on someone else's render only see its videos once they are all done
+            if on_result and not rendered:
+                for position, video in enumerate(result.get('videos', [])):
+                    if video is not None:
+                        on_result(position, video)
+        
+        if result.get('success'):
+            self._write_manifest(video_plan, result)
+        return result
+    
+    def _write_manifest(self, video_plan, result):
+        """Point the document's manifest at the stored videos of this render"""
+        document_path = os.path.join(self.upload_folder, video_plan.get('filename', 'document.pdf'))
+        try:
+            self.render_store.record_render(document_path, video_plan, result)
+        except OSError as e:
+            print(f"Warning: Failed to write video manifest: {str(e)}")
+    
+    def _generate_videos_from_plan(self, video_plan, on_result=None, completed=None):
         try:
             # Extract plan details
             filename = video_plan.get('filename', 'document.pdf')
             videos = video_plan.get('videos', [])
-            
-            # Results to track generated videos
-            results = []
-            
-            # Generate a video for each concept in the plan
-            for video_spec in videos:
-                video_id = video_spec['video_id']
-                title = video_spec['title']
-                description = video_spec['description']
+            backend = video_plan.get('render_backend') or self.render_backend
+            if backend not in self.RENDER_BACKENDS:
+                raise ValueError(f"Unknown render backend: {backend}")
+            seed = video_plan.get('render_seed', self.render_seed)
+            profile = video_plan.get('encoding_profile') or self.encoding_profile
+            get_profile(profile)
+            stream_id = video_plan.get('stream_id')
+            
+            # Results to track generated videos, kept in plan order
+            results = [None] * len(videos)
+            
+            def record(position, result):
+                video_spec = videos[position]
+                if result['success']:
+                    # Add metadata to the result
+                    result['title'] = video_spec['title']
+                    result['description'] = video_spec['description']
+                    result['tags'] = video_spec.get('tags', [])
+                
+                results[position] = result
+                if on_result:
+                    on_result(position, result)
+            
+            # Work out which concepts actually need rendering
+            pending = []
+            for position, video_spec in enumerate(videos):
+                if completed and position in completed:
+                    results[position] = completed[position]
+                    continue
                 
                 # Create a concept object for the video generator
                 concept = {
-                    'name': title,
-                    'explanation': description,
+                    'name': video_spec['title'],
+                    'explanation': video_spec['description'],
                     'visuals': [segment['visuals'] for segment in video_spec['segments']],
-                    'sounds': [segment['audio'] for segment in video_spec['segments']]
+                    'sounds': [segment['audio'] for segment in video_spec['segments']],
+                    'segments': video_spec['segments']
                 }
-                
-                # Generate the video
-                result = self.generate_concept_video(concept, video_id)
-                
-                if result['success']:
-                    # Add metadata to the result
-                    result['title'] = title
-                    result['description'] = description
-                    result['tags'] = video_spec.get('tags', [])
-                
-                results.append(result)
+                stream = self.progressive_output.stream_folder(stream_id, position) if stream_id else None
+                pending.append((position, concept, video_spec['video_id'], stream))
+            
+            if self.render_processes > 1 and len(pending) > 1:
+                # Spread the concepts over worker processes; results are recorded as they finish. Workers are
+                # spawned rather than forked, since forking copies the render job and heartbeat threads' locks
+                executor = ProcessPoolExecutor(
+                    max_workers=min(self.render_processes, len(pending)),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_render_worker,
+                    initargs=(self.upload_folder, self.output_folder, self.asmr_folder,
+                              self.overlay_cache.cache_folder, self._render_settings())
+                )
+                with executor:
+                    futures = {
+                        executor.submit(
+                            _render_concept_video, concept, video_id, backend, seed, profile, stream
+                        ): position
+                        for position, concept, video_id, stream in pending
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {"success": False, "error": str(e)}
+                        record(futures[future], result)
+            else:
+                for position, concept, video_id, stream in pending:
+                    # Generate the video
+                    record(position, self.generate_concept_video(concept, video_id, backend=backend, seed=seed,
+                                                                 profile=profile, stream=stream))
             
             # Return the results
             return {
@@ -0,0 +1,123 @@
+import os
+import re
+import shutil
+import subprocess
+
+_FFMPEG = None
+
+
+def find_ffmpeg():
+    """Path of an ffmpeg binary: the system one, else the one bundled with imageio-ffmpeg"""
+    global _FFMPEG
+    if _FFMPEG is None:
+        _FFMPEG = shutil.which('ffmpeg')
+        if _FFMPEG is None:
+            try:
+                import imageio_ffmpeg
+                _FFMPEG = imageio_ffmpeg.get_ffmpeg_exe()
+            except Exception:
+                _FFMPEG = ''
+    return _FFMPEG or None
+
+
+def run_ffmpeg(args, timeout=None):
+    """Run ffmpeg with the given arguments, raising RuntimeError with its last output lines on failure"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg is not installed")
+    
+    process = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostdin', '-loglevel', 'error', *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=timeout
+    )
+    if process.returncode != 0:
+        message = process.stderr.decode('utf-8', errors='replace').strip().splitlines()[-5:]
+        raise RuntimeError(f"ffmpeg failed: {' '.join(message) or process.returncode}")
+    return process
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds, or None if ffmpeg can't read it"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return None
+    
+    # ffmpeg prints the input's header (and exits with an error) when given no output
+    process = subprocess.run([ffmpeg, '-hide_banner', '-nostdin', '-i', path],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", process.stderr.decode('utf-8', errors='replace'))
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def encode_still(image_path, output_path, duration, fps=24, audio_path=None, timeout=None,
+                 preset='medium', crf=None, threads=None, audio_bitrate=None):
+    """
+    Encode a single image as a video of the given duration, optionally muxed with audio.
+    
+    Only one second of video is actually encoded, with still-image x264
+    tuning and a keyframe at its start; that second is then looped by stream
+    copy to the full duration, so the cost doesn't grow with the length. The
+    second has no B-frames, so it can be cut after any frame, and the result
+    has exactly the duration's number of frames. preset, crf, threads and
+    audio_bitrate are passed to the encoders; None leaves their defaults.
+    """
+    unit_path = f"{output_path}.unit.mp4"
+    encoder_args = ['-c:v', 'libx264', '-tune', 'stillimage', '-preset', preset]
+    if crf is not None:
+        encoder_args += ['-crf', str(crf)]
+    if threads:
+        encoder_args += ['-threads', str(threads)]
+    try:
+        run_ffmpeg([
+            '-y', '-loop', '1', '-framerate', str(fps), '-i', image_path, '-frames:v', str(fps),
+            *encoder_args, '-pix_fmt', 'yuv420p', '-g', str(fps), '-bf', '0', unit_path
+        ], timeout=timeout)
+        
+        args = ['-y', '-stream_loop', '-1', '-i', unit_path]
+        if audio_path:
+            args += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', 'aac', '-t', str(duration)]
+            if audio_bitrate:
+                args += ['-b:a', audio_bitrate]
+        args += ['-c:v', 'copy', '-frames:v', str(max(1, round(duration * fps))),
+                 '-movflags', '+faststart', output_path]
+        run_ffmpeg(args, timeout=timeout)
+    finally:
+        if os.path.exists(unit_path):
+            os.remove(unit_path)
+    
+    return output_path
+
+
+def concat_copy(paths, output_path, timeout=None):
+    """Join videos encoded with identical parameters into one faststart file without re-encoding"""
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, 'w') as f:
+        for path in paths:
+            # The concat demuxer's list quotes paths in single quotes
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    
+    try:
+        run_ffmpeg(['-y', '-f', 'concat', '-safe', '0', '-i', list_path, '-map', '0', '-c', 'copy',
+                    '-movflags', '+faststart', output_path], timeout=timeout)
+    finally:
+        os.remove(list_path)
+    
+    return output_path
+
+
+def remux_faststart(input_path, output_path, timeout=None):
+    """
+    Copy a video's streams into an MP4 with its index at the front.
+    
+    A faststart MP4 can be played while it is still downloading; the input
+    can be anything ffmpeg reads, such as an HLS playlist.
+    """
+    run_ffmpeg(['-y', '-i', input_path, '-map', '0', '-c', 'copy', '-movflags', '+faststart', output_path],
+               timeout=timeout)
+    return output_path
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+import numpy as np
+
+class OverlayCache:
+    """
+    Rasterises text overlays with PIL and caches the RGBA images.
+    
+    An overlay is identified by a hash of everything that affects its pixels
+    (text, font, size, colours, width, alignment), so a title rendered once is
+    reused by every later video that shows it. Recently used overlays stay in
+    an in-memory LRU; all of them are stored as PNGs on disk, shared by render
+    worker processes and replicas using the same folder. The PNGs' total size
+    is bounded with least-recently-used eviction based on file modification
+    times, which are refreshed on every disk hit.
+    
+    This replaces moviepy's TextClip(method='caption'), which shells out to
+    ImageMagick for every clip.
+    """
+    # Bump when rendering changes so old PNGs are not reused
+    VERSION = '1'
+    
+    # Fonts tried when the requested one can't be loaded
+    FALLBACK_FONTS = ('DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf')
+    
+    def __init__(self, cache_folder='static/videos/.overlays', max_entries=256, max_bytes=256 * 1024 * 1024,
+                 padding=10, line_spacing=1.2):
+        self.cache_folder = cache_folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.padding = padding
+        self.line_spacing = line_spacing
+        
+        # Create cache directory if it doesn't exist
+        os.makedirs(cache_folder, exist_ok=True)
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        self._memory = OrderedDict()
+        self._fonts = {}
+        self._lock = threading.Lock()
+        self._last_evict = 0
+    
+    def key(self, text, font=None, font_size=60, color='white', bg_color=None, width=1280, align='center'):
+        """Return the cache key for an overlay"""
+        params = [self.VERSION, text, font, font_size, color, bg_color, width, align]
+        return hashlib.sha256(json.dumps(params, default=list).encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_folder, key[:2], f"{key}.png")
+    
+    def render(self, text, font=None, font_size=60, color='white', bg_color=None, width=1280, align='center'):
+        """Return the overlay as an RGBA uint8 array of shape (height, width, 4)"""
+        key = self.key(text, font, font_size, color, bg_color, width, align)
+        
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return image
+        
+        path = self._path(key)
+        try:
+            with Image.open(path) as stored:
+                image = np.asarray(stored.convert('RGBA'))
+            from_disk = True
+            self._touch(path)
+        except (OSError, ValueError):
+            image = self._rasterize(text, font, font_size, color, bg_color, width, align)
+            self._store(path, image)
+            from_disk = False
+        
+        with self._lock:
+            if from_disk:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+            
+            self._memory[key] = image
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        
+        return image
+    
+    def render_file(self, text, font=None, font_size=60, color='white', bg_color=None, width=1280, align='center'):
+        """Return the path of the overlay's PNG, for tools like ffmpeg that read images from disk"""
+        path = self._path(self.key(text, font, font_size, color, bg_color, width, align))
+        if not self._touch(path):
+            image = self.render(text, font, font_size, color, bg_color, width, align)
+            # A memory hit doesn't write the file, so make sure it is there
+            if not os.path.exists(path):
+                self._store(path, image)
+        return path
+    
+    def _store(self, path, image):
+        """Write a PNG atomically so other processes never read a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            Image.fromarray(image, 'RGBA').save(temp_path, format='PNG', compress_level=1)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: Failed to store overlay {path}: {str(e)}")
+            return
+        
+        self._evict(keep={path})
+    
+    def _touch(self, path):
+        """Mark a PNG as recently used for eviction; False if it isn't on disk"""
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+    
+    def _entries(self):
+        """List (mtime, size, path) for every stored PNG"""
+        entries = []
+        for prefix in os.listdir(self.cache_folder):
+            prefix_folder = os.path.join(self.cache_folder, prefix)
+            if not os.path.isdir(prefix_folder):
+                continue
+            
+            for name in os.listdir(prefix_folder):
+                if not name.endswith('.png'):
+                    continue
+                path = os.path.join(prefix_folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        return entries
+    
+    def _evict(self, keep=()):
+        """Delete least recently used PNGs until the store fits in max_bytes, at most once a minute"""
+        now = time.time()
+        if now - self._last_evict < 60:
+            return
+        self._last_evict = now
+        
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+        
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+    
+    def _load_font(self, font, font_size):
+        """Load a font by path or name, falling back to a common system font"""
+        cache_key = (font, font_size)
+        if cache_key in self._fonts:
+            return self._fonts[cache_key]
+        
+        candidates = []
+        if font:
+            candidates += [font, f"{font}.ttf"]
+        candidates += list(self.FALLBACK_FONTS)
+        
+        loaded = None
+        for candidate in candidates:
+            try:
+                loaded = ImageFont.truetype(candidate, font_size)
+                break
+            except OSError:
+                continue
+        
+        if loaded is None:
+            loaded = ImageFont.load_default(size=font_size)
+        
+        self._fonts[cache_key] = loaded
+        return loaded
+    
+    def _wrap(self, draw, text, font, max_width):
+        """Greedy word wrap to lines no wider than max_width"""
+        lines = []
+        for paragraph in text.split('\n'):
+            line = ''
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if line and draw.textlength(candidate, font=font) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+    
+    def _color(self, color):
+        if color is None:
+            return (0, 0, 0, 0)
+        if isinstance(color, str):
+            color = ImageColor.getrgb(color)
+        color = tuple(color)
+        return color if len(color) == 4 else color + (255,)
+    
+    def _rasterize(self, text, font, font_size, color, bg_color, width, align):
+        """Draw wrapped text on a width-wide canvas, like a caption-mode TextClip"""
+        pil_font = self._load_font(font, font_size)
+        measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        
+        lines = self._wrap(measure, text, pil_font, width - 2 * self.padding)
+        ascent, descent = pil_font.getmetrics()
+        line_height = int((ascent + descent) * self.line_spacing)
+        height = line_height * len(lines) + 2 * self.padding
+        
+        image = Image.new('RGBA', (width, height), self._color(bg_color))
+        draw = ImageDraw.Draw(image)
+        fill = self._color(color)
+        
+        y = self.padding
+        for line in lines:
+            line_width = draw.textlength(line, font=pil_font)
+            if align == 'left':
+                x = self.padding
+            elif align == 'right':
+                x = width - self.padding - line_width
+            else:
+                x = (width - line_width) / 2
+            draw.text((x, y), line, font=pil_font, fill=fill)
+            y += line_height
+        
+        return np.asarray(image)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries_in_memory': len(self._memory)
+            }
@@ -0,0 +1,128 @@
+import os
+import mmap
+import struct
+from array import array
+
+class PageSidecar:
+    """
+    Read-only view of a page sidecar file written next to an upload.
+    
+    The file holds the UTF-8 text of every page back to back, followed by an
+    offset table and a fixed-size trailer:
+        
+        page texts | byte offsets (pages + 1, uint64) | char lengths (pages, uint64) | magic | page count
+    
+    The file is memory-mapped, so the first pages, the total length or a single page
+    only reads the bytes it needs instead of the whole document.
+    """
+    MAGIC = b'BRPAGES1'
+    TRAILER = struct.Struct('<8sQ')
+    
+    def __init__(self, path):
+        self.path = path
+        
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.TRAILER.size:
+                raise ValueError(f"Truncated page sidecar: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, page_count = self.TRAILER.unpack_from(self._map, size - self.TRAILER.size)
+        if magic != self.MAGIC:
+            raise ValueError(f"Not a page sidecar: {path}")
+        
+        table_size = (2 * page_count + 1) * 8
+        table_start = size - self.TRAILER.size - table_size
+        table = array('Q')
+        table.frombytes(self._map[table_start:table_start + table_size])
+        
+        self.page_count = page_count
+        self.byte_offsets = table[:page_count + 1]
+        self.char_lengths = table[page_count + 1:]
+    
+    @classmethod
+    def open_if_fresh(cls, path, source_path):
+        """Open a sidecar only if it exists and is at least as new as the file it was built from"""
+        try:
+            if os.path.getmtime(path) < os.path.getmtime(source_path):
+                return None
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+    
+    def close(self):
+        self._map.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @property
+    def text_length(self):
+        """Total number of characters across all pages"""
+        return sum(self.char_lengths)
+    
+    def page_text(self, page_number):
+        """Return the text of one page (1-based)"""
+        if not 1 <= page_number <= self.page_count:
+            raise IndexError(f"Page {page_number} out of range 1-{self.page_count}")
+        
+        start = self.byte_offsets[page_number - 1]
+        end = self.byte_offsets[page_number]
+        return self._map[start:end].decode('utf-8')
+    
+    def iter_pages(self, start_page=1, end_page=None, max_pages=None):
+        """Yield pages in the same shape as PDFProcessor.iter_pages"""
+        first = max(start_page, 1)
+        last = self.page_count if end_page is None else min(end_page, self.page_count)
+        if max_pages is not None:
+            last = min(last, first + max_pages - 1)
+        
+        offset = 0
+        for page_number in range(first, last + 1):
+            yield {
+                'page_number': page_number,
+                'text': self.page_text(page_number),
+                'offset': offset
+            }
+            offset += self.char_lengths[page_number - 1]
+
+
+class PageSidecarWriter:
+    """
+    Streams pages into a new sidecar file.
+    
+    Pages are written to a temporary file as they are extracted and the file
+    only replaces the real sidecar on commit(), so an interrupted extraction
+    never leaves a partial sidecar behind.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.{os.getpid()}.{id(self)}.tmp"
+        self._file = open(self.temp_path, 'wb')
+        self._byte_offsets = array('Q', [0])
+        self._char_lengths = array('Q')
+    
+    def add_page(self, text):
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self._byte_offsets.append(self._byte_offsets[-1] + len(data))
+        self._char_lengths.append(len(text))
+    
+    def commit(self):
+        """Write the offset table and trailer, then move the sidecar into place"""
+        self._file.write(self._byte_offsets.tobytes())
+        self._file.write(self._char_lengths.tobytes())
+        self._file.write(PageSidecar.TRAILER.pack(PageSidecar.MAGIC, len(self._char_lengths)))
+        self._file.close()
+        os.replace(self.temp_path, self.path)
+    
+    def abort(self):
+        """Discard a partially written sidecar"""
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
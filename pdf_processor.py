@@ -1,133 +1,530 @@
 import os
 import PyPDF2
 import re
+import heapq
+import hashlib
+import zlib
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import word_tokenize
+from nltk.tokenize.punkt import PunktTokenizer
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from collections import Counter
+from functools import lru_cache
+from sentence_index import SentenceIndex
+from page_sidecar import PageSidecar, PageSidecarWriter
+
+
+# After lowercasing, the words left by stripping punctuation and digits are runs of non-digit word characters
+_FAST_WORD_RE = re.compile(r'[^\W\d]+')
+
+_LEMMATIZER = WordNetLemmatizer()
+
+
+@lru_cache(maxsize=100000)
+def _cached_lemmatize(word):
+    """Lemmatize a word, remembering results across calls and processor instances"""
+    return _LEMMATIZER.lemmatize(word)
+
+
+def _extract_page_range(file_path, first, last):
+    """Extract the text of pages first..last (1-based, inclusive) in a worker process"""
+    # Each worker opens the file on its own; PdfReader objects can't be shared across processes
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[page_number - 1].extract_text() or "" for page_number in range(first, last + 1)]
+
 
 class PDFProcessor:
-    def __init__(self, upload_folder='uploads'):
+    # Bump whenever extraction or analysis output changes so cached artifacts are invalidated
+    VERSION = '5'
+    
+    NLP_MODES = ('accurate', 'fast')
+    TOPIC_METHODS = ('frequency', 'tfidf')
+    
+    def __init__(self, upload_folder='uploads', parallel_page_threshold=64, max_workers=None, cache=None,
+                 nlp_mode='accurate', topic_method='frequency', topic_index=None):
         self.upload_folder = upload_folder
         
+        # 'frequency' ranks topics by raw counts; 'tfidf' scores them against the CorpusTopicIndex
+        if topic_method not in self.TOPIC_METHODS:
+            raise ValueError(f"Unknown topic method: {topic_method}")
+        if topic_method == 'tfidf' and topic_index is None:
+            raise ValueError("The tfidf topic method needs a topic_index")
+        self.topic_method = topic_method
+        self.topic_index = topic_index
+        
+        # 'accurate' uses NLTK word_tokenize and lemmatizes every token; 'fast' uses a regex
+        # tokenizer and a shared lemma cache
+        if nlp_mode not in self.NLP_MODES:
+            raise ValueError(f"Unknown NLP mode: {nlp_mode}")
+        self.nlp_mode = nlp_mode
+        
+        # Optional AnalysisCache shared with the other components
+        self.cache = cache
+        
+        # Documents with at least this many pages are extracted across a process pool
+        self.parallel_page_threshold = parallel_page_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        
         # Ensure NLTK resources are downloaded
         try:
             nltk.data.find('tokenizers/punkt')
+            nltk.data.find('tokenizers/punkt_tab')
             nltk.data.find('corpora/stopwords')
             nltk.data.find('corpora/wordnet')
         except LookupError:
             nltk.download('punkt')
+            nltk.download('punkt_tab')
             nltk.download('stopwords')
             nltk.download('wordnet')
         
         self.stop_words = set(stopwords.words('english'))
         self.lemmatizer = WordNetLemmatizer()
+        
+        # Punkt sentence tokenizer, used for its span_tokenize() offsets
+        self.sentence_tokenizer = PunktTokenizer('english')
     
-    def extract_text(self, filename):
-        """Extract text from a PDF file"""
+    def iter_pages(self, filename, start_page=1, end_page=None, max_pages=None, parallel=None, use_sidecar=True):
+        """
+        Yield the text of a PDF one page at a time.
+
+        Each item is a dict with the 1-based page_number, the page text and the
+        character offset of that page within the concatenated document text.
+        start_page/end_page select an inclusive page range and max_pages caps
+        the number of pages read. parallel forces process-pool extraction on or
+        off; by default it is used once the range reaches parallel_page_threshold.
+        use_sidecar=False always extracts from the PDF and leaves the sidecar alone.
+        """
         file_path = os.path.join(self.upload_folder, filename)
         
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
+        # Serve from the page sidecar when this upload has been extracted before
+        sidecar = PageSidecar.open_if_fresh(self.sidecar_path(filename), file_path) if use_sidecar else None
+        if sidecar is not None:
+            with sidecar:
+                yield from sidecar.iter_pages(start_page, end_page, max_pages)
+            return
+        
+        writer = None
         try:
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page_num in range(len(reader.pages)):
-                    text += reader.pages[page_num].extract_text()
+                page_count = len(reader.pages)
+                
+                # Clamp the requested range to the pages we actually have
+                first = max(start_page, 1)
+                last = page_count if end_page is None else min(end_page, page_count)
+                if max_pages is not None:
+                    last = min(last, first + max_pages - 1)
+                
+                # A complete pass over the document is written to the sidecar as it goes
+                if use_sidecar and first == 1 and last == page_count:
+                    try:
+                        writer = PageSidecarWriter(self.sidecar_path(filename))
+                    except OSError as e:
+                        # e.g. a read-only uploads folder; extract without a sidecar
+                        print(f"Warning: Failed to create page sidecar: {str(e)}")
+                
+                if parallel is None:
+                    parallel = last - first + 1 >= self.parallel_page_threshold
+                
+                if parallel and self.max_workers > 1 and last >= first:
+                    page_texts = self._iter_page_texts_parallel(file_path, first, last)
+                else:
+                    page_texts = (
+                        reader.pages[page_number - 1].extract_text() or ""
+                        for page_number in range(first, last + 1)
+                    )
+                
+                offset = 0
+                for page_number, page_text in zip(range(first, last + 1), page_texts):
+                    if writer is not None:
+                        writer.add_page(page_text)
+                    yield {
+                        'page_number': page_number,
+                        'text': page_text,
+                        'offset': offset
+                    }
+                    offset += len(page_text)
             
-            return text
+            if writer is not None:
+                writer.commit()
+                writer = None
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
+        finally:
+            # The caller stopped early or extraction failed, so drop the partial sidecar
+            if writer is not None:
+                writer.abort()
     
-    def preprocess_text(self, text):
-        """Preprocess text for analysis"""
+    def sidecar_path(self, filename):
+        """Path of the per-page text sidecar kept next to an upload"""
+        return os.path.join(self.upload_folder, f"{filename}.pages")
+    
+    def open_sidecar(self, filename):
+        """Return the upload's PageSidecar if it is up to date, otherwise None"""
+        return PageSidecar.open_if_fresh(
+            self.sidecar_path(filename), os.path.join(self.upload_folder, filename)
+        )
+    
+    def get_page_text(self, filename, page_number):
+        """Return the text of a single page, from the sidecar when there is one"""
+        if page_number < 1:
+            raise IndexError(f"Page {page_number} out of range")
+        
+        sidecar = self.open_sidecar(filename)
+        if sidecar is not None:
+            with sidecar:
+                return sidecar.page_text(page_number)
+        
+        for page in self.iter_pages(filename, start_page=page_number, max_pages=1):
+            return page['text']
+        
+        raise IndexError(f"Page {page_number} out of range")
+    
+    def get_text_summary(self, filename, preview_chars=500, preview_only=False):
+        """
+        Return a preview of the text plus its length and page count.
+        
+        The preview is cut at a sentence boundary found with a SentenceIndex
+        over the first pages; 'truncated' says whether text follows it. Uses
+        the sidecar when it exists. Otherwise the document is extracted
+        (writing the sidecar), unless preview_only is set, in which case
+        extraction stops as soon as the preview is filled and text_length is None.
+        """
+        sidecar = self.open_sidecar(filename)
+        if sidecar is None and not preview_only:
+            # A full pass writes the sidecar, which then answers the summary
+            for _ in self.iter_pages(filename):
+                pass
+            sidecar = self.open_sidecar(filename)
+        
+        if sidecar is not None:
+            with sidecar:
+                preview, truncated, _ = self._sentence_preview(
+                    (page['text'] for page in sidecar.iter_pages()), preview_chars
+                )
+                return {
+                    'preview': preview,
+                    'truncated': truncated,
+                    'text_length': sidecar.text_length,
+                    'pages': sidecar.page_count,
+                    'complete': True
+                }
+        
+        # Read only the first pages needed for the preview
+        pages = []
+        
+        def page_texts():
+            for page in self.iter_pages(filename, parallel=False):
+                pages.append(page)
+                yield page['text']
+        
+        preview, truncated, exhausted = self._sentence_preview(page_texts(), preview_chars)
+        
+        return {
+            'preview': preview,
+            'truncated': truncated,
+            # The whole (short) document was read when the pages ran out
+            'text_length': sum(len(page['text']) for page in pages) if exhausted else None,
+            'pages': len(pages),
+            'complete': exhausted
+        }
+    
+    def _sentence_preview(self, page_texts, preview_chars):
+        """
+        Return (preview, truncated, exhausted) for the text of page_texts.
+        
+        Pages are fed into a SentenceIndex only until a complete sentence ends
+        past preview_chars; the preview is then the whole sentences that fit,
+        or the first preview_chars characters if the first sentence doesn't.
+        Only sentence boundaries are needed, so the sentences' words aren't
+        tokenized.
+        """
+        sentence_index = self.new_sentence_boundary_index()
+        exhausted = True
+        for text in page_texts:
+            sentence_index.add_text(text)
+            if len(sentence_index) and sentence_index.ends[-1] >= preview_chars:
+                exhausted = False
+                break
+        sentence_index.finish()
+        
+        end = 0
+        for sentence_id in range(len(sentence_index)):
+            sentence_end = sentence_index.span(sentence_id)[1]
+            if sentence_end > preview_chars:
+                break
+            end = sentence_end
+        if not end:
+            end = min(preview_chars, sentence_index.text_length)
+        
+        truncated = not exhausted or sentence_index.slice(end, sentence_index.text_length).strip() != ""
+        return sentence_index.slice(0, end), truncated, exhausted
+    
+    def document_key(self, filename):
+        """Return the analysis cache key for an uploaded file, or None without a cache"""
+        if not self.cache:
+            return None
+        
+        return self.cache.document_key(os.path.join(self.upload_folder, filename))
+    
+    def _iter_page_texts_parallel(self, file_path, first, last):
+        """Extract a page range across a process pool, yielding page texts in page order"""
+        # Use several chunks per worker so one slow chunk doesn't leave the others idle
+        page_total = last - first + 1
+        chunk_size = max(1, -(-page_total // (self.max_workers * 4)))
+        starts = list(range(first, last + 1, chunk_size))
+        ends = [min(start + chunk_size - 1, last) for start in starts]
+        
+        executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(starts)))
+        try:
+            # map() returns chunks in submission order, so pages come back in order
+            for page_texts in executor.map(_extract_page_range, repeat(file_path), starts, ends):
+                yield from page_texts
+        finally:
+            # Don't keep extracting if the caller stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def extract_text(self, filename, start_page=1, end_page=None, max_pages=None, parallel=None, use_sidecar=True):
+        """Extract text from a PDF file"""
+        # Join once at the end instead of growing a string page by page
+        return "".join(
+            page['text']
+            for page in self.iter_pages(filename, start_page, end_page, max_pages, parallel, use_sidecar)
+        )
+    
+    def tokenize_sentence(self, sentence):
+        """Turn one sentence into its lowercased, stop-word-free, lemmatized words"""
+        if self.nlp_mode == 'fast':
+            return self._fast_tokenize_sentence(sentence)
+        
         # Convert to lowercase
-        text = text.lower()
+        sentence = sentence.lower()
         
         # Remove special characters and numbers
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\d+', ' ', text)
+        sentence = re.sub(r'[^\w\s]', ' ', sentence)
+        sentence = re.sub(r'\d+', ' ', sentence)
         
-        # Tokenize into sentences
-        sentences = sent_tokenize(text)
+        # Tokenize into words
+        words = word_tokenize(sentence)
+        
+        # Remove stop words and lemmatize
+        return [
+            self.lemmatizer.lemmatize(word) 
+            for word in words 
+            if word not in self.stop_words and len(word) > 2
+        ]
+    
+    def _fast_tokenize_sentence(self, sentence):
+        """Regex tokenization with cached lemmas; same words as the accurate path for cleaned text"""
+        return [
+            _cached_lemmatize(word)
+            for word in _FAST_WORD_RE.findall(sentence.lower())
+            if word not in self.stop_words and len(word) > 2
+        ]
+    
+    def new_sentence_index(self):
+        """Create an empty SentenceIndex that pages can be fed into one at a time"""
+        return SentenceIndex(self.sentence_tokenizer.span_tokenize, self.tokenize_sentence)
+    
+    def new_sentence_boundary_index(self):
+        """An empty SentenceIndex that only records sentence spans, for callers that never look at words"""
+        return SentenceIndex(self.sentence_tokenizer.span_tokenize, lambda sentence: [])
+    
+    def build_sentence_index(self, text):
+        """Segment and tokenize a complete text in a single pass"""
+        return SentenceIndex.from_text(text, self.sentence_tokenizer.span_tokenize, self.tokenize_sentence)
+    
+    def preprocess_text(self, text, sentence_index=None):
+        """Preprocess text for analysis"""
+        if sentence_index is None:
+            sentence_index = self.build_sentence_index(text)
         
-        # Process each sentence
         processed_sentences = []
-        for sentence in sentences:
-            # Tokenize into words
-            words = word_tokenize(sentence)
-            
-            # Remove stop words and lemmatize
-            filtered_words = [
-                self.lemmatizer.lemmatize(word) 
-                for word in words 
-                if word not in self.stop_words and len(word) > 2
-            ]
-            
+        for sentence_id in range(len(sentence_index)):
+            filtered_words = sentence_index.sentence_words(sentence_id)
             if filtered_words:
                 processed_sentences.append(' '.join(filtered_words))
         
         return processed_sentences
     
-    def identify_topics(self, text, num_topics=5):
-        """Identify main topics from the text"""
-        processed_sentences = self.preprocess_text(text)
+    def count_words(self, text, sentence_index=None):
+        """Count preprocessed word frequencies in a piece of text"""
+        if sentence_index is None:
+            sentence_index = self.build_sentence_index(text)
         
-        # Combine all processed sentences
-        all_words = ' '.join(processed_sentences).split()
+        return sentence_index.word_counts()
+    
+    def identify_topics(self, text, num_topics=5, word_freq=None, sentence_index=None, method=None):
+        """Identify main topics from the text"""
+        # Count word frequencies unless they were already accumulated by the caller
+        if word_freq is None:
+            word_freq = self.count_words(text, sentence_index)
         
-        # Count word frequencies
-        word_freq = Counter(all_words)
+        if (method or self.topic_method) == 'tfidf':
+            # Rank by how distinctive each word is for this document within the corpus
+            scores = self.topic_index.tfidf(word_freq)
+            topics = heapq.nlargest(num_topics, scores.items(), key=lambda x: x[1])
+            return [(word, round(score, 3)) for word, score in topics]
         
         # Get the most common words as topics
         topics = word_freq.most_common(num_topics)
         
         return topics
     
-    def extract_key_sentences(self, text, topics, sentences_per_topic=3):
-        """Extract key sentences related to each topic"""
-        sentences = sent_tokenize(text)
-        topic_words = [topic[0] for topic in topics]
+    def update_topic_index(self, word_freq):
+        """Count a newly analysed document into the corpus topic index"""
+        if self.topic_index is None:
+            return False
         
-        # Score sentences based on topic relevance
-        sentence_scores = []
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            score = sum(1 for topic in topic_words if topic in sentence_lower)
-            if score > 0:
-                sentence_scores.append((sentence, score))
+        # Identify documents by their word counts so re-analysing one doesn't count it twice
+        document_id = hashlib.sha1(
+            repr(sorted(word_freq.items())).encode('utf-8')
+        ).hexdigest()
         
-        # Sort sentences by score
-        sentence_scores.sort(key=lambda x: x[1], reverse=True)
+        return self.topic_index.add_document(document_id, word_freq.keys())
+    
+    def extract_key_sentences(self, text, topics, sentences_per_topic=3, sentence_index=None):
+        """
+        Extract key sentences related to each topic.
+        
+        Returns (start, end) offsets into the text rather than the sentences themselves.
+        """
+        if sentence_index is None:
+            sentence_index = self.build_sentence_index(text)
+        
+        # Topics are preprocessed words, so look them up by vocabulary id
+        topic_ids = {
+            sentence_index.vocabulary[topic[0]]
+            for topic in topics
+            if topic[0] in sentence_index.vocabulary
+        }
+        
+        # Score sentences by how many topics they contain, walking only the topics' postings
+        postings = sentence_index.postings()
+        sentence_scores = Counter()
+        for topic_id in topic_ids:
+            sentence_scores.update(postings[topic_id])
+        
+        # Keep the best sentences, earlier ones first on ties
+        top_sentences = heapq.nlargest(
+            sentences_per_topic * len(topics),
+            sentence_scores.items(),
+            key=lambda x: (x[1], -x[0])
+        )
+        
+        return [sentence_index.span(s[0]) for s in top_sentences]
+    
+    def chunk_document(self, filename, max_tokens=1500, sentence_index=None):
+        """
+        Split a document into sentence-aligned chunks of at most about max_tokens tokens.
+        
+        Chunk boundaries are content-defined: once a chunk has a quarter of the
+        budget it ends after any sentence whose hash hits a fixed pattern, and
+        the budget forces a cut otherwise. An edit therefore only changes the
+        chunks around it; the following boundaries fall on the same sentences
+        as before, so those chunks keep exactly the same text.
+        """
+        if sentence_index is None:
+            # Chunking only needs sentence spans and text, not the sentences' words
+            sentence_index = self.new_sentence_boundary_index()
+            for page in self.iter_pages(filename):
+                sentence_index.add_text(page['text'])
+            sentence_index.finish()
+        
+        min_tokens = max_tokens // 4
+        # Aim for chunks of about half the budget, assuming ~25 tokens per sentence
+        divisor = max(1, (max_tokens // 2 - min_tokens) // 25)
         
-        # Get top sentences
-        top_sentences = [s[0] for s in sentence_scores[:sentences_per_topic * len(topics)]]
+        chunks = []
+        first = None
+        tokens = 0
+        for sentence_id in range(len(sentence_index)):
+            start, end = sentence_index.span(sentence_id)
+            # Roughly four characters per token
+            sentence_tokens = (end - start) // 4 + 1
+            
+            if first is not None and tokens + sentence_tokens > max_tokens:
+                chunks.append(self._make_chunk(sentence_index, first, sentence_id - 1, tokens))
+                first = None
+            
+            if first is None:
+                first, tokens = sentence_id, 0
+            tokens += sentence_tokens
+            
+            text = sentence_index.slice(start, end)
+            if tokens >= min_tokens and zlib.crc32(text.strip().encode('utf-8')) % divisor == 0:
+                chunks.append(self._make_chunk(sentence_index, first, sentence_id, tokens))
+                first = None
         
-        return top_sentences
+        if first is not None:
+            chunks.append(self._make_chunk(sentence_index, first, len(sentence_index) - 1, tokens))
+        
+        return chunks
+    
+    def _make_chunk(self, sentence_index, first, last, tokens):
+        start = sentence_index.span(first)[0]
+        end = sentence_index.span(last)[1]
+        return {
+            'text': sentence_index.slice(start, end),
+            'start': start,
+            'end': end,
+            'tokens': tokens
+        }
     
-    def generate_content_structure(self, filename):
+    def generate_content_structure(self, filename, max_pages=None, num_topics=5, sentences_per_topic=3):
         """Generate a structured content outline from a PDF"""
         try:
-            # Extract text from PDF
-            text = self.extract_text(filename)
+            # Reuse an earlier analysis of the same document
+            cache_key = self.document_key(filename) if max_pages is None else None
+            artifact = f'content_structure-{self.nlp_mode}-{self.topic_method}-{num_topics}-{sentences_per_topic}'
+            if cache_key:
+                content_structure = self.cache.get(cache_key, artifact)
+                if content_structure is not None:
+                    content_structure['filename'] = filename
+                    return content_structure
+            
+            # Segment and tokenize the text page by page as it is extracted
+            sentence_index = self.new_sentence_index()
+            pages_processed = 0
+            for page in self.iter_pages(filename, max_pages=max_pages):
+                sentence_index.add_text(page['text'])
+                pages_processed += 1
+            sentence_index.finish()
+            
+            word_freq = sentence_index.word_counts()
+            
+            # Grow the corpus index with this document before scoring against it
+            if max_pages is None:
+                self.update_topic_index(word_freq)
             
             # Identify main topics
-            topics = self.identify_topics(text)
+            topics = self.identify_topics(None, num_topics=num_topics, word_freq=word_freq)
             
             # Extract key sentences for each topic
-            key_sentences = self.extract_key_sentences(text, topics)
+            key_sentence_spans = self.extract_key_sentences(
+                None, topics, sentences_per_topic=sentences_per_topic, sentence_index=sentence_index
+            )
             
             # Create content structure
             content_structure = {
                 'filename': filename,
                 'topics': [{'name': topic[0], 'weight': topic[1]} for topic in topics],
-                'key_sentences': key_sentences,
-                'total_text_length': len(text)
+                'key_sentences': [sentence_index.slice(start, end) for start, end in key_sentence_spans],
+                'key_sentence_offsets': [[start, end] for start, end in key_sentence_spans],
+                'total_text_length': sentence_index.text_length,
+                'pages_processed': pages_processed
             }
             
+            if cache_key:
+                self.cache.set(cache_key, artifact, content_structure)
+            
             return content_structure
         
         except Exception as e:
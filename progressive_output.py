@@ -0,0 +1,134 @@
+import os
+import re
+import math
+import time
+import shutil
+import threading
+from ffmpeg_tools import run_ffmpeg, remux_faststart
+
+class ProgressiveOutput:
+    """
+    HLS streams of videos that are still being rendered.
+    
+    A render in progress writes fMP4 segments and an event playlist into its
+    stream folder, either straight from the encoder or by appending finished
+    pieces (cached segments) as they become available, so the results page can
+    start playing a video a few seconds into its render. The playlist is closed
+    when the render finishes, and the download is a faststart MP4 remuxed
+    from the same encode.
+    
+    Streams live under <root>/streams/<stream id>/<position>/ and are pruned
+    once they are older than max_age.
+    """
+    PLAYLIST = 'index.m3u8'
+    
+    def __init__(self, root='static/videos', segment_seconds=2, max_age=24 * 3600):
+        self.streams_folder = os.path.join(root, 'streams')
+        self.segment_seconds = segment_seconds
+        self.max_age = max_age
+        
+        # Create streams directory if it doesn't exist
+        os.makedirs(self.streams_folder, exist_ok=True)
+    
+    def stream_folder(self, stream_id, position):
+        """Folder of the stream of the video at position in a plan rendered with stream_id"""
+        name = re.sub(r'[^A-Za-z0-9_-]', '_', str(stream_id)) or 'stream'
+        return os.path.join(self.streams_folder, name, str(int(position)))
+    
+    def playlist_path(self, folder):
+        return os.path.join(folder, self.PLAYLIST)
+    
+    def start(self, folder):
+        """Empty a stream folder for a new render"""
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder, exist_ok=True)
+    
+    def hls_args(self, folder, fps):
+        """
+        ffmpeg output options, up to the output file, that write the encode as this stream.
+        
+        A keyframe every segment_seconds lets the muxer cut segments that
+        short, so the first one is playable soon after the encode starts.
+        """
+        interval = max(1, round(fps * self.segment_seconds))
+        return [
+            '-g', str(interval), '-keyint_min', str(interval), '-sc_threshold', '0',
+            '-f', 'hls', '-hls_time', str(self.segment_seconds), '-hls_playlist_type', 'event',
+            '-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', os.path.join(folder, '%05d.m4s')
+        ]
+    
+    def _pieces(self, folder):
+        """Playlists of the pieces appended to a stream, in order"""
+        numbers = []
+        for name in os.listdir(folder):
+            match = re.fullmatch(r'piece-(\d+)\.m3u8', name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return [os.path.join(folder, f"piece-{number}.m3u8") for number in sorted(numbers)]
+    
+    def append(self, folder, path):
+        """Add a finished video file to the end of a stream built from pieces"""
+        number = len(self._pieces(folder))
+        run_ffmpeg([
+            '-y', '-i', path, '-map', '0', '-c', 'copy',
+            '-f', 'hls', '-hls_time', str(self.segment_seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', f"init-{number}.mp4",
+            '-hls_segment_filename', os.path.join(folder, f"{number}-%05d.m4s"),
+            os.path.join(folder, f"piece-{number}.m3u8")
+        ])
+        self._write_playlist(folder, finished=False)
+    
+    def finish(self, folder):
+        """Mark a stream built from pieces as complete; the encoder closes its own playlists"""
+        if os.path.isdir(folder) and self._pieces(folder):
+            self._write_playlist(folder, finished=True)
+    
+    def _write_playlist(self, folder, finished):
+        """Join the pieces' playlists into the stream's playlist"""
+        entries = []
+        durations = []
+        for number, piece in enumerate(self._pieces(folder)):
+            # Every piece has its own init segment and timestamps starting at zero
+            if number:
+                entries.append('#EXT-X-DISCONTINUITY')
+            entries.append(f'#EXT-X-MAP:URI="init-{number}.mp4"')
+            with open(piece, 'r') as f:
+                for line in f.read().splitlines():
+                    if line.startswith('#EXTINF:'):
+                        durations.append(float(line[len('#EXTINF:'):].rstrip(',')))
+                        entries.append(line)
+                    elif line and not line.startswith('#'):
+                        entries.append(line)
+        
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:7',
+            f"#EXT-X-TARGETDURATION:{math.ceil(max(durations + [self.segment_seconds]))}",
+            '#EXT-X-MEDIA-SEQUENCE:0',
+            '#EXT-X-PLAYLIST-TYPE:EVENT'
+        ] + entries
+        if finished:
+            lines.append('#EXT-X-ENDLIST')
+        
+        # Write to a temporary file first so players never load a partial playlist
+        path = self.playlist_path(folder)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+    
+    def remux(self, folder, output_path):
+        """Remux an encoder-written stream into a faststart MP4"""
+        return remux_faststart(self.playlist_path(folder), output_path)
+    
+    def prune(self):
+        """Delete streams older than max_age"""
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.streams_folder):
+            path = os.path.join(self.streams_folder, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
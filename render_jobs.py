@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class RenderJobQueue:
+    """
+    Durable queue of video render jobs backed by SQLite.
+    
+    Submitting a plan only inserts a row and returns a job id; a pool of worker
+    threads renders queued jobs in the background. Every video of a job has its
+    own row, so progress can be reported per video and a job that is picked up
+    again after a crash or restart only renders the videos that weren't done.
+    
+    Workers hold a lease on the job they are rendering and renew it with a
+    heartbeat. When a worker dies (pod restart, OOM kill) its lease runs out and
+    any worker, in this process or another replica sharing the database, takes
+    the job over. The database should live on a volume with working POSIX
+    locks; SQLite's default rollback journal is used since WAL mode needs
+    shared memory that network filesystems don't provide.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            filename TEXT,
+            plan TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created REAL NOT NULL,
+            updated REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            error TEXT,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+        CREATE TABLE IF NOT EXISTS job_videos (
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            video_id TEXT,
+            title TEXT,
+            status TEXT NOT NULL,
+            result TEXT,
+            PRIMARY KEY (job_id, position)
+        );
+    """
+    
+    def __init__(self, db_path='static/videos/.jobs/render_jobs.db', render_plan=None, workers=1, lease_seconds=60,
+                 max_attempts=3, poll_interval=5, retention_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.render_plan = render_plan
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        
+        # Create database directory if it doesn't exist
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        
+        with self._transaction() as connection:
+            connection.executescript(self.SCHEMA)
+        
+        self._owner_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+    
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+    
+    @contextmanager
+    def _transaction(self):
+        """Open a connection, commit on success and always close it"""
+        connection = self._connect()
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+    
+    def submit(self, video_plan):
+        """Queue a video plan for rendering and return the new job's id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, filename, plan, status, created, updated) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, video_plan.get('filename'), json.dumps(video_plan), now, now)
+            )
+            connection.executemany(
+                "INSERT INTO job_videos (job_id, position, video_id, title, status) VALUES (?, ?, ?, ?, 'queued')",
+                [
+                    (job_id, position, video.get('video_id'), video.get('title'))
+                    for position, video in enumerate(video_plan.get('videos', []))
+                ]
+            )
+        
+        self._wake.set()
+        return job_id
+    
+    def get(self, job_id):
+        """Return a job's status with per-video progress, or None for an unknown job"""
+        with self._transaction() as connection:
+            job = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            videos = connection.execute(
+                "SELECT * FROM job_videos WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        
+        video_states = []
+        for video in videos:
+            state = {
+                "position": video['position'],
+                "video_id": video['video_id'],
+                "title": video['title'],
+                "status": video['status']
+            }
+            if video['result']:
+                result = json.loads(video['result'])
+                state['video_path'] = result.get('video_path')
+                state['error'] = result.get('error')
+            video_states.append(state)
+        
+        return {
+            "job_id": job['id'],
+            "filename": job['filename'],
+            "status": job['status'],
+            "created": job['created'],
+            "updated": job['updated'],
+            "attempts": job['attempts'],
+            "error": job['error'],
+            "progress": {
+                "done": sum(1 for video in videos if video['status'] in ('done', 'failed')),
+                "total": len(videos)
+            },
+            "videos": video_states
+        }
+    
+    def result(self, job_id):
+        """Return the render result of a finished job, or None if it isn't done"""
+        with self._transaction() as connection:
+            row = connection.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        return json.loads(row['result']) if row and row['result'] else None
+    
+    def start(self):
+        """Start the worker threads"""
+        self.prune()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self._owner_prefix}-{number}",),
+                                      name=f"render-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def prune(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM job_videos WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated < ?)", (cutoff,)
+            )
+            connection.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (cutoff,))
+    
+    def _claim(self, owner):
+        """Lease the oldest queued job, or one whose worker stopped renewing its lease"""
+        now = time.time()
+        connection = self._connect()
+        try:
+            # Take the write lock up front so two workers can't claim the same job
+            connection.execute("BEGIN IMMEDIATE")
+            
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Render worker lost too many times', updated = ? "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            job = connection.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY created LIMIT 1", (now,)
+            ).fetchone()
+            
+            if job is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (owner, now + self.lease_seconds, now, job['id'])
+                )
+            
+            connection.execute("COMMIT")
+            return job
+        except Exception:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+        finally:
+            connection.close()
+    
+    def _work(self, owner):
+        while not self._stop.is_set():
+            try:
+                job = self._claim(owner)
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to claim a render job: {str(e)}")
+                job = None
+            
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            
+            try:
+                self._run(job, owner)
+            except Exception as e:
+                # Keep the worker alive; the job's lease runs out and it is picked up again
+                print(f"Warning: Render job {job['id']} failed: {str(e)}")
+    
+    def _heartbeat(self, job_id, owner, stopped):
+        """Keep extending the lease while the job renders"""
+        while not stopped.wait(self.lease_seconds / 3):
+            try:
+                with self._transaction() as connection:
+                    connection.execute(
+                        "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                        (time.time() + self.lease_seconds, job_id, owner)
+                    )
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to renew lease on render job {job_id}: {str(e)}")
+    
+    def _run(self, job, owner):
+        job_id = job['id']
+        video_plan = json.loads(job['plan'])
+        
+        # Videos finished by an earlier attempt are passed back in instead of being rendered again
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT position, result FROM job_videos WHERE job_id = ? AND status = 'done'", (job_id,)
+            ).fetchall()
+        completed = {row['position']: json.loads(row['result']) for row in rows}
+        
+        def on_result(position, result):
+            with self._transaction() as connection:
+                connection.execute(
+                    "UPDATE job_videos SET status = ?, result = ? WHERE job_id = ? AND position = ?",
+                    ('done' if result.get('success') else 'failed', json.dumps(result), job_id, position)
+                )
+                connection.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+        
+        stopped = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, owner, stopped), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.render_plan(video_plan, on_result=on_result, completed=completed)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finally:
+            stopped.set()
+            heartbeat.join()
+        
+        if result.get('success'):
+            status, error = 'done', None
+        elif job['attempts'] + 1 < self.max_attempts:
+            status, error = 'queued', result.get('error')
+        else:
+            status, error = 'failed', result.get('error', 'Unknown error')
+        
+        with self._transaction() as connection:
+            # Only record the outcome if nobody took the job over in the meantime
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, result = ?, lease_owner = NULL, lease_expires = NULL, "
+                "updated = ? WHERE id = ? AND lease_owner = ?",
+                (status, error, json.dumps(result) if status == 'done' else None, time.time(), job_id, owner)
+            )
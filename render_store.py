@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+class RenderStore:
+    """
+    Content-addressed storage for rendered videos.
+    
+    A video is stored under the hash of everything that went into rendering
+    it (text, segments, background, fonts, duration, backend and encoding
+    settings), so identical renders share one file and a render whose output
+    already exists doesn't need to run at all. Which videos belong to which
+    document is recorded in a JSON manifest keyed by the hash of the uploaded
+    file, so documents never overwrite each other's videos, even when they
+    were uploaded under the same name.
+    
+    The objects' total size is bounded with least-recently-used eviction based
+    on file modification times, which are refreshed on every hit. Objects that
+    a manifest points at are spared while unreferenced ones can go; if that is
+    not enough, the least recently used manifests (written or read longest
+    ago) are dropped too, and with them the protection of their videos.
+    """
+    # Bump when rendering changes so old outputs are not reused
+    VERSION = '1'
+    
+    def __init__(self, root='static/videos', max_bytes=10 * 1024 * 1024 * 1024):
+        self.objects_folder = os.path.join(root, 'objects')
+        self.manifests_folder = os.path.join(root, 'manifests')
+        self.max_bytes = max_bytes
+        
+        # Create storage directories if they don't exist
+        os.makedirs(self.objects_folder, exist_ok=True)
+        os.makedirs(self.manifests_folder, exist_ok=True)
+    
+    def key(self, inputs):
+        """Return the content key for a render's inputs"""
+        payload = json.dumps({'version': self.VERSION, 'inputs': inputs}, sort_keys=True, default=list)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def object_path(self, key, extension='mp4'):
+        """Where the render with this key is (or will be) stored"""
+        prefix_folder = os.path.join(self.objects_folder, key[:2])
+        os.makedirs(prefix_folder, exist_ok=True)
+        return os.path.join(prefix_folder, f"{key}.{extension}")
+    
+    def get(self, key, extension='mp4'):
+        """Return the path of an existing render, or None"""
+        path = self.object_path(key, extension)
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+    
+    def document_key(self, file_path):
+        """Return the manifest key of an uploaded document: the hash of its contents"""
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        return sha256.hexdigest()
+    
+    def _manifest_path(self, document_key):
+        return os.path.join(self.manifests_folder, f"{document_key}.json")
+    
+    def write_manifest(self, document_key, videos, filename=None):
+        """Record the videos rendered for a document, replacing its previous manifest"""
+        path = self._manifest_path(document_key)
+        manifest = {
+            "document": document_key,
+            "filename": filename,
+            "updated": time.time(),
+            "videos": videos
+        }
+        
+        # Write to a temporary file first so readers never see a partial manifest
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, path)
+    
+    def read_manifest(self, document_key):
+        """Return a document's manifest, or None if nothing was rendered for it"""
+        path = self._manifest_path(document_key)
+        try:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return manifest
+    
+    def record_render(self, document_path, video_plan, result):
+        """
+        Point the manifest of the document at document_path at the stored videos of a render, then evict.
+        
+        Nothing is recorded when the document is no longer there to be hashed.
+        """
+        videos = []
+        for video_spec, video in zip(video_plan.get('videos', []), result.get('videos', [])):
+            if video and video.get('success'):
+                videos.append({
+                    "video_id": video_spec.get('video_id'),
+                    "title": video_spec.get('title'),
+                    "video_path": video.get('video_path'),
+                    "render_key": video.get('render_key')
+                })
+        
+        if os.path.isfile(document_path):
+            self.write_manifest(self.document_key(document_path), videos,
+                                filename=video_plan.get('filename', os.path.basename(document_path)))
+        self.evict()
+    
+    def _manifests(self):
+        """List (mtime, path, absolute paths of its videos) for every manifest"""
+        manifests = []
+        for name in os.listdir(self.manifests_folder):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.manifests_folder, name)
+            try:
+                mtime = os.path.getmtime(path)
+                with open(path, 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            
+            video_paths = {
+                os.path.abspath(video['video_path'])
+                for video in manifest.get('videos', []) if video.get('video_path')
+            }
+            manifests.append((mtime, path, video_paths))
+        
+        return manifests
+    
+    def _entries(self):
+        """List (mtime, size, path) for every stored object"""
+        entries = []
+        for prefix in os.listdir(self.objects_folder):
+            prefix_folder = os.path.join(self.objects_folder, prefix)
+            if not os.path.isdir(prefix_folder):
+                continue
+            
+            for name in os.listdir(prefix_folder):
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(prefix_folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        return entries
+    
+    def _remove_unreferenced(self, entries, total_bytes, keep, references):
+        """Delete objects in entries (oldest first) that nothing refers to until total_bytes fits"""
+        remaining = []
+        for entry in entries:
+            _, size, path = entry
+            absolute_path = os.path.abspath(path)
+            if total_bytes <= self.max_bytes or absolute_path in keep or references.get(absolute_path):
+                remaining.append(entry)
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                remaining.append(entry)
+                continue
+            total_bytes -= size
+        
+        return remaining, total_bytes
+    
+    def evict(self, keep=()):
+        """
+        Delete least recently used objects until the store fits in max_bytes, sparing those in keep.
+        
+        Objects a manifest points at are only deleted once their manifests
+        have been dropped, least recently used manifest first.
+        """
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+        
+        keep = {os.path.abspath(path) for path in keep}
+        
+        # How many manifests point at each object
+        manifests = sorted(self._manifests())
+        references = {}
+        for _, _, video_paths in manifests:
+            for video_path in video_paths:
+                references[video_path] = references.get(video_path, 0) + 1
+        
+        # Oldest first
+        entries.sort()
+        entries, total_bytes = self._remove_unreferenced(entries, total_bytes, keep, references)
+        
+        # Still too big: drop the least recently used manifests until their videos can go
+        for _, manifest_path, video_paths in manifests:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(manifest_path)
+            except OSError:
+                continue
+            for video_path in video_paths:
+                references[video_path] -= 1
+            entries, total_bytes = self._remove_unreferenced(entries, total_bytes, keep, references)
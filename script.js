@@ -26,7 +26,10 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Results page functionality
     const resultsPage = document.querySelector('.results-section');
-    if (resultsPage) {
+    if (resultsPage && resultsPage.dataset.jobId) {
+        // Show the render job's videos, playing their streams while they render
+        watchRenderJob(resultsPage.dataset.jobId, resultsPage.dataset.streamId);
+    } else if (resultsPage) {
         // Simulate video loading for demo purposes
         setTimeout(() => {
             const noVideos = document.querySelector('.no-videos');
@@ -40,7 +43,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
             }
         }, 3000);
-        
+    }
+    
+    if (resultsPage) {
         // Download all videos button
         const downloadBtn = document.getElementById('download-all');
         if (downloadBtn) {
@@ -151,28 +156,128 @@ function createSampleVideos(container) {
     ];
     
     sampleVideos.forEach((video, index) => {
-        const videoCard = document.createElement('div');
-        videoCard.className = 'video-card';
-        videoCard.style.animationDelay = `${0.1 * (index + 1)}s`;
-        
-        const tagsHTML = video.tags.map(tag => `<span class="tag">${tag}</span>`).join('');
-        
-        videoCard.innerHTML = `
-            <div class="video-container">
-                <video controls poster="/static/img/video-placeholder.jpg">
-                    <source src="#" type="video/mp4">
-                    Your browser does not support the video tag.
-                </video>
-            </div>
-            <div class="video-info">
-                <h3>${video.title}</h3>
-                <p class="video-description">${video.description}</p>
-                <div class="video-tags">
-                    ${tagsHTML}
-                </div>
-            </div>
-        `;
+        container.appendChild(createVideoCard(video, index));
+    });
+}
+
+// Create a card with a player for one video
+function createVideoCard(video, index) {
+    const videoCard = document.createElement('div');
+    videoCard.className = 'video-card';
+    videoCard.style.animationDelay = `${0.1 * (index + 1)}s`;
+    
+    // Only static markup goes through innerHTML; titles, descriptions and tags come from the API
+    videoCard.innerHTML = `
+        <div class="video-container">
+            <video controls poster="/static/img/video-placeholder.jpg">
+                <source src="#" type="video/mp4">
+                Your browser does not support the video tag.
+            </video>
+        </div>
+        <div class="video-info">
+            <h3></h3>
+            <p class="video-description"></p>
+            <div class="video-tags"></div>
+        </div>
+    `;
+    
+    videoCard.querySelector('h3').textContent = video.title || '';
+    videoCard.querySelector('.video-description').textContent = video.description || '';
+    
+    const tags = videoCard.querySelector('.video-tags');
+    (video.tags || []).forEach(tag => {
+        const tagElement = document.createElement('span');
+        tagElement.className = 'tag';
+        tagElement.textContent = tag;
+        tags.appendChild(tagElement);
+    });
+    
+    return videoCard;
+}
+
+// Poll a render job and show each video as soon as it can be played
+function watchRenderJob(jobId, streamId) {
+    const videoGrid = document.querySelector('.video-grid');
+    const noVideos = document.querySelector('.no-videos');
+    const cards = [];
+    
+    function poll() {
+        fetch(`/api/jobs/${jobId}`)
+            .then(response => response.json())
+            .then(job => {
+                (job.videos || []).forEach(video => {
+                    if (!cards[video.position]) {
+                        cards[video.position] = createVideoCard({ title: video.title, description: '', tags: [] }, video.position);
+                        videoGrid.appendChild(cards[video.position]);
+                    }
+                    
+                    const player = cards[video.position].querySelector('video');
+                    if (video.status === 'done' && video.video_path) {
+                        // The finished file is a faststart MP4, playable while it downloads
+                        playFile(player, '/' + video.video_path.replace(/^\/+/, ''));
+                    } else if (streamId) {
+                        playStream(player, `/api/streams/${streamId}/${video.position}/index.m3u8`);
+                    }
+                });
+                
+                if (noVideos && cards.length) {
+                    noVideos.style.display = 'none';
+                }
+                
+                if (job.status !== 'done' && job.status !== 'failed') {
+                    setTimeout(poll, 2000);
+                }
+            })
+            .catch(() => setTimeout(poll, 5000));
+    }
+    
+    poll();
+}
+
+// Play a render's HLS stream once its first segments are written
+function playStream(player, url) {
+    if (player.dataset.source) {
+        return;
+    }
+    
+    fetch(url, { method: 'HEAD' }).then(response => {
+        if (!response.ok || player.dataset.source) {
+            return;
+        }
         
-        container.appendChild(videoCard);
+        if (player.canPlayType('application/vnd.apple.mpegurl')) {
+            player.src = url;
+        } else if (window.Hls && Hls.isSupported()) {
+            player.hls = new Hls();
+            player.hls.loadSource(url);
+            player.hls.attachMedia(player);
+        } else {
+            // Without HLS support the video appears when its file is ready
+            return;
+        }
+        player.dataset.source = 'stream';
     });
 }
+
+// Switch a player to the finished file, keeping the position of a stream being watched
+function playFile(player, url) {
+    if (player.dataset.source === 'file') {
+        return;
+    }
+    
+    const position = player.currentTime;
+    const playing = !player.paused;
+    if (player.hls) {
+        player.hls.destroy();
+        player.hls = null;
+    }
+    
+    player.dataset.source = 'file';
+    player.src = url;
+    player.addEventListener('loadedmetadata', () => {
+        player.currentTime = position;
+        if (playing) {
+            player.play();
+        }
+    }, { once: true });
+}
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import threading
+
+class SegmentCache:
+    """
+    On-disk cache of encoded video segments.
+    
+    A segment is keyed by a hash of every input that affects its pixels and
+    samples (overlay text and fonts, background file and offset, duration) and
+    of the encoding parameters, so segments with the same key can be joined by
+    stream copy. The total size is bounded with least-recently-used eviction
+    based on file modification times, which are refreshed on every hit.
+    """
+    # Bump when segment rendering changes so old segments are not reused
+    VERSION = '1'
+    
+    def __init__(self, cache_folder='static/videos/.segments', max_bytes=2 * 1024 * 1024 * 1024):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        
+        # Create cache directory if it doesn't exist
+        os.makedirs(cache_folder, exist_ok=True)
+        
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def key(self, inputs):
+        """Return the cache key for a segment's render inputs"""
+        payload = json.dumps({'version': self.VERSION, 'inputs': inputs}, sort_keys=True, default=list)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def path(self, key):
+        """Where the segment with this key is (or will be) stored"""
+        prefix_folder = os.path.join(self.cache_folder, key[:2])
+        os.makedirs(prefix_folder, exist_ok=True)
+        return os.path.join(prefix_folder, f"{key}.mp4")
+    
+    def get(self, key):
+        """Return the path of a cached segment, or None if it isn't cached"""
+        path = self.path(key)
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return path
+    
+    def _entries(self):
+        """List (mtime, size, path) for every segment"""
+        entries = []
+        for prefix in os.listdir(self.cache_folder):
+            prefix_folder = os.path.join(self.cache_folder, prefix)
+            if not os.path.isdir(prefix_folder):
+                continue
+            
+            for name in os.listdir(prefix_folder):
+                if not name.endswith('.mp4'):
+                    continue
+                path = os.path.join(prefix_folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        return entries
+    
+    def evict(self, keep=()):
+        """Delete least recently used segments until the cache fits in max_bytes, sparing those in keep"""
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+        
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+    
+    def stats(self):
+        """Return hit/miss counters for this process and the size of the shared cache"""
+        entries = self._entries()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        
+        return {
+            'hits': hits,
+            'misses': misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
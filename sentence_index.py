@@ -0,0 +1,150 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+
+class SentenceIndex:
+    """
+    Compact index of the sentences in a document.
+    
+    Sentences are stored as start/end character offsets into the original text,
+    and their preprocessed words as ids into a shared vocabulary, all in flat
+    arrays. Text is only sliced out when a sentence is actually needed, e.g.
+    when key sentences are serialised for the API.
+    
+    The index is built in a single pass by feeding text in pieces (typically one
+    PDF page at a time) with add_text() and calling finish() at the end.
+    """
+    def __init__(self, span_tokenize, tokenize_sentence):
+        # span_tokenize(text) -> iterable of (start, end); tokenize_sentence(sentence) -> list of words
+        self._span_tokenize = span_tokenize
+        self._tokenize_sentence = tokenize_sentence
+        
+        # Sentence boundaries as absolute offsets into the document text
+        self.starts = array('q')
+        self.ends = array('q')
+        
+        # Word ids for all sentences, with token_offsets[i]:token_offsets[i + 1] belonging to sentence i
+        self.token_ids = array('l')
+        self.token_offsets = array('q', [0])
+        
+        # Shared vocabulary so each distinct word is stored once
+        self.vocabulary = {}
+        self.words = []
+        
+        # The original text pieces and where each starts in the document
+        self._parts = []
+        self._part_offsets = array('q')
+        self.text_length = 0
+        
+        # Trailing text whose last sentence may continue in the next piece
+        self._pending = ""
+        self._pending_offset = 0
+        
+        # Inverted index from word id to sentence ids, built on first use
+        self._postings = None
+    
+    @classmethod
+    def from_text(cls, text, span_tokenize, tokenize_sentence):
+        """Build an index over a complete text"""
+        index = cls(span_tokenize, tokenize_sentence)
+        index.add_text(text)
+        index.finish()
+        return index
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def add_text(self, text):
+        """Append the next piece of the document and index every sentence that is known to be complete"""
+        if not text:
+            return
+        
+        self._parts.append(text)
+        self._part_offsets.append(self.text_length)
+        self.text_length += len(text)
+        
+        buffer = self._pending + text
+        spans = list(self._span_tokenize(buffer))
+        
+        if not spans:
+            self._pending = buffer
+            return
+        
+        # The last sentence may run on into the next piece, so hold it back
+        for start, end in spans[:-1]:
+            self._add_sentence(buffer, start, end, self._pending_offset)
+        
+        last_start = spans[-1][0]
+        self._pending = buffer[last_start:]
+        self._pending_offset += last_start
+    
+    def finish(self):
+        """Index whatever text is still pending"""
+        if self._pending:
+            for start, end in self._span_tokenize(self._pending):
+                self._add_sentence(self._pending, start, end, self._pending_offset)
+        
+        self._pending = ""
+        self._pending_offset = self.text_length
+        return self
+    
+    def _add_sentence(self, buffer, start, end, base_offset):
+        self._postings = None
+        self.starts.append(base_offset + start)
+        self.ends.append(base_offset + end)
+        
+        for word in self._tokenize_sentence(buffer[start:end]):
+            word_id = self.vocabulary.get(word)
+            if word_id is None:
+                word_id = len(self.words)
+                self.vocabulary[word] = word_id
+                self.words.append(word)
+            self.token_ids.append(word_id)
+        
+        self.token_offsets.append(len(self.token_ids))
+    
+    def span(self, sentence_id):
+        """Return the (start, end) offsets of a sentence"""
+        return self.starts[sentence_id], self.ends[sentence_id]
+    
+    def sentence_word_ids(self, sentence_id):
+        """Return the word ids of a sentence"""
+        return self.token_ids[self.token_offsets[sentence_id]:self.token_offsets[sentence_id + 1]]
+    
+    def sentence_words(self, sentence_id):
+        """Return the preprocessed words of a sentence"""
+        return [self.words[word_id] for word_id in self.sentence_word_ids(sentence_id)]
+    
+    def postings(self):
+        """Return the inverted index mapping each word id to the ids of the sentences containing it"""
+        if self._postings is None:
+            postings = {}
+            for sentence_id in range(len(self)):
+                for word_id in set(self.sentence_word_ids(sentence_id)):
+                    sentence_ids = postings.get(word_id)
+                    if sentence_ids is None:
+                        sentence_ids = postings[word_id] = array('l')
+                    sentence_ids.append(sentence_id)
+            self._postings = postings
+        
+        return self._postings
+    
+    def word_counts(self):
+        """Count how often each preprocessed word occurs in the document"""
+        id_counts = Counter(self.token_ids)
+        return Counter({self.words[word_id]: count for word_id, count in id_counts.items()})
+    
+    def slice(self, start, end):
+        """Return the original text between two document offsets"""
+        # Find the piece containing start and join only the pieces the span touches
+        part = max(bisect_right(self._part_offsets, start) - 1, 0)
+        pieces = []
+        while part < len(self._parts) and self._part_offsets[part] < end:
+            part_start = self._part_offsets[part]
+            pieces.append(self._parts[part][max(start - part_start, 0):end - part_start])
+            part += 1
+        return "".join(pieces)
+    
+    def sentence_text(self, sentence_id):
+        """Return the original text of a sentence"""
+        return self.slice(*self.span(sentence_id))
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import threading
+
+class _Call:
+    """One in-flight computation that other threads can wait on"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work into a single computation.
+    
+    Within a process, callers with the same key wait on the first caller's
+    result. Across processes and replicas, the first caller holds an exclusive
+    file lock in a shared folder while it computes and leaves the (JSON) result
+    next to the lock; callers from other processes block on that lock and then
+    pick up the result instead of recomputing it.
+    
+    flock() on the shared volume needs a filesystem that supports it (local
+    disks and NFSv4 do).
+    """
+    def __init__(self, lock_folder='static/videos/.locks', result_ttl=600):
+        self.lock_folder = lock_folder
+        self.result_ttl = result_ttl
+        
+        # Create lock directory if it doesn't exist
+        os.makedirs(lock_folder, exist_ok=True)
+        
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0
+    
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key and return its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = self._do_across_processes(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+    
+    def _do_across_processes(self, key, fn):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.lock_folder, f"{digest}.lock")
+        result_path = os.path.join(self.lock_folder, f"{digest}.json")
+        started = time.time()
+        
+        waited = False
+        while True:
+            lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already computing this; wait for it to finish
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                waited = True
+            
+            # _prune may have removed the lock file while we waited for it; lock the current one instead
+            if self._is_current(lock_file, lock_path):
+                break
+            lock_file.close()
+        
+        with lock_file:
+            try:
+                if waited:
+                    result = self._read_result(result_path, started)
+                    if result is not None:
+                        return result
+                
+                result = fn()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _is_current(self, lock_file, lock_path):
+        """Whether an open lock file is still the one at lock_path"""
+        try:
+            return os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino
+        except OSError:
+            return False
+    
+    def _read_result(self, result_path, since):
+        """Return the result another process wrote while we were waiting, if any"""
+        try:
+            if os.path.getmtime(result_path) < since:
+                return None
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_result(self, result_path, result):
+        """Leave the result for processes waiting on the lock"""
+        temp_path = f"{result_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(temp_path, result_path)
+        except (TypeError, ValueError):
+            # Not JSON-serialisable; waiters in other processes will recompute
+            os.remove(temp_path)
+        
+        self._prune()
+    
+    def _prune(self):
+        """Remove stale result and lock files, at most once a minute"""
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        
+        for name in os.listdir(self.lock_folder):
+            path = os.path.join(self.lock_folder, name)
+            try:
+                if now - os.path.getmtime(path) <= self.result_ttl:
+                    continue
+                if name.endswith('.lock'):
+                    self._remove_lock(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def _remove_lock(self, lock_path):
+        """Remove a lock file unless some process holds it"""
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            # Waiters that opened the file before it was removed notice and lock the new one
+            os.remove(lock_path)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from ai_integrator import AIIntegrator
+from completion_cache import CompletionCache
+from benchmarks.mock_ai_server import MockAIServer, describe_concept
+
+
+class CompletionCacheValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        
+        # The first reply is cut off mid-object, every later one is well-formed
+        self.replies = ['{"name": "Photosynthesis", "explanation": ']
+        self.server = MockAIServer(latency=0, reply=self.reply).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        
+        # _describe_concept never touches the PDF processor, so a stub keeps NLTK data out of the test
+        self.integrator = AIIntegrator(
+            upload_folder=self.folder.name,
+            pdf_processor=object(),
+            api_url=self.server.url,
+            completion_cache=CompletionCache(cache_folder=os.path.join(self.folder.name, 'ai_cache')),
+            max_retries=0
+        )
+    
+    def reply(self, prompt):
+        return self.replies.pop(0) if self.replies else describe_concept('Photosynthesis')
+    
+    def test_malformed_reply_is_not_cached(self):
+        content_structure = {'key_sentences': ['Plants turn light into sugar.']}
+        
+        with self.assertRaises(ValueError):
+            self.integrator._describe_concept('Photosynthesis', 'Biology', content_structure)
+        
+        # The same request is sent again rather than answered with the malformed reply
+        concept = self.integrator._describe_concept('Photosynthesis', 'Biology', content_structure)
+        self.assertEqual(concept['name'], 'Photosynthesis')
+        self.assertTrue(concept['explanation'])
+        self.assertEqual(self.server.requests, 2)
+        
+        # Now that a reply parsed, it is served from the cache
+        self.integrator._describe_concept('Photosynthesis', 'Biology', content_structure)
+        self.assertEqual(self.server.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import time
+import tempfile
+import unittest
+
+from completion_cache import CompletionCache
+
+
+class CompletionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = CompletionCache(cache_folder=self.folder.name)
+    
+    def age(self, key, seconds):
+        path = self.cache._entry_path(key)
+        past = time.time() - seconds
+        os.utime(path, (past, past))
+    
+    def test_key_depends_on_every_request_field(self):
+        messages = [{'role': 'user', 'content': 'Explain photosynthesis'}]
+        key = self.cache.key('gpt-4', messages, {'temperature': 0})
+        
+        self.assertEqual(key, self.cache.key('gpt-4', [dict(messages[0])], {'temperature': 0}))
+        self.assertNotEqual(key, self.cache.key('gpt-3.5-turbo', messages, {'temperature': 0}))
+        self.assertNotEqual(key, self.cache.key('gpt-4', messages, {'temperature': 1}))
+        self.assertNotEqual(key, self.cache.key('gpt-4', [{'role': 'user', 'content': 'Explain osmosis'}]))
+    
+    def test_hit_and_miss(self):
+        key = self.cache.key('gpt-4', [{'role': 'user', 'content': 'hello'}])
+        self.assertIsNone(self.cache.get(key))
+        
+        self.cache.set(key, {'content': 'hi'})
+        self.assertEqual(self.cache.get(key), {'content': 'hi'})
+        
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+    
+    def test_expired_entry_is_a_miss(self):
+        cache = CompletionCache(cache_folder=self.folder.name, ttl=-1)
+        key = cache.key('gpt-4', [])
+        cache.set(key, 'stale')
+        
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(cache._entry_path(key)))
+    
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key('gpt-4', [{'role': 'user', 'content': str(i)}]) for i in range(3)]
+        for age, key in zip((30, 20, 10), keys):
+            self.cache.set(key, 'x' * 100)
+            self.age(key, age)
+        
+        # Reading the oldest entry makes the middle one the least recently used
+        self.cache.get(keys[0])
+        self.cache.max_bytes = sum(os.path.getsize(self.cache._entry_path(key)) for key in (keys[0], keys[2]))
+        self.cache.evict()
+        
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
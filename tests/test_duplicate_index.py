@@ -0,0 +1,61 @@
+import random
+import tempfile
+import unittest
+
+from duplicate_index import NearDuplicateIndex
+
+
+def make_text(words=400, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+class NearDuplicateIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.index = NearDuplicateIndex(index_folder=self.folder.name)
+    
+    def test_finds_near_duplicate(self):
+        text = make_text()
+        self.index.add('doc-a', text=text)
+        self.index.add('doc-b', text=make_text(seed=1))
+        
+        # Changing one word in 400 keeps the documents near-identical
+        edited = text.split()
+        edited[200] = 'changed'
+        match = self.index.query(text=' '.join(edited))
+        self.assertEqual(match[0], 'doc-a')
+        self.assertGreater(match[1], 0.8)
+    
+    def test_unrelated_text_does_not_match(self):
+        self.index.add('doc-a', text=make_text())
+        self.assertIsNone(self.index.query(text=make_text(seed=1)))
+    
+    def test_excluded_document_does_not_match(self):
+        text = make_text()
+        self.index.add('doc-a', text=text)
+        self.assertIsNone(self.index.query(text=text, exclude='doc-a'))
+    
+    def test_empty_text_is_neither_indexed_nor_matched(self):
+        self.assertIsNone(self.index.signature(''))
+        self.assertFalse(self.index.add('doc-a', text=''))
+        self.assertEqual(len(self.index), 0)
+        self.assertIsNone(self.index.query(text=''))
+        
+        # Nor does a short text match another one once something is indexed
+        self.index.add('doc-b', text=make_text())
+        self.assertFalse(self.index.add('doc-c', text='Figure 1'))
+        self.assertIsNone(self.index.query(text='Figure 1'))
+    
+    def test_index_is_shared_through_the_folder(self):
+        text = make_text()
+        self.index.add('doc-a', text=text)
+        
+        reopened = NearDuplicateIndex(index_folder=self.folder.name)
+        self.assertEqual(reopened.query(text=text), ('doc-a', 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import time
+import tempfile
+import unittest
+
+from render_store import RenderStore
+
+
+class RenderStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.store = RenderStore(root=self.folder.name, max_bytes=250)
+    
+    def set_age(self, path, age):
+        past = time.time() - age
+        os.utime(path, (past, past))
+    
+    def add_object(self, name, age):
+        path = self.store.object_path(self.store.key({'slide': name}))
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 100)
+        self.set_age(path, age)
+        return path
+    
+    def add_manifest(self, document_key, video_path, age):
+        self.store.write_manifest(document_key, [{'video_id': document_key, 'video_path': video_path}])
+        self.set_age(self.store._manifest_path(document_key), age)
+    
+    def upload(self, name, contents):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+    
+    def test_unreferenced_objects_go_first(self):
+        referenced = self.add_object('referenced', 30)
+        unreferenced = self.add_object('unreferenced', 20)
+        newest = self.add_object('newest', 10)
+        self.add_manifest('document', referenced, 0)
+        
+        self.store.evict()
+        
+        self.assertTrue(os.path.exists(referenced))
+        self.assertFalse(os.path.exists(unreferenced))
+        self.assertTrue(os.path.exists(newest))
+    
+    def test_least_recently_used_manifest_is_dropped(self):
+        first = self.add_object('first', 30)
+        second = self.add_object('second', 20)
+        third = self.add_object('third', 10)
+        self.add_manifest('old-document', first, 100)
+        self.add_manifest('recent-document', second, 50)
+        self.add_manifest('newest-document', third, 0)
+        
+        # Reading a manifest makes it recently used
+        self.store.read_manifest('old-document')
+        self.store.evict()
+        
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+        self.assertIsNone(self.store.read_manifest('recent-document'))
+        self.assertIsNotNone(self.store.read_manifest('old-document'))
+    
+    def test_same_name_uploads_keep_separate_manifests(self):
+        video_plan = {'filename': 'notes.pdf', 'videos': [{'video_id': 'v1', 'title': 'Intro'}]}
+        video = self.add_object('intro', 0)
+        result = {'videos': [{'success': True, 'video_path': video, 'render_key': 'k'}]}
+        
+        first_key = self.store.document_key(self.upload('notes.pdf', 'first upload'))
+        self.store.record_render(os.path.join(self.folder.name, 'notes.pdf'), video_plan, result)
+        second_key = self.store.document_key(self.upload('notes.pdf', 'second upload'))
+        self.store.record_render(os.path.join(self.folder.name, 'notes.pdf'), video_plan, result)
+        
+        self.assertNotEqual(first_key, second_key)
+        for document_key in (first_key, second_key):
+            manifest = self.store.read_manifest(document_key)
+            self.assertEqual(manifest['filename'], 'notes.pdf')
+            self.assertEqual(manifest['videos'][0]['video_path'], video)
+    
+    def test_failed_videos_are_not_recorded(self):
+        document_path = self.upload('notes.pdf', 'contents')
+        video_plan = {'filename': 'notes.pdf', 'videos': [{'video_id': 'v1'}, {'video_id': 'v2'}]}
+        result = {'videos': [{'success': False, 'error': 'boom'}, {'success': True, 'video_path': 'v2.mp4'}]}
+        
+        self.store.record_render(document_path, video_plan, result)
+        
+        manifest = self.store.read_manifest(self.store.document_key(document_path))
+        self.assertEqual([video['video_id'] for video in manifest['videos']], ['v2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
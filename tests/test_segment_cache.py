@@ -0,0 +1,64 @@
+import os
+import time
+import tempfile
+import unittest
+
+from segment_cache import SegmentCache
+
+
+class SegmentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = SegmentCache(cache_folder=self.folder.name, max_bytes=250)
+    
+    def store(self, name, age):
+        key = self.cache.key({'text': name})
+        path = self.cache.path(key)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 100)
+        past = time.time() - age
+        os.utime(path, (past, past))
+        return key, path
+    
+    def test_key_depends_on_inputs(self):
+        self.assertEqual(self.cache.key({'text': 'a', 'duration': 5}), self.cache.key({'duration': 5, 'text': 'a'}))
+        self.assertNotEqual(self.cache.key({'text': 'a', 'duration': 5}), self.cache.key({'text': 'a', 'duration': 6}))
+    
+    def test_get_counts_hits_and_misses(self):
+        key = self.cache.key({'text': 'missing'})
+        self.assertIsNone(self.cache.get(key))
+        
+        key, path = self.store('present', 0)
+        self.assertEqual(self.cache.get(key), path)
+        
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+    
+    def test_evicts_least_recently_used(self):
+        oldest_key, oldest = self.store('oldest', 30)
+        _, middle = self.store('middle', 20)
+        _, newest = self.store('newest', 10)
+        
+        # A hit refreshes the oldest segment, so the middle one goes
+        self.cache.get(oldest_key)
+        self.cache.evict()
+        
+        self.assertTrue(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(middle))
+        self.assertTrue(os.path.exists(newest))
+    
+    def test_evict_spares_kept_segments(self):
+        _, oldest = self.store('oldest', 30)
+        _, middle = self.store('middle', 20)
+        _, newest = self.store('newest', 10)
+        
+        self.cache.evict(keep={oldest})
+        
+        self.assertTrue(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(middle))
+        self.assertTrue(os.path.exists(newest))
+
+
+if __name__ == '__main__':
+    unittest.main()
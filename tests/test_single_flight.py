@@ -0,0 +1,72 @@
+import tempfile
+import threading
+import unittest
+
+from single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.flight = SingleFlight(lock_folder=self.folder.name)
+    
+    def run_concurrently(self, callers, key, fn):
+        results = []
+        errors = []
+        
+        def call():
+            try:
+                results.append(self.flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results, errors
+    
+    def test_concurrent_callers_share_one_computation(self):
+        release = threading.Event()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            release.wait(10)
+            return {'plan': 'shared'}
+        
+        # Let every caller queue up behind the leader before it finishes
+        threading.Timer(0.2, release.set).start()
+        results, errors = self.run_concurrently(5, 'document.pdf', compute)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'plan': 'shared'}] * 5)
+    
+    def test_error_reaches_every_waiter(self):
+        release = threading.Event()
+        
+        def compute():
+            release.wait(10)
+            raise RuntimeError('analysis failed')
+        
+        threading.Timer(0.2, release.set).start()
+        results, errors = self.run_concurrently(3, 'document.pdf', compute)
+        
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+    
+    def test_later_calls_compute_again(self):
+        self.assertEqual(self.flight.do('document.pdf', lambda: 1), 1)
+        self.assertEqual(self.flight.do('document.pdf', lambda: 2), 2)
+    
+    def test_different_keys_do_not_share(self):
+        self.assertEqual(self.flight.do('a.pdf', lambda: 'a'), 'a')
+        self.assertEqual(self.flight.do('b.pdf', lambda: 'b'), 'b')
+
+
+if __name__ == '__main__':
+    unittest.main()
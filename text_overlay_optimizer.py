@@ -3,15 +3,19 @@ import json
 import random
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
-from moviepy.editor import TextClip
+from moviepy.editor import ImageClip
+from overlay_cache import OverlayCache
 
 class TextOverlayOptimizer:
-    def __init__(self, fonts_folder='static/fonts'):
+    def __init__(self, fonts_folder='static/fonts', overlay_cache=None):
         self.fonts_folder = fonts_folder
         
         # Create fonts directory if it doesn't exist
         os.makedirs(fonts_folder, exist_ok=True)
         
+        # Rasterised text is cached, so repeated titles are only drawn once
+        self.overlay_cache = overlay_cache or OverlayCache(os.path.join(fonts_folder, '.overlays'))
+        
         # Define optimized font settings for different content types
         self.font_settings = {
             "technical": {
@@ -182,18 +186,12 @@ class TextOverlayOptimizer:
         
         # If font doesn't exist, use default system font
         if not os.path.exists(font_path):
-            font_path = None  # MoviePy will use default font
-        
-        # Convert RGBA background to string format if needed
-        if isinstance(bg_color, tuple) and len(bg_color) == 4:
-            # For TextClip, we'll handle transparency differently
-            # For now, just use the RGB part
-            bg_color = f'rgb({bg_color[0]}, {bg_color[1]}, {bg_color[2]})'
+            font_path = None  # The overlay cache falls back to a system font
         
-        # Create text clip with padding
-        txt_clip = TextClip(text, fontsize=font_size, font=font_path, color=color, 
-                           bg_color=bg_color, size=(width-2*margin, None), 
-                           method='caption', align='center')
+        # Draw the text (or reuse an earlier drawing); the RGBA background keeps its transparency
+        overlay = self.overlay_cache.render(text, font=font_path, font_size=font_size, color=color,
+                                            bg_color=bg_color, width=width - 2 * margin, align='center')
+        txt_clip = ImageClip(overlay, transparent=True)
         
         # Set duration
         txt_clip = txt_clip.set_duration(duration)
@@ -0,0 +1,188 @@
+import os
+import json
+import fcntl
+import threading
+import numpy as np
+
+class CorpusTopicIndex:
+    """
+    Persistent document-frequency index over every PDF analysed so far.
+    
+    The vocabulary is an append-only text file (a term's id is its line number)
+    and document frequencies live in a NumPy array that is memory-mapped from
+    disk, so loading the index at startup doesn't read it into memory. Adding a
+    document only touches that document's terms: new terms are appended, the
+    frequency array grows by doubling, and existing counts are incremented in
+    place. Updates from several processes are serialised with a file lock.
+    """
+    def __init__(self, index_folder='uploads/.topic_index', initial_capacity=65536):
+        self.index_folder = index_folder
+        self.initial_capacity = initial_capacity
+        
+        # Create index directory if it doesn't exist
+        os.makedirs(index_folder, exist_ok=True)
+        
+        self.vocabulary_path = os.path.join(index_folder, 'vocabulary.txt')
+        self.documents_path = os.path.join(index_folder, 'documents.txt')
+        self.frequencies_path = os.path.join(index_folder, 'document_frequencies.npy')
+        self.meta_path = os.path.join(index_folder, 'meta.json')
+        self.lock_path = os.path.join(index_folder, '.lock')
+        
+        # In-memory views, refreshed incrementally from the files
+        self.vocabulary = {}
+        self.document_count = 0
+        self._documents = set()
+        self._vocabulary_offset = 0
+        self._documents_offset = 0
+        self._frequencies = None
+        self._frequencies_stat = None
+        self._thread_lock = threading.Lock()
+        
+        with self._thread_lock:
+            self._refresh()
+    
+    def _refresh(self):
+        """Pick up terms, documents and array resizes written by other processes"""
+        self._vocabulary_offset = self._read_new_lines(
+            self.vocabulary_path, self._vocabulary_offset, self._add_vocabulary_term
+        )
+        self._documents_offset = self._read_new_lines(
+            self.documents_path, self._documents_offset, self._documents.add
+        )
+        
+        try:
+            with open(self.meta_path, 'r') as f:
+                self.document_count = json.load(f)['documents']
+        except (OSError, ValueError, KeyError):
+            self.document_count = 0
+        
+        # Reopen the memory map if the array file was replaced by a resize
+        try:
+            stat = os.stat(self.frequencies_path)
+            stat_key = (stat.st_ino, stat.st_size)
+        except OSError:
+            stat_key = None
+        
+        if stat_key is None:
+            self._frequencies = None
+        elif stat_key != self._frequencies_stat:
+            self._frequencies = np.load(self.frequencies_path, mmap_mode='r+')
+        self._frequencies_stat = stat_key
+    
+    def _read_new_lines(self, path, offset, add):
+        """Feed lines appended to a file since offset to add(); return the new offset"""
+        if not os.path.exists(path):
+            return 0
+        
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # A line without a newline is still being written
+                if not line.endswith(b'\n'):
+                    break
+                add(line[:-1].decode('utf-8'))
+                offset += len(line)
+        
+        return offset
+    
+    def _add_vocabulary_term(self, term):
+        self.vocabulary[term] = len(self.vocabulary)
+    
+    def _ensure_capacity(self, size):
+        """Grow the frequency array by doubling so appends stay amortised O(1)"""
+        capacity = 0 if self._frequencies is None else len(self._frequencies)
+        if size <= capacity:
+            return
+        
+        new_capacity = max(capacity, self.initial_capacity)
+        while new_capacity < size:
+            new_capacity *= 2
+        
+        temp_path = f"{self.frequencies_path}.{os.getpid()}.tmp"
+        frequencies = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.int64, shape=(new_capacity,))
+        if capacity:
+            frequencies[:capacity] = self._frequencies
+        frequencies.flush()
+        del frequencies
+        os.replace(temp_path, self.frequencies_path)
+        
+        self._frequencies = np.load(self.frequencies_path, mmap_mode='r+')
+        stat = os.stat(self.frequencies_path)
+        self._frequencies_stat = (stat.st_ino, stat.st_size)
+    
+    def add_document(self, document_id, terms):
+        """
+        Count a document's distinct terms into the index.
+        
+        Returns False if the document was already indexed.
+        """
+        terms = set(terms)
+        
+        with self._thread_lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                
+                if document_id in self._documents:
+                    return False
+                
+                # Append terms we haven't seen before
+                new_terms = [term for term in terms if term not in self.vocabulary]
+                if new_terms:
+                    with open(self.vocabulary_path, 'ab') as f:
+                        f.write(''.join(f"{term}\n" for term in new_terms).encode('utf-8'))
+                    self._vocabulary_offset = os.path.getsize(self.vocabulary_path)
+                    for term in new_terms:
+                        self._add_vocabulary_term(term)
+                
+                self._ensure_capacity(len(self.vocabulary))
+                
+                # Increment only this document's entries
+                term_ids = np.fromiter((self.vocabulary[term] for term in terms), dtype=np.int64, count=len(terms))
+                self._frequencies[term_ids] += 1
+                self._frequencies.flush()
+                
+                with open(self.documents_path, 'ab') as f:
+                    f.write(f"{document_id}\n".encode('utf-8'))
+                self._documents_offset = os.path.getsize(self.documents_path)
+                self._documents.add(document_id)
+                
+                self.document_count += 1
+                temp_meta_path = f"{self.meta_path}.{os.getpid()}.tmp"
+                with open(temp_meta_path, 'w') as f:
+                    json.dump({'documents': self.document_count, 'vocabulary_size': len(self.vocabulary)}, f)
+                os.replace(temp_meta_path, self.meta_path)
+                
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def document_frequencies(self, terms):
+        """Return the document frequency of each term (0 for unseen terms)"""
+        with self._thread_lock:
+            self._refresh()
+            
+            term_ids = np.array([self.vocabulary.get(term, -1) for term in terms], dtype=np.int64)
+            frequencies = np.zeros(len(term_ids), dtype=np.int64)
+            # Terms appended by another process before it grew the array count as unseen
+            capacity = 0 if self._frequencies is None else len(self._frequencies)
+            known = (term_ids >= 0) & (term_ids < capacity)
+            if known.any():
+                frequencies[known] = self._frequencies[term_ids[known]]
+            
+            return frequencies, self.document_count
+    
+    def tfidf(self, term_counts):
+        """Score a document's term counts against the corpus with smoothed TF-IDF"""
+        terms = list(term_counts)
+        if not terms:
+            return {}
+        
+        frequencies, document_count = self.document_frequencies(terms)
+        counts = np.array([term_counts[term] for term in terms], dtype=np.float64)
+        
+        # Same smoothing as scikit-learn: idf = ln((1 + N) / (1 + df)) + 1
+        idf = np.log((1.0 + document_count) / (1.0 + frequencies)) + 1.0
+        scores = counts * idf
+        
+        return dict(zip(terms, scores.tolist()))
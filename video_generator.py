@@ -2,17 +2,30 @@ import os
 import json
 import random
 import time
+import shutil
+import tempfile
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+from ffmpeg_tools import find_ffmpeg, encode_still
+from render_store import RenderStore
+from encoding_profiles import get_profile, scale_to_profile
 
 class VideoGenerator:
-    def __init__(self, upload_folder='uploads', output_folder='static/videos'):
+    def __init__(self, upload_folder='uploads', output_folder='static/videos', render_store=None, render_seed=None,
+                 encoding_profile='standard'):
         self.upload_folder = upload_folder
         self.output_folder = output_folder
         
         # Create output directory if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
         
+        # Slides are stored by a hash of their inputs; the seed makes background colour choices reproducible
+        self.render_store = render_store or RenderStore(output_folder)
+        self.render_seed = render_seed
+        
+        # Named encoding profile (see encoding_profiles.py); plans can ask for another one
+        self.encoding_profile = get_profile(encoding_profile)['name']
+        
         # Font settings
         self.font_path = os.path.join('static', 'fonts', 'OpenSans-Regular.ttf')
         
@@ -53,32 +66,97 @@ class VideoGenerator:
         try:
             font = ImageFont.truetype(self.font_path, font_size)
         except IOError:
-            font = ImageFont.load_default()
+            font = ImageFont.load_default(size=font_size)
         
         # Calculate text position (centered)
-        text_width, text_height = draw.textsize(text, font=font)
-        position = ((width - text_width) // 2, (height - text_height) // 2)
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        text_width, text_height = right - left, bottom - top
+        position = ((width - text_width) // 2 - left, (height - text_height) // 2 - top)
         
         # Draw text
         draw.text(position, text, font=font, fill=text_color)
         
         return np.array(img)
     
-    def generate_concept_video(self, concept, video_id, duration=180):
-        """Generate a video for a single concept"""
+    def render_slide(self, text, output_path, duration=None, bg_color=None, audio_path=None, profile=None):
+        """
+        Render a text slide as a video, encoded with the named profile.
+        
+        A slide never changes, so its single frame is encoded as a looped
+        still rather than rendering every frame. Returns False if ffmpeg isn't
+        available or fails.
+        """
+        if not find_ffmpeg():
+            return False
+        
+        encoding = get_profile(profile or self.encoding_profile)
+        frame = self._create_text_frame(
+            text,
+            encoding['width'],
+            encoding['height'],
+            bg_color=bg_color or random.choice(self.bg_colors),
+            font_size=scale_to_profile(60, encoding)
+        )
+        
+        temp_folder = tempfile.mkdtemp(prefix='slide-', dir=self.output_folder)
         try:
-            # In a real implementation, this would use moviepy to create videos
-            # For the demo, we'll just return a success message
+            frame_path = os.path.join(temp_folder, 'frame.png')
+            Image.fromarray(frame).save(frame_path)
             
+            temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+            encode_still(frame_path, temp_path, duration or self.default_duration, fps=encoding['fps'],
+                         audio_path=audio_path, preset=encoding['preset'], crf=encoding['crf'],
+                         threads=encoding['threads'], audio_bitrate=encoding['audio_bitrate'])
+            os.replace(temp_path, output_path)
+            return True
+        except Exception as e:
+            print(f"Warning: Failed to render slide: {str(e)}")
+            return False
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+    
+    def _sound_for(self, concept):
+        """The first available sound file named by the concept's sound suggestions, or None"""
+        for sound in concept.get('sounds', []):
+            for name, path in self.sound_files.items():
+                if name in str(sound).lower() and os.path.exists(path):
+                    return path
+        return None
+    
+    def generate_concept_video(self, concept, video_id, duration=180, seed=None, profile=None):
+        """Generate a video for a single concept; seed and profile default to the generator's"""
+        try:
             # Extract concept details
             title = concept['name']
             description = concept['explanation']
             
-            # Set output path
-            output_path = os.path.join(self.output_folder, f"{video_id}.mp4")
+            if seed is None:
+                seed = self.render_seed
+            encoding = get_profile(profile or self.encoding_profile)
+            
+            # The same seed and title always get the same background colour
+            bg_color = random.Random(json.dumps([seed, title])).choice(self.bg_colors)
+            audio_path = self._sound_for(concept)
             
-            # In a real implementation, we would create and save the video here
-            # For now, we'll just simulate success
+            # Slides are stored by their content, so an identical slide is never rendered twice
+            key = self.render_store.key({
+                'slide': title,
+                'bg_color': bg_color,
+                'audio': audio_path,
+                'duration': duration,
+                'encoding': encoding
+            })
+            output_path = self.render_store.object_path(key)
+            
+            # Render the concept's title slide; without ffmpeg we just simulate success
+            if self.render_store.get(key) or self.render_slide(title, output_path, duration=duration, bg_color=bg_color,
+                                                               audio_path=audio_path, profile=encoding['name']):
+                return {
+                    "success": True,
+                    "video_path": output_path,
+                    "duration": duration,
+                    "render_key": key
+                }
             
             return {
                 "success": True,
@@ -92,18 +170,30 @@ class VideoGenerator:
                 "error": str(e)
             }
     
-    def generate_videos_from_plan(self, video_plan):
-        """Generate videos based on a video generation plan"""
+    def generate_videos_from_plan(self, video_plan, on_result=None, completed=None):
+        """
+        Generate videos based on a video generation plan
+        
+        on_result and completed work as in EnhancedVideoGenerator.generate_videos_from_plan.
+        """
         try:
             # Extract plan details
             filename = video_plan.get('filename', 'document.pdf')
             videos = video_plan.get('videos', [])
             
+            # The plan's seed and encoding profile override the generator's
+            seed = video_plan.get('render_seed', self.render_seed)
+            profile = get_profile(video_plan.get('encoding_profile') or self.encoding_profile)['name']
+            
             # Results to track generated videos
             results = []
             
             # Generate a video for each concept in the plan
-            for video_spec in videos:
+            for position, video_spec in enumerate(videos):
+                if completed and position in completed:
+                    results.append(completed[position])
+                    continue
+                
                 video_id = video_spec['video_id']
                 title = video_spec['title']
                 description = video_spec['description']
@@ -117,7 +207,7 @@ class VideoGenerator:
                 }
                 
                 # Generate the video
-                result = self.generate_concept_video(concept, video_id)
+                result = self.generate_concept_video(concept, video_id, seed=seed, profile=profile)
                 
                 if result['success']:
                     # Add metadata to the result
@@ -126,35 +216,54 @@ class VideoGenerator:
                     result['tags'] = video_spec.get('tags', [])
                 
                 results.append(result)
+                
+                if on_result:
+                    on_result(position, result)
             
-            # Return the results
-            return {
+            result = {
                 "success": True,
                 "filename": filename,
                 "videos": results
             }
             
+            # Point the document's manifest at its videos and keep the store within budget
+            try:
+                self.render_store.record_render(os.path.join(self.upload_folder, filename), video_plan, result)
+            except OSError as e:
+                print(f"Warning: Could not record renders for {filename}: {e}")
+            
+            return result
+            
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    def mock_generate_videos(self, video_plan):
+    def mock_generate_videos(self, video_plan, on_result=None, completed=None):
         """
         Mock video generation for development purposes.
         In a real implementation, this would actually generate videos.
+        on_result and completed work as in EnhancedVideoGenerator.generate_videos_from_plan.
         """
         try:
             # Extract plan details
             filename = video_plan.get('filename', 'document.pdf')
             videos = video_plan.get('videos', [])
             
+            # The plan's seed and encoding profile override the generator's
+            seed = video_plan.get('render_seed', self.render_seed)
+            profile = get_profile(video_plan.get('encoding_profile') or self.encoding_profile)['name']
+            
             # Results to track generated videos
             results = []
             
             # For each video in the plan
-            for video_spec in videos:
+            for position, video_spec in enumerate(videos):
+                if completed and position in completed:
+                    results.append(completed[position])
+                    continue
+                
                 video_id = video_spec['video_id']
                 title = video_spec['title']
                 description = video_spec['description']
@@ -176,14 +285,24 @@ class VideoGenerator:
                 
                 # Simulate processing time
                 time.sleep(0.5)
+                
+                if on_result:
+                    on_result(position, mock_result)
             
-            # Return the results
-            return {
+            result = {
                 "success": True,
                 "filename": filename,
                 "videos": results
             }
             
+            # Point the document's manifest at its videos and keep the store within budget
+            try:
+                self.render_store.record_render(os.path.join(self.upload_folder, filename), video_plan, result)
+            except OSError as e:
+                print(f"Warning: Could not record renders for {filename}: {e}")
+            
+            return result
+            
         except Exception as e:
             return {
                 "success": False,